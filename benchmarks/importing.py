@@ -0,0 +1,75 @@
+from typing import List, Tuple
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+# Директория проекта (из неё импортируется `main`)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Модули, которые не должны загружаться при импорте `main`
+HEAVY_MODULES = ('matplotlib', 'matplotlib.pyplot', 'numpy', 'jsonpickle',
+                 'fpdf', 'webbrowser', 'domain.plotting')
+# Допустимое время импорта `main` (в секундах)
+IMPORT_TIME_LIMIT = 0.25
+# Кол-во замеров (берётся наименьшее время)
+AMOUNT_REPEATS = 5
+
+# Код, выполняемый в отдельном интерпретаторе: время импорта и список
+# загруженных тяжёлых модулей
+SCRIPT = '''
+import json, sys, time
+time_start = time.perf_counter()
+import main
+time_import = time.perf_counter() - time_start
+print(json.dumps([time_import, [m for m in {modules} if m in sys.modules]]))
+'''
+
+
+def measure(module_names: Tuple[str, ...] = HEAVY_MODULES) -> Tuple[
+        float, List[str]]:
+    """
+    Замеряет время импорта `main` в новом интерпретаторе (как при запуске
+    задания) и возвращает его вместе со списком загруженных тяжёлых модулей
+
+    :param module_names: Имена тяжёлых модулей
+    :type module_names: Tuple[str, ...]
+    :return: Время импорта (в секундах) и загруженные тяжёлые модули
+    :rtype: Tuple[float, List[str]]
+    """
+    output = subprocess.run(
+        [sys.executable, '-c', SCRIPT.format(modules=list(module_names))],
+        cwd=ROOT, check=True, capture_output=True, text=True).stdout
+    time_import, modules = json.loads(output.splitlines()[-1])
+    return time_import, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Замер времени импорта `main`. Код завершения 1, если '
+                    'время превышает предел или загружаются тяжёлые модули.')
+    parser.add_argument('-l', '--limit', type=float, default=IMPORT_TIME_LIMIT,
+                        help='допустимое время импорта (в секундах)')
+    parser.add_argument('-r', '--repeats', type=int, default=AMOUNT_REPEATS,
+                        help='кол-во замеров')
+    arguments = parser.parse_args()
+
+    results = [measure() for _ in range(arguments.repeats)]
+    time_import = min(r[0] for r in results)
+    modules = sorted({m for r in results for m in r[1]})
+    print(f'Время импорта `main`: {time_import * 1000:.1f} мс '
+          f'(предел {arguments.limit * 1000:.0f} мс).')
+
+    failed = False
+    if modules:
+        print(f'При импорте `main` загружены тяжёлые модули: {modules}!')
+        failed = True
+    if time_import > arguments.limit:
+        print('Время импорта превышает предел!')
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
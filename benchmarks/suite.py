@@ -0,0 +1,467 @@
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import tracemalloc
+
+import numpy
+
+from domain.configuration import DataConfiguration
+from domain.loading import load_configuration
+from utils.decorators import time_measurement
+
+
+# Директория проекта
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Файл с данными, по которому строятся замеры
+FILE_DATA = os.path.join(ROOT, 'data_example.json')
+# Файл базовых результатов
+FILE_BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+# Допустимое ухудшение относительно базовых результатов (доля)
+TOLERANCE = 0.25
+# Кол-во повторов замера времени (берётся наименьшее время)
+AMOUNT_REPEATS = 3
+
+# Размеры задач при масштабе 1
+AMOUNT_ITERATIONS = 20000
+AMOUNT_ITERATIONS_JIT = 200000
+BASINS_SHAPE = (201, 301)
+REST_POINTS_SHAPE = (401, 401)
+SOLVE_AMOUNT_POINTS = 20000
+SWEEP_AMOUNT_VALUES = 2000
+PDF_AMOUNT_POINTS = 200000
+
+
+class Benchmark:
+    """
+    Замер одного этапа вычислений. `prepare` готовит входные данные (его
+    время не учитывается) и возвращает функцию, выполняющую этап и
+    возвращающую объём выполненной работы в единицах `unit`
+    """
+
+    __slots__ = ('name', 'unit', 'prepare', 'is_available')
+
+    def __init__(self, name: str, unit: str,
+                 prepare: Callable[[DataConfiguration, float],
+                                   Callable[[], float]],
+                 is_available: Optional[Callable[[], bool]] = None):
+        """
+        Конструктор класса
+
+        :param name: Имя замера
+        :param unit: Единица работы (например, `steps`)
+        :param prepare: Функция подготовки замера по конфигурационным данным
+        и масштабу
+        :param is_available: Функция, проверяющая, можно ли выполнить замер
+        в текущем окружении (None - можно всегда)
+        """
+        self.name = name
+        self.unit = unit
+        self.prepare = prepare
+        self.is_available = is_available
+
+
+def __prepare_rk4(data: DataConfiguration,
+                  scale: float) -> Callable[[], float]:
+    """
+    Интегрирование всех траекторий файла методом Рунге-Кутты без досрочной
+    остановки (этап, заменивший `__get_next_point` и
+    `__get_trajectory_points`) над массивами `numpy`
+
+    :param data: Конфигурационные данные
+    :type data: DataConfiguration
+    :param scale: Масштаб задачи
+    :type scale: float
+    :return: Функция, выполняющая этап
+    :rtype: Callable[[], float]
+    """
+    data.amount_iterations = max(1, int(AMOUNT_ITERATIONS * scale))
+    data.jit = False
+    return __get_rk4_run(data)
+
+
+def __prepare_rk4_jit(data: DataConfiguration,
+                      scale: float) -> Callable[[], float]:
+    """
+    То же, что `__prepare_rk4`, но шаги выполняются скомпилированным ядром
+    (`domain.jitting`). Кол-во шагов при любом масштабе не меньше
+    `JIT_MIN_ITERATIONS`, иначе ядро не используется
+
+    :param data: Конфигурационные данные
+    :type data: DataConfiguration
+    :param scale: Масштаб задачи
+    :type scale: float
+    :return: Функция, выполняющая этап
+    :rtype: Callable[[], float]
+    """
+    from domain.integrating import JIT_MIN_ITERATIONS
+
+    data.amount_iterations = max(JIT_MIN_ITERATIONS,
+                                 int(AMOUNT_ITERATIONS_JIT * scale))
+    data.jit = True
+    return __get_rk4_run(data)
+
+
+def __get_rk4_run(data: DataConfiguration) -> Callable[[], float]:
+    """
+    Возвращает функцию, интегрирующую все траектории файла методом
+    Рунге-Кутты без досрочной остановки
+
+    :param data: Конфигурационные данные
+    :type data: DataConfiguration
+    :return: Функция, возвращающая кол-во выполненных шагов
+    :rtype: Callable[[], float]
+    """
+    from domain.classes.point import Point
+    from domain.functions import get_system_for_expressions
+    from domain.integrating import integrate
+
+    system = get_system_for_expressions(data)
+    portraits = [(Point.parse_all([t.point for t in v.trajectories]),
+                  v.parameters) for v in data.dataset.values]
+
+    def run() -> float:
+        steps = 0
+        for points, parameters in portraits:
+            trajectories = integrate(points, system, parameters, data, 'rk4',
+                                     stoppable=[False] * len(points))
+            steps += sum(t.steps for t in trajectories)
+        return steps
+    return run
+
+
+def __prepare_basins(data: DataConfiguration,
+                     scale: float) -> Callable[[], float]:
+    """
+    Разбиение плоскости на области притяжения (основная часть
+    `__plot_separate_line`)
+
+    :param data: Конфигурационные данные
+    :type data: DataConfiguration
+    :param scale: Масштаб задачи
+    :type scale: float
+    :return: Функция, выполняющая этап
+    :rtype: Callable[[], float]
+    """
+    from domain.classes.point import Point
+    from domain.functions import get_system_for_expressions
+    from domain.integrating import Convergence
+    from domain.separating import classify_basins
+    from domain.solving import find_rest_points
+
+    system = get_system_for_expressions(data)
+    parameters = data.dataset.values[0].parameters
+    rest_points = [p for p in find_rest_points(
+        system, parameters, Point.try_parse(data.rest_search_start),
+        Point.try_parse(data.rest_search_end)) if p.stable]
+    shape = tuple(max(2, int(s * scale ** 0.5)) for s in BASINS_SHAPE)
+
+    def run() -> float:
+        classify_basins(system.vectorized(parameters), rest_points,
+                        Point(0, 1), Point(1, 8), shape,
+                        convergence=Convergence(rest_points=rest_points,
+                                                radius=0.01))
+        return shape[0] * shape[1]
+    return run
+
+
+def __prepare_rest_points(data: DataConfiguration,
+                          scale: float) -> Callable[[], float]:
+    """
+    Поиск точек покоя полной системы на сетке
+
+    :param data: Конфигурационные данные
+    :type data: DataConfiguration
+    :param scale: Масштаб задачи
+    :type scale: float
+    :return: Функция, выполняющая этап
+    :rtype: Callable[[], float]
+    """
+    from domain.classes.point import Point
+    from domain.functions import get_system_for_expressions
+    from domain.solving import find_rest_points
+
+    system = get_system_for_expressions(data)
+    shape = tuple(max(2, int(s * scale ** 0.5)) for s in REST_POINTS_SHAPE)
+
+    def run() -> float:
+        for v in data.dataset.values:
+            find_rest_points(system, v.parameters,
+                             Point.try_parse(data.rest_search_start),
+                             Point.try_parse(data.rest_search_end), shape)
+        return shape[0] * shape[1] * len(data.dataset.values)
+    return run
+
+
+def __prepare_solve(data: DataConfiguration,
+                    scale: float) -> Callable[[], float]:
+    """
+    Поиск корней уравнения `simplified` функцией `solve`
+
+    :param data: Конфигурационные данные
+    :type data: DataConfiguration
+    :param scale: Масштаб задачи
+    :type scale: float
+    :return: Функция, выполняющая этап
+    :rtype: Callable[[], float]
+    """
+    from domain.functions import get_system_for_solving
+    from domain.solving import solve
+
+    system = get_system_for_solving(data)
+    functions = [(system.scalar(v.parameters), system.vectorized(v.parameters))
+                 for v in data.dataset.values]
+    amount_points = max(2, int(SOLVE_AMOUNT_POINTS * scale))
+
+    def run() -> float:
+        for function, function_vectorized in functions:
+            solve(lambda x: function(x, 0)[0], (0, 1), amount_points,
+                  f_vectorized=lambda x: function_vectorized(x, 0)[0])
+        return amount_points * len(functions)
+    return run
+
+
+def __prepare_sweep(data: DataConfiguration,
+                    scale: float) -> Callable[[], float]:
+    """
+    Поиск корней уравнения `simplified` на сетке значений параметра
+
+    :param data: Конфигурационные данные
+    :type data: DataConfiguration
+    :param scale: Масштаб задачи
+    :type scale: float
+    :return: Функция, выполняющая этап
+    :rtype: Callable[[], float]
+    """
+    from domain.functions import get_system_for_solving
+    from domain.sweeping import sweep_roots
+
+    system = get_system_for_solving(data)
+    parameters = dict(data.dataset.values[0].parameters)
+    name = data.expressions.parameters_variables[-1]
+    values = numpy.linspace(parameters[name] * 0.5, parameters[name] * 2,
+                            max(2, int(SWEEP_AMOUNT_VALUES * scale)))
+
+    def run() -> float:
+        sweep_roots(system, parameters, {name: values})
+        return len(values)
+    return run
+
+
+def __prepare_pdf(data: DataConfiguration,
+                  scale: float) -> Callable[[], float]:
+    """
+    Рисование траекторий и формирование документа `PDF`
+
+    :param data: Конфигурационные данные
+    :type data: DataConfiguration
+    :param scale: Масштаб задачи
+    :type scale: float
+    :return: Функция, выполняющая этап
+    :rtype: Callable[[], float]
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure
+    from domain.rendering import plot_trajectories
+    from domain.visualizing import show_as_pdf
+
+    amount = max(2, int(PDF_AMOUNT_POINTS * scale))
+    times = numpy.linspace(0, 50, amount)
+    trajectories = [numpy.stack((
+        0.5 + 0.4 * numpy.exp(-times / 10) * numpy.cos(times * k),
+        4 + 3 * numpy.exp(-times / 10) * numpy.sin(times * k)), axis=1)
+        for k in range(1, 11)]
+    colors = [f'C{k}' for k in range(len(trajectories))]
+    renderer = data.plotting.renderer
+
+    def run() -> float:
+        figures = []
+        for _ in data.dataset.values:
+            figure = Figure(figsize=(21, 10))
+            plot_trajectories(figure.add_subplot(), trajectories, colors,
+                              renderer)
+            figures.append(figure)
+        with tempfile.TemporaryDirectory() as directory:
+            show_as_pdf(figures, directory, 'benchmark', show=False)
+        return len(figures)
+    return run
+
+
+def __is_jit_available() -> bool:
+    """
+    Возвращает True, если установлен `numba`
+
+    :return: Доступна ли компиляция
+    :rtype: bool
+    """
+    from domain.jitting import is_available
+
+    return is_available()
+
+
+BENCHMARKS = [
+    Benchmark('rk4', 'steps', __prepare_rk4),
+    Benchmark('rk4_jit', 'steps', __prepare_rk4_jit, __is_jit_available),
+    Benchmark('basins', 'cells', __prepare_basins),
+    Benchmark('rest_points', 'cells', __prepare_rest_points),
+    Benchmark('solve', 'nodes', __prepare_solve),
+    Benchmark('sweep', 'values', __prepare_sweep),
+    Benchmark('pdf', 'pages', __prepare_pdf),
+]
+
+
+def run_benchmark(benchmark: Benchmark, content: str, scale: float,
+                  repeats: int = AMOUNT_REPEATS) -> Dict[str, Any]:
+    """
+    Выполняет замер: `repeats` раз без отслеживания памяти (берётся
+    наименьшее время) и один раз с `tracemalloc` для пиковой памяти
+
+    :param benchmark: Замер
+    :type benchmark: Benchmark
+    :param content: Содержимое файла с данными
+    :type content: str
+    :param scale: Масштаб задач
+    :type scale: float
+    :param repeats: Кол-во повторов
+    :type repeats: int
+    :return: Объём работы, время, пропускная способность (единиц в
+    секунду) и пиковая память (в байтах)
+    :rtype: Dict[str, Any]
+    """
+    run = time_measurement()(
+        benchmark.prepare(load_configuration(content), scale))
+    # Первый запуск прогревает компиляцию выражений и импорты
+    work, _ = run()
+    elapsed = min(run()[1] for _ in range(repeats))
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'unit': benchmark.unit, 'work': work, 'time': elapsed,
+            'throughput': work / elapsed, 'peak_memory': peak}
+
+
+def compare(results: Dict[str, Dict[str, Any]],
+            baseline: Dict[str, Dict[str, Any]],
+            tolerance: float = TOLERANCE) -> List[str]:
+    """
+    Сравнивает результаты с базовыми и возвращает описания ухудшений
+    больше `tolerance`
+
+    :param results: Результаты замеров
+    :type results: Dict[str, Dict[str, Any]]
+    :param baseline: Базовые результаты
+    :type baseline: Dict[str, Dict[str, Any]]
+    :param tolerance: Допустимое ухудшение (доля)
+    :type tolerance: float
+    :return: Описания ухудшений
+    :rtype: List[str]
+    """
+    result = []
+    for name, current in results.items():
+        if name not in baseline:
+            continue
+        base = baseline[name]
+        if current['throughput'] < base['throughput'] * (1 - tolerance):
+            result.append(
+                f'{name}: пропускная способность {current["throughput"]:.4g} '
+                f'{current["unit"]}/с, базовая {base["throughput"]:.4g}')
+        if current['peak_memory'] > base['peak_memory'] * (1 + tolerance):
+            result.append(
+                f'{name}: пиковая память '
+                f'{current["peak_memory"] / 2 ** 20:.1f} МБ, базовая '
+                f'{base["peak_memory"] / 2 ** 20:.1f} МБ')
+    return result
+
+
+def __get_environment() -> Dict[str, str]:
+    """
+    Возвращает описание окружения, в котором получены результаты
+
+    :return: Версии интерпретатора и библиотек, платформа
+    :rtype: Dict[str, str]
+    """
+    return {'python': platform.python_version(), 'numpy': numpy.__version__,
+            'platform': platform.platform(), 'machine': platform.machine()}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Замеры пропускной способности и пиковой памяти этапов '
+                    'вычислений. Код завершения 1, если результат хуже '
+                    'базового больше чем на допустимую долю.')
+    parser.add_argument('-d', '--data', default=FILE_DATA,
+                        help='файл с данными')
+    parser.add_argument('-s', '--scale', type=float, default=1.0,
+                        help='масштаб задач (кол-во шагов, размеры сеток)')
+    parser.add_argument('-r', '--repeats', type=int, default=AMOUNT_REPEATS,
+                        help='кол-во повторов замера времени')
+    parser.add_argument('-b', '--baseline', default=FILE_BASELINE,
+                        help='файл базовых результатов')
+    parser.add_argument('-t', '--tolerance', type=float, default=TOLERANCE,
+                        help='допустимое ухудшение (доля)')
+    parser.add_argument('--save', action='store_true',
+                        help='сохранить результаты как базовые')
+    parser.add_argument('names', nargs='*', metavar='NAME',
+                        help=f'замеры (по умолчанию все: '
+                             f'{", ".join(b.name for b in BENCHMARKS)})')
+    arguments = parser.parse_args()
+    # Сообщения этапов (например, о сохранении документа) не выводятся
+    logging.getLogger('__main__').setLevel(logging.ERROR)
+
+    with open(arguments.data, encoding='utf-8') as f:
+        content = f.read()
+    benchmarks = [b for b in BENCHMARKS
+                  if not arguments.names or b.name in arguments.names]
+
+    results = {}
+    for benchmark in benchmarks:
+        if benchmark.is_available is not None and \
+                not benchmark.is_available():
+            print(f'{benchmark.name:<12} пропущен (недоступен в окружении)')
+            continue
+        result = run_benchmark(benchmark, content, arguments.scale,
+                               arguments.repeats)
+        results[benchmark.name] = result
+        print(f'{benchmark.name:<12} {result["work"]:>12.0f} '
+              f'{result["unit"]:<6} {result["time"]:>9.3f} с '
+              f'{result["throughput"]:>12.4g} {result["unit"]}/с '
+              f'{result["peak_memory"] / 2 ** 20:>9.1f} МБ')
+
+    # Базовые результаты хранятся отдельно для каждого масштаба
+    key = f'scale={arguments.scale:g}'
+    stored = {}
+    if os.path.exists(arguments.baseline):
+        with open(arguments.baseline, encoding='utf-8') as f:
+            stored = json.load(f)
+
+    if arguments.save:
+        entry = stored.setdefault(key, {'environment': {}, 'results': {}})
+        entry['environment'] = __get_environment()
+        entry['results'].update(results)
+        with open(arguments.baseline, mode='w', encoding='utf-8') as f:
+            json.dump(stored, f, indent=2, sort_keys=True)
+        print(f'Базовые результаты сохранены: "{arguments.baseline}".')
+        return
+
+    if key not in stored:
+        print(f'Нет базовых результатов для {key}.')
+        return
+    regressions = compare(results, stored[key]['results'],
+                          arguments.tolerance)
+    for regression in regressions:
+        print(f'Ухудшение: {regression}')
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+from __future__ import annotations
+from typing import Any, List, Optional, TYPE_CHECKING
+import hashlib
+import json
+import logging
+import os
+import uuid
+
+import numpy
+
+from domain.classes.trajectory import Trajectory
+from domain.instrumenting import COUNTER_BYTES_WRITTEN, COUNTER_CACHE_HITS, \
+    COUNTER_CACHE_MISSES, count
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+
+LOGGER = logging.getLogger('__main__')
+
+# Версия формата записей кэша: при её изменении старые записи не используются
+CACHE_VERSION = 3
+# Директория кэша по умолчанию
+DEFAULT_DIRECTORY = '.cache'
+# Максимальный размер кэша по умолчанию (в байтах)
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+
+
+class ResultCache:
+    """
+    Кэш вычисленных массивов на диске. Каждая запись - файл `.npy`, имя
+    которого - хэш входных данных вычисления, поэтому записи не нужно
+    инвалидировать: изменение любого входного значения даёт другой ключ.
+    Записи читаются отображением файла в память. Кроме массивов, кэш хранит
+    документы `.pdf` со страницами построенных изображений (см.
+    `store_document`). При превышении `max_size` удаляются записи, к
+    которым дольше всего не обращались.
+
+    Объект хранит только путь и размер, поэтому может передаваться в пул
+    процессов; запись в файл атомарна, поэтому процессы могут использовать
+    один кэш одновременно
+    """
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY,
+                 max_size: int = DEFAULT_MAX_SIZE):
+        """
+        Конструктор класса
+
+        :param directory: Директория кэша
+        :param max_size: Максимальный размер кэша (в байтах)
+        """
+        self.directory = directory
+        self.max_size = max_size
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        """
+        Вычисляет ключ записи по входным данным вычисления. Части ключа
+        должны сериализоваться в `JSON` (точки и массивы - как списки)
+
+        :param parts: Входные данные вычисления
+        :type parts: Any
+        :return: Ключ записи
+        :rtype: str
+        """
+        content = json.dumps([CACHE_VERSION, *parts], sort_keys=True,
+                             default=_to_json)
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def load(self, key: str) -> Optional[numpy.ndarray]:
+        """
+        Возвращает массив записи, отображённый в память, или None, если
+        записи нет
+
+        :param key: Ключ записи
+        :type key: str
+        :return: Массив записи
+        :rtype: Optional[numpy.ndarray]
+        """
+        path = self.__path(key)
+        try:
+            result = numpy.load(path, mmap_mode='r', allow_pickle=False)
+            os.utime(path)
+        except FileNotFoundError:
+            count(COUNTER_CACHE_MISSES)
+            return None
+        except (OSError, ValueError):
+            LOGGER.warning(f'Повреждённая запись кэша удалена: "{path}".')
+            self.__remove(path)
+            count(COUNTER_CACHE_MISSES)
+            return None
+        count(COUNTER_CACHE_HITS)
+        return result
+
+    def store(self, key: str, array: numpy.ndarray):
+        """
+        Сохраняет массив в запись и удаляет старые записи, если размер кэша
+        превышен
+
+        :param key: Ключ записи
+        :type key: str
+        :param array: Массив
+        :type array: numpy.ndarray
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.__path(key)
+        path_temp = f'{path}.{uuid.uuid4().hex}.tmp'
+        try:
+            with open(path_temp, mode='wb') as f:
+                numpy.save(f, numpy.ascontiguousarray(array),
+                           allow_pickle=False)
+                count(COUNTER_BYTES_WRITTEN, f.tell())
+            os.replace(path_temp, path)
+        except OSError as e:
+            LOGGER.warning(f'Не удалось сохранить запись кэша "{path}": {e}')
+            self.__remove(path_temp)
+            return
+        self.__evict()
+
+    def load_trajectory(self, key: str) -> Optional[Trajectory]:
+        """
+        Возвращает фазовую траекторию из записи или None, если записи нет
+
+        :param key: Ключ записи
+        :type key: str
+        :return: Фазовая траектория
+        :rtype: Optional[Trajectory]
+        """
+        array = self.load(key)
+        if array is None:
+            return None
+        # Первая строка записи хранит кол-во шагов метода и шаг по времени,
+        # третий столбец (если есть) - моменты времени точек
+        return Trajectory(
+            array[1:, :2], int(array[0, 0]), float(array[0, 1]),
+            array[1:, 2] if array.shape[1] == 3 else None)
+
+    def store_trajectory(self, key: str, trajectory: Trajectory):
+        """
+        Сохраняет фазовую траекторию в запись
+
+        :param key: Ключ записи
+        :type key: str
+        :param trajectory: Фазовая траектория
+        :type trajectory: Trajectory
+        """
+        array = numpy.zeros((len(trajectory) + 1,
+                             3 if trajectory.has_times else 2))
+        array[0, :2] = trajectory.steps, trajectory.time_step
+        array[1:, :2] = trajectory.points
+        if trajectory.has_times:
+            array[1:, 2] = trajectory.times
+        self.store(key, array)
+
+    def load_document(self, key: str) -> Optional[str]:
+        """
+        Возвращает путь к документу записи или None, если записи нет
+
+        :param key: Ключ записи
+        :type key: str
+        :return: Путь к документу
+        :rtype: Optional[str]
+        """
+        path = self.__path(key, '.pdf')
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            count(COUNTER_CACHE_MISSES)
+            return None
+        count(COUNTER_CACHE_HITS)
+        return path
+
+    def store_document(self, key: str, figures: List[Figure]) -> Optional[
+            str]:
+        """
+        Сохраняет изображения в запись - документ `.pdf` (по странице на
+        изображение)
+
+        :param key: Ключ записи
+        :type key: str
+        :param figures: Изображения
+        :type figures: List[Figure]
+        :return: Путь к документу или None, если его не удалось сохранить
+        :rtype: Optional[str]
+        """
+        from matplotlib.backends.backend_pdf import PdfPages
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.__path(key, '.pdf')
+        path_temp = f'{path}.{uuid.uuid4().hex}.tmp'
+        try:
+            with PdfPages(path_temp) as pdf:
+                for figure in figures:
+                    pdf.savefig(figure)
+            count(COUNTER_BYTES_WRITTEN, os.path.getsize(path_temp))
+            os.replace(path_temp, path)
+        except OSError as e:
+            LOGGER.warning(f'Не удалось сохранить запись кэша "{path}": {e}')
+            self.__remove(path_temp)
+            return None
+        self.__evict()
+        return path
+
+    def __path(self, key: str, extension: str = '.npy') -> str:
+        """
+        Возвращает путь к файлу записи
+
+        :param key: Ключ записи
+        :type key: str
+        :param extension: Расширение файла записи
+        :type extension: str
+        :return: Путь к файлу
+        :rtype: str
+        """
+        return os.path.join(self.directory, f'{key}{extension}')
+
+    def __evict(self):
+        """
+        Удаляет записи, к которым дольше всего не обращались, пока размер
+        кэша превышает `max_size`
+        """
+        entries = []
+        try:
+            with os.scandir(self.directory) as iterator:
+                for entry in iterator:
+                    if entry.name.endswith(('.npy', '.pdf')):
+                        try:
+                            stat = entry.stat()
+                        except FileNotFoundError:
+                            continue
+                        entries.append((stat.st_mtime, stat.st_size,
+                                        entry.path))
+        except FileNotFoundError:
+            return
+
+        size = sum(e[1] for e in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_size:
+                break
+            self.__remove(path)
+            size -= entry_size
+
+    @staticmethod
+    def __remove(path: str):
+        """
+        Удаляет файл, если он существует
+
+        :param path: Путь к файлу
+        :type path: str
+        """
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _to_json(value: Any) -> Any:
+    """
+    Преобразует значение, не сериализуемое в `JSON` напрямую
+
+    :param value: Значение
+    :type value: Any
+    :return: Сериализуемое значение
+    :rtype: Any
+    """
+    if isinstance(value, numpy.ndarray):
+        return value.tolist()
+    if isinstance(value, numpy.generic):
+        return value.item()
+    try:
+        return list(value)
+    except TypeError:
+        raise TypeError(
+            f'Значение типа `{type(value).__name__}` не может быть частью '
+            f'ключа кэша!')
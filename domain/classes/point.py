@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Generator, Any
+from typing import Generator, Any, List, Sequence
 import re
 
 
@@ -8,8 +8,14 @@ class Point:
     Представление двумерной точки (x, y)
     """
 
+    __slots__ = ('__x', '__y')
+
+    # Строка, целиком являющаяся представлением точки (координаты - любые
+    # десятичные числа, в том числе отрицательные и с порядком)
     regex_pattern = re.compile(
-        r'\(\s*([0-9]*(?:[.][0-9]+)?)\s*,\s*([0-9]*(?:[.][0-9]+)?)\s*\)')
+        r'^[ \t]*\([ \t]*([-+]?(?:[0-9]+[.]?[0-9]*|[.][0-9]+)'
+        r'(?:[eE][-+]?[0-9]+)?)[ \t]*,[ \t]*([-+]?(?:[0-9]+[.]?[0-9]*|'
+        r'[.][0-9]+)(?:[eE][-+]?[0-9]+)?)[ \t]*\)[ \t]*$', re.MULTILINE)
 
     def __init__(self, x: float, y: float):
         """
@@ -107,8 +113,35 @@ class Point:
         :rtype: Point | None
         """
         if isinstance(_str, str):
-            find = re.findall(Point.regex_pattern, _str)
-            if len(find) != 1:
+            match = Point.regex_pattern.fullmatch(_str)
+            if match is None:
                 return None
-            return Point(float(find[0][0]), float(find[0][1]))
+            return Point(float(match[1]), float(match[2]))
         raise ValueError('Value is not as string!')
+
+    @staticmethod
+    def parse_all(strings: Sequence[str]) -> List[Point]:
+        """
+        Разбирает список представлений точек одним проходом регулярного
+        выражения по их объединению
+
+        :param strings: Строки вида "(x, y)"
+        :type strings: Sequence[str]
+        :return: Точки
+        :rtype: List[Point]
+        :raises ValueError: Если какая-либо строка не является представлением
+        точки (номер строки - второй аргумент исключения)
+        """
+        if all(isinstance(s, str) and '\n' not in s for s in strings):
+            find = Point.regex_pattern.findall('\n'.join(strings))
+            if len(find) == len(strings):
+                return [Point(float(x), float(y)) for x, y in find]
+
+        # Поиск первой некорректной строки нужен только для сообщения
+        for index, _str in enumerate(strings):
+            if not isinstance(_str, str) or '\n' in _str or \
+                    Point.regex_pattern.fullmatch(_str) is None:
+                raise ValueError(
+                    f'Строка не является представлением точки: {_str!r}',
+                    index)
+        raise ValueError('Строки не являются представлениями точек!', 0)
@@ -0,0 +1,67 @@
+from __future__ import annotations
+from typing import Tuple
+
+from domain.classes.point import Point
+
+
+# Типы точек покоя по собственным значениям матрицы Якоби
+KIND_STABLE_NODE = 'stable node'
+KIND_STABLE_FOCUS = 'stable focus'
+KIND_UNSTABLE_NODE = 'unstable node'
+KIND_UNSTABLE_FOCUS = 'unstable focus'
+KIND_SADDLE = 'saddle'
+KIND_CENTER = 'center'
+KIND_DEGENERATE = 'degenerate'
+
+KINDS_STABLE = (KIND_STABLE_NODE, KIND_STABLE_FOCUS)
+
+
+class RestPoint(Point):
+    """
+    Точка покоя системы с её типом, определённым по собственным значениям
+    матрицы Якоби
+    """
+
+    __slots__ = ('kind', 'eigenvalues')
+
+    def __init__(self, x: float, y: float, kind: str,
+                 eigenvalues: Tuple[complex, complex]):
+        """
+        Конструктор класса
+
+        :param x: x координата точки (абсцисса)
+        :param y: y координата точки (ордината)
+        :param kind: Тип точки покоя
+        :param eigenvalues: Собственные значения матрицы Якоби
+        """
+        super().__init__(x, y)
+        self.kind = kind
+        self.eigenvalues = eigenvalues
+
+    @property
+    def stable(self) -> bool:
+        """
+        Возвращает True, если точка покоя асимптотически устойчива
+
+        :return: Устойчива ли точка покоя
+        :rtype: bool
+        """
+        return self.kind in KINDS_STABLE
+
+    def __str__(self) -> str:
+        """
+        Возвращает строковое представление точки покоя
+
+        :return: Строковое представление точки покоя
+        :rtype: str
+        """
+        return f'RestPoint({self.x}, {self.y}, {self.kind})'
+
+    def __repr__(self) -> str:
+        """
+        Возвращает строковое представление точки покоя
+
+        :return: Строковое представление точки покоя
+        :rtype: str
+        """
+        return f'RestPoint({self.x}, {self.y}, {self.kind})'
@@ -0,0 +1,198 @@
+from __future__ import annotations
+from typing import Generator, Any
+import numpy
+
+from domain.classes.point import Point
+
+
+class Trajectory:
+    """
+    Фазовая траектория, хранящая точки в массиве `numpy` формы (n, 2).
+    Отдельные точки доступны как объекты `Point`, которые создаются только
+    при обращении к ним.
+
+    Моменты времени точек либо задаются массивом `times`, либо считаются
+    равноотстоящими с шагом `time_step`, тогда массив не хранится
+    """
+
+    __slots__ = ('__buffer', '__length', '__times', 'steps', 'time_step')
+
+    def __init__(self, points: numpy.ndarray, steps: int | None = None,
+                 time_step: float = 1.0, times: numpy.ndarray | None = None):
+        """
+        Конструктор класса. Массив не копируется, поэтому траектория может
+        быть представлением части большего массива
+
+        :param points: Массив точек формы (n, 2)
+        :param steps: Кол-во выполненных шагов метода
+        :param time_step: Шаг по времени между соседними точками
+        :param times: Моменты времени точек (заменяет `time_step`)
+        """
+        points = numpy.asarray(points, dtype=numpy.float64)
+        if points.ndim != 2 or points.shape[1] != 2:
+            raise ValueError('Массив точек должен иметь форму (n, 2)!')
+        self.__buffer = points
+        self.__length = len(points)
+        self.steps = len(points) - 1 if steps is None else steps
+        self.time_step = time_step
+        self.__times = None if times is None else \
+            numpy.asarray(times, dtype=numpy.float64)
+
+    @staticmethod
+    def allocate(capacity: int) -> Trajectory:
+        """
+        Создаёт пустую траекторию с заранее выделенным местом под `capacity`
+        точек
+
+        :param capacity: Кол-во точек
+        :type capacity: int
+        :return: Пустая траектория
+        :rtype: Trajectory
+        """
+        result = Trajectory(numpy.empty((capacity, 2)), 0)
+        result.__length = 0
+        return result
+
+    def append(self, x: float, y: float) -> None:
+        """
+        Добавляет точку в конец траектории. Если выделенное место
+        закончилось, массив увеличивается вдвое
+
+        :param x: X координата точки
+        :type x: float
+        :param y: Y координата точки
+        :type y: float
+        """
+        if self.__length == len(self.__buffer):
+            buffer = numpy.empty((max(1, 2 * len(self.__buffer)), 2))
+            buffer[:self.__length] = self.__buffer[:self.__length]
+            self.__buffer = buffer
+        self.__buffer[self.__length] = x, y
+        self.__length += 1
+
+    def extend(self, points: numpy.ndarray) -> None:
+        """
+        Добавляет блок точек в конец траектории. Если выделенного места не
+        хватает, массив увеличивается вдвое (или до нужного размера)
+
+        :param points: Массив точек формы (m, 2)
+        :type points: numpy.ndarray
+        """
+        length = self.__length + len(points)
+        if length > len(self.__buffer):
+            buffer = numpy.empty((max(length, 2 * len(self.__buffer)), 2))
+            buffer[:self.__length] = self.__buffer[:self.__length]
+            self.__buffer = buffer
+        self.__buffer[self.__length:length] = points
+        self.__length = length
+
+    @property
+    def points(self) -> numpy.ndarray:
+        """
+        Возвращает массив точек траектории формы (n, 2) (без копирования)
+
+        :return: Массив точек
+        :rtype: numpy.ndarray
+        """
+        return self.__buffer[:self.__length]
+
+    @property
+    def x(self) -> numpy.ndarray:
+        """
+        Возвращает X координаты точек траектории (без копирования)
+
+        :return: X координаты точек
+        :rtype: numpy.ndarray
+        """
+        return self.__buffer[:self.__length, 0]
+
+    @property
+    def y(self) -> numpy.ndarray:
+        """
+        Возвращает Y координаты точек траектории (без копирования)
+
+        :return: Y координаты точек
+        :rtype: numpy.ndarray
+        """
+        return self.__buffer[:self.__length, 1]
+
+    @property
+    def times(self) -> numpy.ndarray:
+        """
+        Возвращает моменты времени точек траектории
+
+        :return: Моменты времени
+        :rtype: numpy.ndarray
+        """
+        if self.__times is not None:
+            return self.__times[:self.__length]
+        return numpy.arange(self.__length) * self.time_step
+
+    @property
+    def has_times(self) -> bool:
+        """
+        Возвращает True, если моменты времени заданы массивом, а не шагом
+
+        :return: Заданы ли моменты времени массивом
+        :rtype: bool
+        """
+        return self.__times is not None
+
+    @property
+    def last(self) -> Point:
+        """
+        Возвращает последнюю точку траектории
+
+        :return: Последняя точка
+        :rtype: Point
+        """
+        return self[-1]
+
+    def decimate(self, amount: int | None) -> Trajectory:
+        """
+        Возвращает траекторию не более чем из `amount` точек, выбранных с
+        постоянным шагом. Первая и последняя точки сохраняются
+
+        :param amount: Максимальное кол-во точек
+        :type amount: int | None
+        :return: Прореженная траектория
+        :rtype: Trajectory
+        """
+        if amount is None or self.__length <= amount:
+            return self
+        if amount < 2:
+            raise ValueError('Кол-во точек должно быть не меньше двух!')
+        indexes = numpy.unique(numpy.linspace(
+            0, self.__length - 1, amount).round().astype(int))
+        return Trajectory(self.points[indexes], self.steps,
+                          times=self.times[indexes])
+
+    def __len__(self) -> int:
+        """
+        Возвращает кол-во точек траектории
+
+        :return: Кол-во точек
+        :rtype: int
+        """
+        return self.__length
+
+    def __getitem__(self, index: int) -> Point:
+        """
+        Возвращает точку траектории с заданным номером
+
+        :param index: Номер точки
+        :type index: int
+        :return: Точка
+        :rtype: Point
+        """
+        x, y = self.points[index]
+        return Point(float(x), float(y))
+
+    def __iter__(self) -> Generator[Point, Any, None]:
+        """
+        Итератор по точкам траектории
+
+        :return: Точки траектории
+        """
+        for x, y in self.points.tolist():
+            yield Point(x, y)
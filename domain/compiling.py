@@ -0,0 +1,300 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from functools import lru_cache
+import ast
+import math
+
+import numpy
+
+from domain.preprocessing import Program, differentiate, preprocess
+
+
+# Узлы синтаксического дерева, допустимые в выражениях
+ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Constant,
+    ast.Load, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod,
+    ast.FloorDiv, ast.USub, ast.UAdd
+)
+
+# Шаг конечных разностей при вычислении матрицы Якоби
+JACOBIAN_STEP = 1e-6
+
+# Имена функций `math`, отличающиеся от имён их аналогов в `numpy`
+NUMPY_ALIASES = {
+    'acos': 'arccos', 'asin': 'arcsin', 'atan': 'arctan',
+    'acosh': 'arccosh', 'asinh': 'arcsinh', 'atanh': 'arctanh',
+    'atan2': 'arctan2', 'pow': 'power'
+}
+
+
+class CompiledSystem:
+    """
+    Система выражений, однократно разобранная и скомпилированная в две
+    формы: скалярную (функции модуля `math`) и векторную (функции `numpy`,
+    поддерживающие массивы как для переменных, так и для параметров).
+
+    Перед компиляцией выражения обрабатываются совместно (см.
+    `domain.preprocessing`): общие подвыражения вычисляются один раз на
+    вычисление системы, а подвыражения от одних параметров - один раз при
+    подстановке параметров. Матрица Якоби находится символьно, а если
+    выражения содержат операции без поддерживаемой производной - конечными
+    разностями
+    """
+
+    def __init__(self, expressions: Sequence[str], variables: Sequence[str],
+                 parameters_variables: Sequence[str]):
+        """
+        Конструктор класса
+
+        :param expressions: Строки выражений
+        :param variables: Имена переменных
+        :param parameters_variables: Имена параметров
+        """
+        self.expressions = tuple(expressions)
+        self.variables = tuple(variables)
+        self.parameters_variables = tuple(parameters_variables)
+
+        for expression in self.expressions:
+            validate_expression(
+                expression, self.variables + self.parameters_variables)
+
+        self.program = preprocess(
+            self.expressions, self.variables, self.parameters_variables)
+        source_system = self.program.get_source(
+            '_system', self.parameters_variables, self.variables,
+            (len(self.expressions),))
+
+        names = self.variables + self.parameters_variables
+        try:
+            derivatives = [differentiate(e, v, names)
+                           for e in self.expressions for v in self.variables]
+            self.program_jacobian: Optional[Program] = preprocess(
+                derivatives, self.variables, self.parameters_variables)
+            source_jacobian = self.program_jacobian.get_source(
+                '_jacobian', self.parameters_variables, self.variables,
+                (len(self.expressions), len(self.variables)))
+        except ValueError:
+            self.program_jacobian = None
+            source_jacobian = None
+
+        source_components = [
+            f'lambda {", ".join(self.variables + self.parameters_variables)}: '
+            f'{e}'
+            for e in self.expressions
+        ]
+
+        codes_components = [compile(s, '<expression>', 'eval')
+                            for s in source_components]
+
+        namespace_scalar = get_scalar_namespace()
+        namespace_vectorized = get_numpy_namespace()
+
+        self.__factory_scalar = _define(
+            source_system, '_system', namespace_scalar)
+        self.__factory_vectorized = _define(
+            source_system, '_system', namespace_vectorized)
+        self.__factory_jacobian = None if source_jacobian is None else \
+            _define(source_jacobian, '_jacobian', namespace_scalar)
+        self.components_scalar = tuple(
+            eval(c, namespace_scalar) for c in codes_components)
+        self.components_vectorized = tuple(
+            eval(c, namespace_vectorized) for c in codes_components)
+
+    def scalar(self, params: Dict[str, float]) -> Callable[
+            [float, float], Tuple[float, ...]]:
+        """
+        Возвращает функцию от переменных, вычисляющую все выражения сразу,
+        с параметрами, подставленными позиционно
+
+        :param params: Значения параметров
+        :type params: Dict[str, float]
+        :return: Функция (x, y) -> (f1, f2)
+        :rtype: Callable[[float, float], Tuple[float, ...]]
+        """
+        return self.__factory_scalar(*self.order(params))
+
+    def vectorized(self, params: Dict[str, Any]) -> Callable[
+            [numpy.ndarray, numpy.ndarray], Tuple[numpy.ndarray, ...]]:
+        """
+        Возвращает функцию от массивов переменных, вычисляющую все выражения
+        сразу. Значения параметров также могут быть массивами, тогда
+        результат вычисляется по правилам broadcasting `numpy`
+
+        :param params: Значения параметров
+        :type params: Dict[str, Any]
+        :return: Функция (x, y) -> (f1, f2)
+        :rtype: Callable[[numpy.ndarray, numpy.ndarray],
+        Tuple[numpy.ndarray, ...]]
+        """
+        return self.__factory_vectorized(*self.order(params))
+
+    def jacobian(self, params: Dict[str, float]) -> Callable[
+            [float, float], Tuple[Tuple[float, ...], ...]]:
+        """
+        Возвращает функцию, вычисляющую матрицу Якоби системы (по
+        переменным): по символьным производным выражений либо, если они не
+        найдены, центральными конечными разностями
+
+        :param params: Значения параметров
+        :type params: Dict[str, float]
+        :return: Функция (x, y) -> ((df1/dx, df1/dy), (df2/dx, df2/dy))
+        :rtype: Callable[[float, float], Tuple[Tuple[float, ...], ...]]
+        """
+        if self.__factory_jacobian is not None:
+            return self.__factory_jacobian(*self.order(params))
+        function = self.scalar(params)
+
+        def jacobian(x: float, y: float) -> Tuple[Tuple[float, ...], ...]:
+            h_x = JACOBIAN_STEP * max(1.0, abs(x))
+            h_y = JACOBIAN_STEP * max(1.0, abs(y))
+            f_x_right, f_x_left = function(x + h_x, y), function(x - h_x, y)
+            f_y_right, f_y_left = function(x, y + h_y), function(x, y - h_y)
+            return tuple(
+                ((f_x_right[i] - f_x_left[i]) / (2 * h_x),
+                 (f_y_right[i] - f_y_left[i]) / (2 * h_y))
+                for i in range(len(self.expressions))
+            )
+
+        return jacobian
+
+    def order(self, params: Dict[str, Any]) -> List[Any]:
+        """
+        Упорядочивает значения параметров согласно `parameters_variables`
+
+        :param params: Значения параметров
+        :type params: Dict[str, Any]
+        :return: Упорядоченные значения параметров
+        :rtype: List[Any]
+        """
+        missing = [p for p in self.parameters_variables if p not in params]
+        if missing:
+            raise ValueError(f'Не заданы значения параметров: {missing}!')
+        return [params[p] for p in self.parameters_variables]
+
+
+@lru_cache(maxsize=None)
+def compile_system(expressions: Tuple[str, ...], variables: Tuple[str, ...],
+                   parameters_variables: Tuple[str, ...]) -> CompiledSystem:
+    """
+    Компилирует систему выражений. Результат кэшируется, поэтому одинаковые
+    выражения компилируются только один раз за время работы процесса
+
+    :param expressions: Строки выражений
+    :type expressions: Tuple[str, ...]
+    :param variables: Имена переменных
+    :type variables: Tuple[str, ...]
+    :param parameters_variables: Имена параметров
+    :type parameters_variables: Tuple[str, ...]
+    :return: Скомпилированная система
+    :rtype: CompiledSystem
+    """
+    return CompiledSystem(expressions, variables, parameters_variables)
+
+
+def _define(source: str, name: str, namespace: Dict[str, Any]) -> Callable:
+    """
+    Выполняет исходный код определения функции в копии пространства имён и
+    возвращает функцию
+
+    :param source: Исходный код
+    :type source: str
+    :param name: Имя функции
+    :type name: str
+    :param namespace: Пространство имён
+    :type namespace: Dict[str, Any]
+    :return: Функция
+    :rtype: Callable
+    """
+    namespace = dict(namespace)
+    exec(compile(source, f'<{name.strip("_")}>', 'exec'), namespace)
+    return namespace[name]
+
+
+@lru_cache(maxsize=1)
+def get_scalar_namespace() -> Dict[str, Any]:
+    """
+    Возвращает пространство имён для скалярных вычислений: функции и
+    константы модуля `math`
+
+    :return: Пространство имён
+    :rtype: Dict[str, Any]
+    """
+    namespace = {name: getattr(math, name)
+                 for name in dir(math) if not name.startswith('_')}
+    namespace.update({'abs': abs, 'min': min, 'max': max,
+                      '__builtins__': {}})
+    return namespace
+
+
+@lru_cache(maxsize=1)
+def get_numpy_namespace() -> Dict[str, Any]:
+    """
+    Возвращает пространство имён, в котором функции и константы модуля `math`
+    заменены на их аналоги из `numpy`
+
+    :return: Пространство имён
+    :rtype: Dict[str, Any]
+    """
+    namespace = {}
+    for name in dir(math):
+        if name.startswith('_'):
+            continue
+        if hasattr(numpy, name):
+            namespace[name] = getattr(numpy, name)
+        elif name in NUMPY_ALIASES:
+            namespace[name] = getattr(numpy, NUMPY_ALIASES[name])
+        elif callable(getattr(math, name)):
+            namespace[name] = numpy.vectorize(getattr(math, name))
+        else:
+            namespace[name] = getattr(math, name)
+    namespace.update({'abs': numpy.abs, 'min': numpy.minimum,
+                      'max': numpy.maximum, 'log': _log_numpy,
+                      '__builtins__': {}})
+    return namespace
+
+
+def _log_numpy(value: Any, base: Any = None) -> Any:
+    """
+    Аналог `math.log` для массивов: второй аргумент - основание логарифма
+    (у `numpy.log` второй аргумент - массив для результата)
+
+    :param value: Значение
+    :type value: Any
+    :param base: Основание логарифма (по умолчанию - `e`)
+    :type base: Any
+    :return: Логарифм
+    :rtype: Any
+    """
+    if base is None:
+        return numpy.log(value)
+    return numpy.log(value) / numpy.log(base)
+
+
+def validate_expression(expression: str, names: Sequence[str]):
+    """
+    Проверяет, что выражение является арифметическим выражением от заданных
+    имён и функций модуля `math`
+
+    :param expression: Строка выражения
+    :type expression: str
+    :param names: Допустимые имена переменных и параметров
+    :type names: Sequence[str]
+    """
+    try:
+        tree = ast.parse(expression, mode='eval')
+    except SyntaxError as e:
+        raise ValueError(
+            f'Не удалось разобрать выражение: "{expression}"! {e.msg}')
+
+    namespace = get_scalar_namespace()
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES):
+            raise ValueError(
+                f'Недопустимая конструкция `{type(node).__name__}` в '
+                f'выражении: "{expression}"!')
+        if isinstance(node, ast.Call) and not isinstance(node.func, ast.Name):
+            raise ValueError(
+                f'Недопустимый вызов функции в выражении: "{expression}"!')
+        if isinstance(node, ast.Name) and node.id not in names and \
+                node.id not in namespace:
+            raise ValueError(
+                f'Неизвестное имя `{node.id}` в выражении: "{expression}"!')
@@ -1,7 +1,10 @@
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 
 class TrajectoryConfiguration:
+    # Траекторий в файле могут быть тысячи
+    __slots__ = ('point', 'color', 'tend_to_rest')
+
     def __init__(self, point: str, color: str, tend_to_rest: bool):
         self.point = point
         self.color = color
@@ -9,13 +12,17 @@ class TrajectoryConfiguration:
 
 
 class DataObjConfiguration:
+    # Метод интегрирования, заменяющий общий метод `DataConfiguration`
+    integrator: Optional[str] = None
+
     def __init__(self, name: str, parameters: Dict[str, float],
                  trajectories: List[TrajectoryConfiguration],
-                 plot_separate_line: bool):
+                 plot_separate_line: bool, integrator: Optional[str] = None):
         self.name = name
         self.parameters = parameters
         self.trajectories = trajectories
         self.plot_separate_line = plot_separate_line
+        self.integrator = integrator
 
 
 class DataSetConfiguration:
@@ -33,18 +40,94 @@ class ExpressionsConfiguration:
 
 
 class PlottingConfiguration:
-    def __init__(self, show_legend: bool, show_grid: bool):
+    # Максимальное кол-во точек траектории, передаваемых в `matplotlib`
+    max_points: Optional[int] = None
+    # Строить ли графики x(t), y(t) для каждого фазового портрета
+    time_series: bool = False
+    # Способ рисования траекторий (см. `domain.rendering.RENDERERS`)
+    renderer: str = 'lines'
+    # Способ рисования поля направлений (см. `domain.rendering.FIELDS`),
+    # None - поле не рисуется
+    vector_field: Optional[str] = None
+    # Рисовать ли нуль-изоклины
+    nullclines: bool = False
+    # Левая нижняя и правая верхняя точки части плоскости, в которой
+    # рисуются поле направлений и нуль-изоклины (по умолчанию - область
+    # траекторий)
+    field_start: Optional[str] = None
+    field_end: Optional[str] = None
+
+    def __init__(self, show_legend: bool, show_grid: bool,
+                 max_points: Optional[int] = None,
+                 time_series: bool = False, renderer: str = 'lines',
+                 vector_field: Optional[str] = None,
+                 nullclines: bool = False, field_start: Optional[str] = None,
+                 field_end: Optional[str] = None):
         self.show_legend = show_legend
         self.show_grid = show_grid
+        self.max_points = max_points
+        self.time_series = time_series
+        self.renderer = renderer
+        self.vector_field = vector_field
+        self.nullclines = nullclines
+        self.field_start = field_start
+        self.field_end = field_end
+
+
+class SweepConfiguration:
+    # Промежуток поиска корней и кол-во точек его разбиения
+    domain_range: Tuple[float, float] = (0, 1)
+    amount_points: int = 100
+
+    def __init__(self, name: str, parameters: Dict[str, float],
+                 ranges: Dict[str, List[float]],
+                 domain_range: Tuple[float, float] = (0, 1),
+                 amount_points: int = 100):
+        self.name = name
+        self.parameters = parameters
+        self.ranges = ranges
+        self.domain_range = domain_range
+        self.amount_points = amount_points
 
 
 class DataConfiguration:
+    # Значения по умолчанию для необязательных полей (на случай объектов,
+    # созданных без вызова конструктора)
+    integrator: str = 'rk4'
+    rtol: float = 1e-6
+    atol: float = 1e-9
+    amount_points: Optional[int] = None
+    convergence_tolerance: Optional[float] = None
+    rest_radius: Optional[float] = None
+    rest_search_start: str = '(0, 0)'
+    rest_search_end: str = '(1, 20)'
+    sweeps: Optional[List[SweepConfiguration]] = None
+    jit: bool = True
+
     def __init__(self, expressions: ExpressionsConfiguration,
                  amount_iterations: int, h_step: float,
                  dataset: DataSetConfiguration,
-                 plotting: PlottingConfiguration):
+                 plotting: PlottingConfiguration,
+                 integrator: str = 'rk4', rtol: float = 1e-6,
+                 atol: float = 1e-9, amount_points: Optional[int] = None,
+                 convergence_tolerance: Optional[float] = None,
+                 rest_radius: Optional[float] = None,
+                 rest_search_start: str = '(0, 0)',
+                 rest_search_end: str = '(1, 20)',
+                 sweeps: Optional[List[SweepConfiguration]] = None,
+                 jit: bool = True):
         self.expressions = expressions
         self.amount_iterations = amount_iterations
         self.h_step = h_step
         self.dataset = dataset
         self.plotting = plotting
+        self.integrator = integrator
+        self.rtol = rtol
+        self.atol = atol
+        self.amount_points = amount_points
+        self.convergence_tolerance = convergence_tolerance
+        self.rest_radius = rest_radius
+        self.rest_search_start = rest_search_start
+        self.rest_search_end = rest_search_end
+        self.sweeps = sweeps
+        self.jit = jit
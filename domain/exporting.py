@@ -0,0 +1,277 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import json
+import logging
+import os
+import re
+import shutil
+import uuid
+
+import numpy
+
+from domain.configuration import DataConfiguration, DataObjConfiguration
+from domain.classes.point import Point
+from domain.classes.rest_point import RestPoint
+from domain.classes.trajectory import Trajectory
+from domain.instrumenting import COUNTER_BYTES_WRITTEN, count
+from domain.streaming import RawFileSink
+
+
+LOGGER = logging.getLogger('__main__')
+
+# Версия формата выгрузки
+EXPORT_VERSION = 1
+# Имя файла метаданных
+FILE_METADATA = 'metadata.json'
+
+
+class Basins:
+    """
+    Области притяжения, найденные на сетке, и разделяющие их кривые
+    """
+
+    __slots__ = ('point_start', 'point_end', 'labels', 'rest_points', 'lines')
+
+    def __init__(self, point_start: Point, point_end: Point,
+                 labels: numpy.ndarray, rest_points: List[Point],
+                 lines: List[numpy.ndarray]):
+        """
+        Конструктор класса
+
+        :param point_start: Левая нижняя точка сетки
+        :param point_end: Правая верхняя точка сетки
+        :param labels: Массив меток ячеек сетки (номеров точек покоя в
+        `rest_points`) формы (кол-во узлов по Y, кол-во узлов по X)
+        :param rest_points: Точки покоя, которым соответствуют метки
+        :param lines: Разделяющие кривые - массивы точек формы (n, 2)
+        """
+        self.point_start = point_start
+        self.point_end = point_end
+        self.labels = labels
+        self.rest_points = rest_points
+        self.lines = lines
+
+
+class ResultExport:
+    """
+    Выгрузка результатов вычислений для дальнейшего анализа. Каждый фазовый
+    портрет сохраняется в отдельную директорию в виде столбцов - файлов
+    `.npy` - и файла метаданных `metadata.json`:
+
+    * `trajectories_points.npy` (формы (n, 2)) и `trajectories_t.npy` -
+      точки и моменты времени всех траекторий подряд,
+      `trajectories_offsets.npy` - номера первых точек траекторий (и общее
+      кол-во точек последним элементом);
+    * `rest_points.npy` - точки покоя формы (k, 2);
+    * `basins.npy` - метки областей притяжения на сетке;
+    * `separatrix_points.npy`, `separatrix_offsets.npy` - разделяющие кривые
+      в том же виде, что и траектории.
+
+    Файлы `.npy` читаются `load_portrait` отображением в память, без
+    копирования. Объект хранит только путь, поэтому может передаваться в
+    пул процессов
+    """
+
+    def __init__(self, directory: str):
+        """
+        Конструктор класса
+
+        :param directory: Директория выгрузки
+        """
+        self.directory = directory
+
+    def get_path(self, index: int, data: DataObjConfiguration) -> str:
+        """
+        Возвращает путь к директории фазового портрета
+
+        :param index: Номер фазового портрета
+        :type index: int
+        :param data: Данные фазового портрета
+        :type data: DataObjConfiguration
+        :return: Путь к директории портрета
+        :rtype: str
+        """
+        return os.path.join(self.directory,
+                            f'{index:03d}_{_get_slug(data.name)}')
+
+    def store_portrait(self, index: int, data: DataObjConfiguration,
+                       configuration: DataConfiguration, integrator: str,
+                       trajectories: Sequence[Trajectory],
+                       rest_points: Sequence[RestPoint],
+                       basins: Optional[Basins] = None) -> str:
+        """
+        Сохраняет результаты фазового портрета. Директория портрета
+        записывается целиком во временную и затем переименовывается, поэтому
+        читатели не видят частично записанных данных
+
+        :param index: Номер фазового портрета
+        :type index: int
+        :param data: Данные фазового портрета
+        :type data: DataObjConfiguration
+        :param configuration: Конфигурационные данные
+        :type configuration: DataConfiguration
+        :param integrator: Метод интегрирования
+        :type integrator: str
+        :param trajectories: Фазовые траектории
+        :type trajectories: Sequence[Trajectory]
+        :param rest_points: Точки покоя
+        :type rest_points: Sequence[RestPoint]
+        :param basins: Области притяжения и разделяющие кривые
+        :type basins: Optional[Basins]
+        :return: Путь к директории портрета
+        :rtype: str
+        """
+        path = self.get_path(index, data)
+        path_temp = f'{path}.{uuid.uuid4().hex}.tmp'
+        os.makedirs(path_temp)
+
+        offsets = numpy.cumsum([0] + [len(t) for t in trajectories])
+        _save(path_temp, 'trajectories_offsets', offsets)
+        _save_parts(path_temp, 'trajectories_points',
+                    [t.points for t in trajectories], (2,))
+        _save_parts(path_temp, 'trajectories_t',
+                    [t.times for t in trajectories])
+        _save(path_temp, 'rest_points', numpy.array(
+            [tuple(p) for p in rest_points], dtype=float).reshape(-1, 2))
+
+        metadata = {
+            'version': EXPORT_VERSION,
+            'name': data.name,
+            'parameters': data.parameters,
+            'expressions': configuration.expressions.initial,
+            'variables': configuration.expressions.variables,
+            'parameters_variables':
+                configuration.expressions.parameters_variables,
+            'integrator': integrator,
+            'h_step': configuration.h_step,
+            'amount_iterations': configuration.amount_iterations,
+            'rtol': configuration.rtol,
+            'atol': configuration.atol,
+            'trajectories': [
+                {'point': t.point, 'color': t.color,
+                 'tend_to_rest': t.tend_to_rest, 'steps': trajectory.steps,
+                 'amount_points': len(trajectory)}
+                for t, trajectory in zip(data.trajectories, trajectories)],
+            'rest_points': [
+                {'kind': p.kind, 'stable': p.stable} for p in rest_points],
+            'basins': None,
+        }
+
+        if basins is not None:
+            _save(path_temp, 'basins', basins.labels)
+            offsets = numpy.cumsum([0] + [len(line) for line in basins.lines])
+            _save(path_temp, 'separatrix_offsets', offsets)
+            _save_parts(path_temp, 'separatrix_points', basins.lines, (2,))
+            metadata['basins'] = {
+                'point_start': list(basins.point_start),
+                'point_end': list(basins.point_end),
+                'shape': list(basins.labels.shape),
+                'rest_points': [list(p) for p in basins.rest_points],
+            }
+
+        with open(os.path.join(path_temp, FILE_METADATA), mode='w',
+                  encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=2)
+        count(COUNTER_BYTES_WRITTEN, sum(
+            entry.stat().st_size for entry in os.scandir(path_temp)))
+
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(path_temp, path)
+        LOGGER.info(f'Результаты фазового портрета выгружены: "{path}".')
+        return path
+
+
+def load_portrait(path: str) -> Dict[str, Any]:
+    """
+    Читает результаты фазового портрета, выгруженные `ResultExport`.
+    Столбцы отображаются в память; траектории и разделяющие кривые
+    возвращаются представлениями общих столбцов (без копирования)
+
+    :param path: Путь к директории портрета
+    :type path: str
+    :return: Метаданные (`metadata`), траектории (`trajectories` - список
+    `Trajectory`), точки покоя (`rest_points`, массив формы (k, 2)) и,
+    если есть, метки областей притяжения (`basins`) и разделяющие кривые
+    (`separatrix` - список массивов формы (n, 2))
+    :rtype: Dict[str, Any]
+    """
+    with open(os.path.join(path, FILE_METADATA), encoding='utf-8') as f:
+        metadata = json.load(f)
+    if metadata.get('version') != EXPORT_VERSION:
+        raise ValueError(f'Неподдерживаемая версия выгрузки: "{path}"!')
+
+    def load(name: str) -> numpy.ndarray:
+        return numpy.load(os.path.join(path, f'{name}.npy'), mmap_mode='r',
+                          allow_pickle=False)
+
+    offsets, points, t = load('trajectories_offsets'), \
+        load('trajectories_points'), load('trajectories_t')
+    result = {
+        'metadata': metadata,
+        'trajectories': [
+            Trajectory(points[start:end], info['steps'],
+                       times=t[start:end])
+            for start, end, info in zip(offsets[:-1], offsets[1:],
+                                        metadata['trajectories'])],
+        'rest_points': load('rest_points'),
+    }
+
+    if metadata['basins'] is not None:
+        result['basins'] = load('basins')
+        offsets, points = load('separatrix_offsets'), \
+            load('separatrix_points')
+        result['separatrix'] = [
+            points[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+    return result
+
+
+def _save(directory: str, name: str, array: numpy.ndarray):
+    """
+    Сохраняет столбец в файл `.npy`
+
+    :param directory: Директория
+    :type directory: str
+    :param name: Имя столбца
+    :type name: str
+    :param array: Массив
+    :type array: numpy.ndarray
+    """
+    numpy.save(os.path.join(directory, f'{name}.npy'),
+               numpy.ascontiguousarray(array), allow_pickle=False)
+
+
+def _save_parts(directory: str, name: str, parts: Sequence[numpy.ndarray],
+                shape: Tuple[int, ...] = ()):
+    """
+    Сохраняет столбец, состоящий из нескольких массивов подряд, в файл
+    `.npy`. Массивы записываются по очереди (см.
+    `domain.streaming.RawFileSink`), поэтому общий массив не собирается в
+    памяти
+
+    :param directory: Директория
+    :type directory: str
+    :param name: Имя столбца
+    :type name: str
+    :param parts: Массивы
+    :type parts: Sequence[numpy.ndarray]
+    :param shape: Форма одного значения (без первой оси)
+    :type shape: Tuple[int, ...]
+    """
+    sink = RawFileSink(os.path.join(directory, f'{name}.npy'),
+                       (sum(len(part) for part in parts), *shape))
+    for part in parts:
+        sink.consume(part)
+    sink.finish()
+
+
+def _get_slug(name: str) -> str:
+    """
+    Возвращает имя, пригодное для имени директории
+
+    :param name: Имя
+    :type name: str
+    :return: Имя директории
+    :rtype: str
+    """
+    return re.sub(r'[^\w.-]+', '_', name).strip('_') or 'portrait'
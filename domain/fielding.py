@@ -0,0 +1,60 @@
+from typing import Callable, List, Tuple
+import numpy
+import contourpy
+
+from domain.instrumenting import COUNTER_FUNCTION_EVALUATIONS, count
+
+
+def evaluate_field(
+        function: Callable[[numpy.ndarray, numpy.ndarray],
+                           Tuple[numpy.ndarray, ...]],
+        xs: numpy.ndarray, ys: numpy.ndarray) -> Tuple[numpy.ndarray, ...]:
+    """
+    Вычисляет правые части системы во всех узлах сетки одним вызовом
+    векторизованной функции. Значения в узлах, где выражения не определены
+    или переполняются, равны `nan` или `inf`
+
+    :param function: Векторизованная функция (x, y) -> (f1, f2)
+    :type function: Callable[[numpy.ndarray, numpy.ndarray],
+    Tuple[numpy.ndarray, ...]]
+    :param xs: Узлы сетки по оси X
+    :type xs: numpy.ndarray
+    :param ys: Узлы сетки по оси Y
+    :type ys: numpy.ndarray
+    :return: Массивы значений выражений формы (len(ys), len(xs))
+    :rtype: Tuple[numpy.ndarray, ...]
+    """
+    x, y = numpy.meshgrid(xs, ys)
+    with numpy.errstate(all='ignore'):
+        values = function(x, y)
+    count(COUNTER_FUNCTION_EVALUATIONS, x.size)
+    # Выражения, не зависящие от переменных, дают скаляры
+    return tuple(
+        numpy.broadcast_to(numpy.asarray(value, dtype=float), x.shape)
+        for value in values)
+
+
+def get_nullclines(xs: numpy.ndarray, ys: numpy.ndarray,
+                   values: numpy.ndarray,
+                   min_points: int = 2) -> List[numpy.ndarray]:
+    """
+    Выделяет кривые, на которых выражение равно нулю (нуль-изоклины),
+    методом marching squares. Узлы, в которых значение не конечно, не
+    участвуют в построении кривых
+
+    :param xs: Узлы сетки по оси X
+    :type xs: numpy.ndarray
+    :param ys: Узлы сетки по оси Y
+    :type ys: numpy.ndarray
+    :param values: Значения выражения в узлах сетки
+    :type values: numpy.ndarray
+    :param min_points: Минимальное кол-во точек кривой
+    :type min_points: int
+    :return: Список кривых, каждая из которых - массив точек формы (n, 2)
+    :rtype: List[numpy.ndarray]
+    """
+    mask = ~numpy.isfinite(values)
+    if mask.any():
+        values = numpy.ma.array(numpy.where(mask, 0.0, values), mask=mask)
+    generator = contourpy.contour_generator(xs, ys, values)
+    return [line for line in generator.lines(0.0) if len(line) >= min_points]
@@ -1,56 +1,37 @@
-from typing import Tuple, Callable, Dict
-
-from math import *  # не удалять!!! Важно для компиляции функций,
-# т.к. там могут присутствовать функции и константы
-
 from domain.configuration import DataConfiguration
+from domain.compiling import CompiledSystem, compile_system
 
 
-def get_functions_for_expressions(
-        data: DataConfiguration) -> Tuple[
-    Callable[[float, float, Dict[str, float]], float],
-    Callable[[float, float, Dict[str, float]], float]
-]:
+def get_system_for_expressions(data: DataConfiguration) -> CompiledSystem:
     """
-    Возвращает две функции соответствующие двум выражениям, заданным в
+    Возвращает скомпилированную систему выражений, заданных в
     конфигурационных данных, для их расчёта
 
     :param data: Конфигурационные данные
     :type data: DataConfiguration
-    :return: Две функции
-    :rtype: Tuple[Callable, Callable]
+    :return: Скомпилированная система
+    :rtype: CompiledSystem
     """
-    variables = data.expressions.variables + \
-                data.expressions.parameters_variables
-
-    return (
-        eval('lambda ' + ', '.join(variables) + ': ' +
-             data.expressions.initial[0]),
-        eval('lambda ' + ', '.join(variables) + ': ' +
-             data.expressions.initial[1])
+    return compile_system(
+        tuple(data.expressions.initial),
+        tuple(data.expressions.variables),
+        tuple(data.expressions.parameters_variables)
     )
 
 
-def get_functions_for_solving(
-        data: DataConfiguration) -> Tuple[
-    Callable[[float, float, Dict[str, float]], float],
-    Callable[[float, float, Dict[str, float]], float]
-]:
+def get_system_for_solving(data: DataConfiguration) -> CompiledSystem:
     """
-        Возвращает две функции соответствующие двум уравнениям, заданным в
-        конфигурационных данных, для их решения
-
-        :param data: Конфигурационные данные
-        :type data: DataConfiguration
-        :return: Две функции
-        :rtype: Tuple[Callable, Callable]
-        """
-    variables = data.expressions.variables + \
-                data.expressions.parameters_variables
+    Возвращает скомпилированную систему уравнений, заданных в
+    конфигурационных данных, для их решения
 
-    return (
-        eval('lambda ' + ', '.join(variables) + ': ' +
-             data.expressions.simplified[0]),
-        eval('lambda ' + ', '.join(variables) + ': ' +
-             data.expressions.simplified[1])
+    :param data: Конфигурационные данные
+    :type data: DataConfiguration
+    :return: Скомпилированная система
+    :rtype: CompiledSystem
+    """
+    return compile_system(
+        tuple(data.expressions.simplified),
+        tuple(data.expressions.variables),
+        tuple(data.expressions.parameters_variables)
     )
+
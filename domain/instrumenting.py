@@ -0,0 +1,204 @@
+from typing import Any, Dict, Generator, List, Optional
+from contextlib import contextmanager
+import json
+import os
+import time
+
+
+# Счётчики, используемые в программе
+COUNTER_FUNCTION_EVALUATIONS = 'function_evaluations'
+COUNTER_INTEGRATION_STEPS = 'integration_steps'
+COUNTER_TRAJECTORIES = 'trajectories'
+COUNTER_OVERFLOWS = 'overflows'
+COUNTER_BASIN_CELLS = 'basin_cells'
+COUNTER_BASIN_CELLS_INTEGRATED = 'basin_cells_integrated'
+COUNTER_CACHE_HITS = 'cache_hits'
+COUNTER_CACHE_MISSES = 'cache_misses'
+COUNTER_BYTES_WRITTEN = 'bytes_written'
+COUNTER_PAGES = 'pages'
+COUNTER_PORTRAITS_REUSED = 'portraits_reused'
+
+
+class Instrumentation:
+    """
+    Время этапов вычислений (суммарное и кол-во выполнений) и счётчики
+    событий. Данные процесса копятся в текущем объекте (см.
+    `get_instrumentation`); данные других процессов передаются в виде
+    словаря (`as_dict`) и добавляются `merge`
+    """
+
+    __slots__ = ('timers', 'calls', 'counters')
+
+    def __init__(self):
+        """
+        Конструктор класса
+        """
+        self.timers: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self.counters: Dict[str, int] = {}
+
+    def add_time(self, name: str, elapsed: float):
+        """
+        Добавляет время выполнения этапа
+
+        :param name: Имя этапа
+        :type name: str
+        :param elapsed: Время (в секундах)
+        :type elapsed: float
+        """
+        self.timers[name] = self.timers.get(name, 0.0) + elapsed
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name: str, amount: int = 1):
+        """
+        Увеличивает счётчик
+
+        :param name: Имя счётчика
+        :type name: str
+        :param amount: Величина увеличения
+        :type amount: int
+        """
+        self.counters[name] = self.counters.get(name, 0) + int(amount)
+
+    def merge(self, other: Dict[str, Any]):
+        """
+        Добавляет данные, полученные `as_dict` (например, в другом процессе)
+
+        :param other: Данные
+        :type other: Dict[str, Any]
+        """
+        for name, stage in other['stages'].items():
+            self.timers[name] = self.timers.get(name, 0.0) + stage['time']
+            self.calls[name] = self.calls.get(name, 0) + stage['calls']
+        for name, value in other['counters'].items():
+            self.count(name, value)
+
+    def clear(self):
+        """
+        Сбрасывает все данные
+        """
+        self.timers.clear()
+        self.calls.clear()
+        self.counters.clear()
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Возвращает данные в виде словаря, сериализуемого в `JSON`
+
+        :return: Время этапов и счётчики
+        :rtype: Dict[str, Any]
+        """
+        return {
+            'stages': {name: {'time': self.timers[name],
+                              'calls': self.calls[name]}
+                       for name in sorted(self.timers)},
+            'counters': dict(sorted(self.counters.items())),
+        }
+
+
+# Данные текущего процесса
+__current = [Instrumentation()]
+
+
+def get_instrumentation() -> Instrumentation:
+    """
+    Возвращает объект, в котором копятся данные текущего процесса
+
+    :return: Данные текущего процесса
+    :rtype: Instrumentation
+    """
+    return __current[-1]
+
+
+@contextmanager
+def collecting() -> Generator[Instrumentation, None, None]:
+    """
+    Собирает данные блока в отдельный объект, не добавляя их к текущему.
+    Используется в задачах пула процессов, которые возвращают собранные
+    данные вызывающему процессу
+
+    :return: Данные блока
+    :rtype: Generator[Instrumentation, None, None]
+    """
+    __current.append(Instrumentation())
+    try:
+        yield __current[-1]
+    finally:
+        __current.pop()
+
+
+@contextmanager
+def stage(name: str) -> Generator[None, None, None]:
+    """
+    Замеряет время выполнения блока как этапа `name`
+
+    :param name: Имя этапа
+    :type name: str
+    """
+    time_start = time.perf_counter()
+    try:
+        yield
+    finally:
+        get_instrumentation().add_time(name, time.perf_counter() - time_start)
+
+
+def count(name: str, amount: int = 1):
+    """
+    Увеличивает счётчик текущего процесса
+
+    :param name: Имя счётчика
+    :type name: str
+    :param amount: Величина увеличения
+    :type amount: int
+    """
+    get_instrumentation().count(name, amount)
+
+
+def write_report(path: str, instrumentation: Instrumentation,
+                 extra: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Сохраняет отчёт о выполнении в файл `JSON`. Время этапов, выполненных в
+    пуле процессов, суммируется по процессам, поэтому может превышать
+    общее время работы
+
+    :param path: Путь к файлу отчёта
+    :type path: str
+    :param instrumentation: Собранные данные
+    :type instrumentation: Instrumentation
+    :param extra: Дополнительные поля отчёта
+    :type extra: Optional[Dict[str, Any]]
+    :return: Путь к файлу отчёта
+    :rtype: str
+    """
+    report = dict(extra or {})
+    report.update(instrumentation.as_dict())
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, mode='w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def get_profile_summary(profiler: Any, amount: int = 30) -> List[
+        Dict[str, Any]]:
+    """
+    Возвращает функции с наибольшим суммарным временем выполнения (с
+    учётом вызванных ими функций) по данным `cProfile.Profile`
+
+    :param profiler: Профилировщик
+    :type profiler: cProfile.Profile
+    :param amount: Кол-во функций
+    :type amount: int
+    :return: Функции (`function`), кол-ва их вызовов (`calls`), собственное
+    (`time`) и суммарное (`cumulative_time`) время выполнения
+    :rtype: List[Dict[str, Any]]
+    """
+    import pstats
+
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)
+    return [
+        {'function': f'{file}:{line}({name})', 'calls': calls,
+         'time': time_own, 'cumulative_time': time_cumulative}
+        for (file, line, name), (_, calls, time_own, time_cumulative, _)
+        in rows[:amount]
+    ]
@@ -0,0 +1,758 @@
+from typing import Callable, Dict, Generator, List, Optional, Sequence, \
+    Tuple
+import numpy
+
+from domain.classes.point import Point
+from domain.classes.trajectory import Trajectory
+from domain.compiling import CompiledSystem
+from domain.configuration import DataConfiguration
+from domain.jitting import get_kernel_params, get_rk4_kernel
+from domain.instrumenting import COUNTER_FUNCTION_EVALUATIONS, \
+    COUNTER_INTEGRATION_STEPS, COUNTER_OVERFLOWS, COUNTER_TRAJECTORIES, \
+    count
+from domain.streaming import CollectingSink, DecimatingSink, consume_chunks
+
+
+# Метод Рунге-Кутты 4ого порядка с постоянным шагом
+INTEGRATOR_RK4 = 'rk4'
+# Метод Дормана-Принса 5(4) с адаптивным шагом
+INTEGRATOR_DOPRI45 = 'dopri45'
+# Метод Розенброка 2(3) с адаптивным шагом для жёстких систем
+INTEGRATOR_ROSENBROCK23 = 'rosenbrock23'
+
+INTEGRATORS = (INTEGRATOR_RK4, INTEGRATOR_DOPRI45, INTEGRATOR_ROSENBROCK23)
+
+# Кол-во точек выходной сетки методов с адаптивным шагом по умолчанию
+DEFAULT_AMOUNT_POINTS = 2000
+# Кол-во точек траектории в блоке при потоковом вычислении по умолчанию
+DEFAULT_CHUNK_SIZE = 65536
+# Мин. кол-во шагов метода Рунге-Кутты, при котором окупается компиляция
+# ядра в машинный код (около секунды на систему в каждом процессе)
+JIT_MIN_ITERATIONS = 50000
+
+
+class Convergence:
+    """
+    Критерии досрочной остановки фазовой траектории, пришедшей в точку
+    покоя: средняя скорость на шаге (перемещение за шаг, делённое на шаг)
+    меньше `tolerance` либо расстояние до одной из известных точек покоя
+    меньше `radius`
+    """
+
+    def __init__(self, tolerance: Optional[float] = None,
+                 rest_points: Optional[Sequence[Point]] = None,
+                 radius: Optional[float] = None):
+        """
+        Конструктор класса
+
+        :param tolerance: Порог скорости
+        :param rest_points: Известные точки покоя
+        :param radius: Радиус окрестности точек покоя
+        """
+        self.tolerance = tolerance
+        self.radius = radius if rest_points else None
+        self.rest = numpy.array(
+            [tuple(p) for p in rest_points or []], dtype=float
+        ).reshape(-1, 2)
+
+    def is_enabled(self) -> bool:
+        """
+        Возвращает True, если задан хотя бы один критерий
+
+        :return: Задан ли хотя бы один критерий
+        :rtype: bool
+        """
+        return self.tolerance is not None or self.radius is not None
+
+    def check(self, x: numpy.ndarray, y: numpy.ndarray,
+              x_prev: numpy.ndarray, y_prev: numpy.ndarray,
+              h_step: float) -> numpy.ndarray:
+        """
+        Проверяет критерии для точек после шага метода. Работает как с
+        числами, так и с массивами
+
+        :param x: Абсциссы точек после шага
+        :type x: numpy.ndarray
+        :param y: Ординаты точек после шага
+        :type y: numpy.ndarray
+        :param x_prev: Абсциссы точек до шага
+        :type x_prev: numpy.ndarray
+        :param y_prev: Ординаты точек до шага
+        :type y_prev: numpy.ndarray
+        :param h_step: Временной шаг
+        :type h_step: float
+        :return: Признаки остановки
+        :rtype: numpy.ndarray
+        """
+        result = numpy.zeros(numpy.shape(x), dtype=bool)
+        if self.tolerance is not None:
+            result |= (x - x_prev) ** 2 + (y - y_prev) ** 2 < \
+                (self.tolerance * h_step) ** 2
+        if self.radius is not None:
+            for rest_x, rest_y in self.rest:
+                result |= (x - rest_x) ** 2 + (y - rest_y) ** 2 < \
+                    self.radius ** 2
+        return result
+
+
+def integrate(points: List[Point], system: CompiledSystem,
+              params: Dict[str, float], configuration: DataConfiguration,
+              integrator: Optional[str] = None,
+              rest_points: Optional[List[Point]] = None,
+              stoppable: Optional[List[bool]] = None,
+              max_points: Optional[int] = None) -> List[Trajectory]:
+    """
+    Вычисляет точки фазовых траекторий методом `integrator`, а если он не
+    задан - методом, выбранным в конфигурационных данных.
+
+    Траектории, отмеченные в `stoppable`, останавливаются досрочно по
+    критериям `convergence_tolerance` и `rest_radius` (вокруг `rest_points`)
+    из конфигурационных данных.
+
+    Если задано `max_points`, каждая траектория прореживается до не более
+    чем `max_points` точек. Для метода Рунге-Кутты точки прореживаются по
+    мере вычисления, поэтому полные траектории в памяти не хранятся.
+
+    Метод Рунге-Кутты выполняется скомпилированным в машинный код ядром
+    (см. `domain.jitting`), если установлен `numba`, в конфигурационных
+    данных не отключён `jit` и кол-во шагов не меньше `JIT_MIN_ITERATIONS`,
+    иначе - над массивами `numpy`
+
+    :param points: Начальные точки фазовых траекторий
+    :type points: List[Point]
+    :param system: Система выражений
+    :type system: CompiledSystem
+    :param params: Параметры
+    :type params: Dict[str, float]
+    :param configuration: Конфигурационные данные
+    :type configuration: DataConfiguration
+    :param integrator: Метод интегрирования
+    :type integrator: Optional[str]
+    :param rest_points: Известные точки покоя
+    :type rest_points: Optional[List[Point]]
+    :param stoppable: Признаки того, что траекторию можно остановить досрочно
+    :type stoppable: Optional[List[bool]]
+    :param max_points: Максимальное кол-во точек каждой траектории
+    :type max_points: Optional[int]
+    :return: Список фазовых траекторий
+    :rtype: List[Trajectory]
+    """
+    integrator = integrator or configuration.integrator
+    time_end = configuration.amount_iterations * configuration.h_step
+    amount_points = configuration.amount_points or min(
+        configuration.amount_iterations, DEFAULT_AMOUNT_POINTS)
+    convergence = Convergence(configuration.convergence_tolerance,
+                              rest_points, configuration.rest_radius)
+    if stoppable is None:
+        stoppable = [True] * len(points)
+
+    if integrator == INTEGRATOR_RK4:
+        total = configuration.amount_iterations + 1
+        if max_points is None:
+            sinks = [[CollectingSink(total, configuration.h_step)]
+                     for _ in points]
+        else:
+            sinks = [[DecimatingSink(total, max_points, configuration.h_step)]
+                     for _ in points]
+        kernel = None
+        if configuration.jit and \
+                configuration.amount_iterations >= JIT_MIN_ITERATIONS:
+            kernel = get_rk4_kernel(system)
+        if kernel is None:
+            chunks = iter_rk4_chunks(
+                points, system.vectorized(params),
+                configuration.amount_iterations, configuration.h_step,
+                convergence, numpy.array(stoppable, dtype=bool))
+        else:
+            chunks = iter_rk4_chunks_native(
+                points, kernel, get_kernel_params(system, params),
+                configuration.amount_iterations, configuration.h_step,
+                convergence, numpy.array(stoppable, dtype=bool))
+        result = consume_chunks(chunks, sinks)
+        result = [trajectory for trajectory, in result]
+        __count_trajectories(result)
+        # Метод Рунге-Кутты не прерывается при переполнении: траектория,
+        # ушедшая на бесконечность, заканчивается нечисловыми точками
+        count(COUNTER_FUNCTION_EVALUATIONS,
+              4 * sum(trajectory.steps for trajectory in result))
+        count(COUNTER_OVERFLOWS, sum(
+            not numpy.isfinite(trajectory.points[-1]).all()
+            for trajectory in result))
+        return result
+
+    if integrator == INTEGRATOR_DOPRI45:
+        function, calls = __counting(system.scalar(params))
+        result = [
+            dopri45(point, function, time_end, amount_points,
+                    configuration.h_step,
+                    configuration.rtol, configuration.atol,
+                    convergence=convergence if stop else None)
+            for point, stop in zip(points, stoppable)
+        ]
+        count(COUNTER_FUNCTION_EVALUATIONS, calls[0])
+        result = [Trajectory(*r, time_step=time_end / amount_points)
+                  .decimate(max_points) for r in result]
+        __count_trajectories(result)
+        return result
+
+    if integrator == INTEGRATOR_ROSENBROCK23:
+        function, calls = __counting(system.scalar(params))
+        jacobian = system.jacobian(params)
+        result = [
+            rosenbrock23(point, function, jacobian, time_end, amount_points,
+                         configuration.h_step,
+                         configuration.rtol, configuration.atol,
+                         convergence=convergence if stop else None)
+            for point, stop in zip(points, stoppable)
+        ]
+        count(COUNTER_FUNCTION_EVALUATIONS, calls[0])
+        result = [Trajectory(*r, time_step=time_end / amount_points)
+                  .decimate(max_points) for r in result]
+        __count_trajectories(result)
+        return result
+
+    raise ValueError(f'Неизвестный метод интегрирования: "{integrator}"!')
+
+
+def __counting(function: Callable[[float, float], Tuple[float, float]]) -> \
+        Tuple[Callable[[float, float], Tuple[float, float]], List[int]]:
+    """
+    Возвращает функцию, считающую свои вызовы, и список из одного элемента -
+    кол-ва вызовов
+
+    :param function: Функция для расчёта значений обоих выражений
+    :type function: Callable[[float, float], Tuple[float, float]]
+    :return: Функция и кол-во её вызовов
+    :rtype: Tuple[Callable[[float, float], Tuple[float, float]], List[int]]
+    """
+    calls = [0]
+
+    def wrapper(x: float, y: float) -> Tuple[float, float]:
+        calls[0] += 1
+        return function(x, y)
+    return wrapper, calls
+
+
+def __count_trajectories(trajectories: List[Trajectory]):
+    """
+    Добавляет к счётчикам кол-во траекторий и выполненных ими шагов
+
+    :param trajectories: Фазовые траектории
+    :type trajectories: List[Trajectory]
+    """
+    count(COUNTER_TRAJECTORIES, len(trajectories))
+    count(COUNTER_INTEGRATION_STEPS,
+          sum(trajectory.steps for trajectory in trajectories))
+
+
+def rk4_step(function: Callable[[numpy.ndarray, numpy.ndarray],
+                                 Tuple[numpy.ndarray, numpy.ndarray]],
+             x: numpy.ndarray, y: numpy.ndarray,
+             h_step: float) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Выполняет один шаг метода Рунге-Кутты 4ого порядка сразу для нескольких
+    точек
+
+    :param function: Функция для расчёта значений обоих выражений над
+    массивами
+    :type function: Callable[[numpy.ndarray, numpy.ndarray],
+    Tuple[numpy.ndarray, numpy.ndarray]]
+    :param x: Абсциссы точек
+    :type x: numpy.ndarray
+    :param y: Ординаты точек
+    :type y: numpy.ndarray
+    :param h_step: Временной шаг
+    :type h_step: float
+    :return: Абсциссы и ординаты точек после шага
+    :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+    """
+    k1, l1 = function(x, y)
+    k2, l2 = function(x + h_step / 2 * k1, y + h_step / 2 * l1)
+    k3, l3 = function(x + h_step / 2 * k2, y + h_step / 2 * l2)
+    k4, l4 = function(x + h_step * k3, y + h_step * l3)
+    return x + h_step / 6 * (k1 + 2 * k2 + 2 * k3 + k4), \
+        y + h_step / 6 * (l1 + 2 * l2 + 2 * l3 + l4)
+
+
+def iter_rk4_chunks(
+        points: List[Point],
+        function: Callable[[numpy.ndarray, numpy.ndarray],
+                           Tuple[numpy.ndarray, numpy.ndarray]],
+        amount_iterations: int, h_step: float,
+        convergence: Optional[Convergence] = None,
+        stoppable: Optional[numpy.ndarray] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE) -> Generator[
+            Tuple[numpy.ndarray, numpy.ndarray], None, None]:
+    """
+    Вычисляет точки сразу нескольких фазовых траекторий по методу Рунге-Кутты
+    4ого порядка и отдаёт их блоками не более чем по `chunk_size` точек.
+    Память, занимаемая генератором, не зависит от `amount_iterations`.
+
+    Каждый блок - массив формы (кол-во траекторий, m, 2) и массив кол-в
+    точек каждой траектории в блоке: у остановленной по критериям
+    `convergence` траектории заполнено только начало блока, а в следующих
+    блоках точек нет
+
+    :param points: Начальные точки фазовых траекторий
+    :type points: List[Point]
+    :param function: Функция для расчёта значений обоих выражений над
+    массивами
+    :type function: Callable[[numpy.ndarray, numpy.ndarray],
+    Tuple[numpy.ndarray, numpy.ndarray]]
+    :param amount_iterations: Кол-во шагов метода
+    :type amount_iterations: int
+    :param h_step: Временной шаг
+    :type h_step: float
+    :param convergence: Критерии досрочной остановки
+    :type convergence: Optional[Convergence]
+    :param stoppable: Признаки того, что траекторию можно остановить досрочно
+    :type stoppable: Optional[numpy.ndarray]
+    :param chunk_size: Кол-во точек траектории в блоке
+    :type chunk_size: int
+    :return: Генератор блоков точек и кол-в точек в блоках
+    :rtype: Generator[Tuple[numpy.ndarray, numpy.ndarray], None, None]
+    """
+    amount = len(points)
+    total = amount_iterations + 1
+    # Номер последней точки каждой траектории
+    ends = numpy.full(amount, amount_iterations)
+
+    check = convergence is not None and convergence.is_enabled()
+    if stoppable is None:
+        stoppable = numpy.ones(amount, dtype=bool)
+    active = numpy.arange(amount)
+
+    block = numpy.empty((amount, min(chunk_size, total), 2))
+    block[:, 0, :] = [tuple(p) for p in points]
+    block_start, position = 0, 1
+
+    x = block[:, 0, 0].copy()
+    y = block[:, 0, 1].copy()
+
+    with numpy.errstate(over='ignore', invalid='ignore'):
+        for i in range(1, total):
+            x_prev, y_prev = x, y
+            x, y = rk4_step(function, x, y, h_step)
+
+            if position == block.shape[1]:
+                yield block, numpy.clip(
+                    ends - block_start + 1, 0, block.shape[1])
+                block = numpy.empty((amount, min(chunk_size, total - i), 2))
+                block_start, position = i, 0
+
+            if len(active) == amount:
+                block[:, position, 0] = x
+                block[:, position, 1] = y
+            else:
+                block[active, position, 0] = x
+                block[active, position, 1] = y
+            position += 1
+
+            if check:
+                done = convergence.check(x, y, x_prev, y_prev, h_step) & \
+                    stoppable[active]
+                if done.any():
+                    ends[active[done]] = i
+                    active, x, y = active[~done], x[~done], y[~done]
+                    if len(active) == 0:
+                        break
+
+    yield block[:, :position], numpy.clip(ends - block_start + 1, 0, position)
+
+
+def iter_rk4_chunks_native(
+        points: List[Point], kernel: Callable, params: numpy.ndarray,
+        amount_iterations: int, h_step: float,
+        convergence: Optional[Convergence] = None,
+        stoppable: Optional[numpy.ndarray] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE) -> Generator[
+            Tuple[numpy.ndarray, numpy.ndarray], None, None]:
+    """
+    То же, что `iter_rk4_chunks`, но шаги метода выполняются
+    скомпилированным ядром `domain.jitting.get_rk4_kernel`: каждая
+    траектория проходит весь блок за один вызов, без обращений к
+    интерпретатору на каждом шаге
+
+    :param points: Начальные точки фазовых траекторий
+    :type points: List[Point]
+    :param kernel: Ядро метода
+    :type kernel: Callable
+    :param params: Параметры ядра (см. `domain.jitting.get_kernel_params`)
+    :type params: numpy.ndarray
+    :param amount_iterations: Кол-во шагов метода
+    :type amount_iterations: int
+    :param h_step: Временной шаг
+    :type h_step: float
+    :param convergence: Критерии досрочной остановки
+    :type convergence: Optional[Convergence]
+    :param stoppable: Признаки того, что траекторию можно остановить досрочно
+    :type stoppable: Optional[numpy.ndarray]
+    :param chunk_size: Кол-во точек траектории в блоке
+    :type chunk_size: int
+    :return: Генератор блоков точек и кол-в точек в блоках
+    :rtype: Generator[Tuple[numpy.ndarray, numpy.ndarray], None, None]
+    """
+    amount = len(points)
+    total = amount_iterations + 1
+    # Номер последней точки каждой траектории
+    ends = numpy.full(amount, amount_iterations, dtype=numpy.int64)
+
+    if stoppable is None or convergence is None or \
+            not convergence.is_enabled():
+        stoppable = numpy.zeros(amount, dtype=bool)
+        convergence = Convergence()
+    active = numpy.ones(amount, dtype=bool)
+    tolerance = -1.0 if convergence.tolerance is None \
+        else float(convergence.tolerance)
+    radius = -1.0 if convergence.radius is None else float(convergence.radius)
+
+    block = numpy.empty((amount, min(chunk_size, total), 2))
+    block[:, 0, :] = [tuple(p) for p in points]
+    x = block[:, 0, 0].copy()
+    y = block[:, 0, 1].copy()
+    block_start, position = 0, 1
+
+    while True:
+        kernel(x, y, active, ends, params, block_start + position,
+               block.shape[1] - position, h_step, tolerance, convergence.rest,
+               radius, stoppable, block[:, position:])
+        yield block, numpy.clip(ends - block_start + 1, 0, block.shape[1])
+
+        block_start += block.shape[1]
+        if block_start >= total or not active.any():
+            break
+        block = numpy.empty((amount, min(chunk_size, total - block_start), 2))
+        position = 0
+
+
+def rk4_last_batch(
+        x: numpy.ndarray, y: numpy.ndarray,
+        function: Callable[[numpy.ndarray, numpy.ndarray],
+                           Tuple[numpy.ndarray, numpy.ndarray]],
+        amount_iterations: int, h_step: float,
+        convergence: Optional[Convergence] = None,
+        check_every: int = 10) -> Tuple[
+            numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """
+    Вычисляет последние точки сразу нескольких фазовых траекторий по методу
+    Рунге-Кутты 4ого порядка, не сохраняя промежуточные точки. Критерии
+    `convergence` проверяются каждые `check_every` шагов, остановленные
+    траектории (а также ушедшие на бесконечность) исключаются из
+    дальнейших вычислений
+
+    :param x: Абсциссы начальных точек фазовых траекторий
+    :type x: numpy.ndarray
+    :param y: Ординаты начальных точек фазовых траекторий
+    :type y: numpy.ndarray
+    :param function: Функция для расчёта значений обоих выражений над
+    массивами
+    :type function: Callable[[numpy.ndarray, numpy.ndarray],
+    Tuple[numpy.ndarray, numpy.ndarray]]
+    :param amount_iterations: Кол-во шагов метода
+    :type amount_iterations: int
+    :param h_step: Временной шаг
+    :type h_step: float
+    :param convergence: Критерии досрочной остановки
+    :type convergence: Optional[Convergence]
+    :param check_every: Период проверки критериев (в шагах)
+    :type check_every: int
+    :return: Абсциссы и ординаты последних точек фазовых траекторий и
+    кол-ва выполненных шагов
+    :rtype: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+    """
+    x_result = numpy.array(x, dtype=float)
+    y_result = numpy.array(y, dtype=float)
+    steps = numpy.full(x_result.shape, amount_iterations)
+
+    check = convergence is not None and convergence.is_enabled()
+    active = numpy.arange(len(x_result))
+    x, y = x_result.copy(), y_result.copy()
+
+    with numpy.errstate(over='ignore', invalid='ignore'):
+        for i in range(1, amount_iterations + 1):
+            x_prev, y_prev = x, y
+            x, y = rk4_step(function, x, y, h_step)
+
+            if i % check_every == 0:
+                # Траектория, ушедшая на бесконечность, не возвращается
+                done = ~(numpy.isfinite(x) & numpy.isfinite(y))
+                if check:
+                    done |= convergence.check(x, y, x_prev, y_prev, h_step)
+                if done.any():
+                    x_result[active[done]] = x[done]
+                    y_result[active[done]] = y[done]
+                    steps[active[done]] = i
+                    active, x, y = active[~done], x[~done], y[~done]
+                    if len(active) == 0:
+                        break
+
+    x_result[active] = x
+    y_result[active] = y
+    return x_result, y_result, steps
+
+
+# Коэффициенты метода Дормана-Принса 5(4)
+_C2, _C3, _C4, _C5 = 1 / 5, 3 / 10, 4 / 5, 8 / 9
+_A21 = 1 / 5
+_A31, _A32 = 3 / 40, 9 / 40
+_A41, _A42, _A43 = 44 / 45, -56 / 15, 32 / 9
+_A51, _A52, _A53, _A54 = \
+    19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729
+_A61, _A62, _A63, _A64, _A65 = \
+    9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656
+_A71, _A73, _A74, _A75, _A76 = \
+    35 / 384, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84
+_E1, _E3, _E4, _E5, _E6, _E7 = \
+    71 / 57600, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40
+_D1, _D3, _D4, _D5, _D6, _D7 = \
+    -12715105075 / 11282082432, 87487479700 / 32700410799, \
+    -10690763975 / 1880347072, 701980252875 / 199316789632, \
+    -1453857185 / 822651844, 69997945 / 29380423
+
+
+def dopri45(
+        point: Point,
+        function: Callable[[float, float], Tuple[float, float]],
+        time_end: float, amount_points: int, h_step: float,
+        rtol: float = 1e-6, atol: float = 1e-9,
+        max_steps: int = 1000000,
+        convergence: Optional[Convergence] = None) -> Tuple[
+            numpy.ndarray, int]:
+    """
+    Вычисляет точки фазовой траектории методом Дормана-Принса 5(4) с
+    адаптивным выбором шага. Точки траектории вычисляются по непрерывному
+    (dense output) продолжению метода в `amount_points + 1` равноотстоящих
+    моментов времени от 0 до `time_end`, независимо от выбранных шагов.
+
+    Если траектория уходит на бесконечность или останавливается по
+    критериям `convergence`, возвращаются только точки, вычисленные до этого
+    момента
+
+    :param point: Начальная точка фазовой траектории
+    :type point: Point
+    :param function: Функция для расчёта значений обоих выражений
+    :type function: Callable[[float, float], Tuple[float, float]]
+    :param time_end: Время интегрирования
+    :type time_end: float
+    :param amount_points: Кол-во интервалов выходной сетки по времени
+    :type amount_points: int
+    :param h_step: Начальный временной шаг
+    :type h_step: float
+    :param rtol: Относительная точность
+    :type rtol: float
+    :param atol: Абсолютная точность
+    :type atol: float
+    :param max_steps: Максимальное кол-во шагов метода
+    :type max_steps: int
+    :param convergence: Критерии досрочной остановки
+    :type convergence: Optional[Convergence]
+    :return: Массив точек фазовой траектории формы (n, 2) и кол-во принятых
+    шагов метода
+    :rtype: Tuple[numpy.ndarray, int]
+    """
+    result = numpy.empty((amount_points + 1, 2))
+    times = numpy.linspace(0, time_end, amount_points + 1)
+
+    x, y = point
+    result[0] = x, y
+    index = 1
+
+    t = 0
+    h = min(h_step, time_end)
+    steps = 0
+    check = convergence is not None and convergence.is_enabled()
+    try:
+        k1x, k1y = function(x, y)
+        while index <= amount_points and steps < max_steps:
+            if t + h > time_end:
+                h = time_end - t
+
+            k2x, k2y = function(x + h * _A21 * k1x, y + h * _A21 * k1y)
+            k3x, k3y = function(x + h * (_A31 * k1x + _A32 * k2x),
+                                y + h * (_A31 * k1y + _A32 * k2y))
+            k4x, k4y = function(x + h * (_A41 * k1x + _A42 * k2x + _A43 * k3x),
+                                y + h * (_A41 * k1y + _A42 * k2y + _A43 * k3y))
+            k5x, k5y = function(
+                x + h * (_A51 * k1x + _A52 * k2x + _A53 * k3x + _A54 * k4x),
+                y + h * (_A51 * k1y + _A52 * k2y + _A53 * k3y + _A54 * k4y))
+            k6x, k6y = function(
+                x + h * (_A61 * k1x + _A62 * k2x + _A63 * k3x + _A64 * k4x +
+                         _A65 * k5x),
+                y + h * (_A61 * k1y + _A62 * k2y + _A63 * k3y + _A64 * k4y +
+                         _A65 * k5y))
+            x_new = x + h * (_A71 * k1x + _A73 * k3x + _A74 * k4x +
+                             _A75 * k5x + _A76 * k6x)
+            y_new = y + h * (_A71 * k1y + _A73 * k3y + _A74 * k4y +
+                             _A75 * k5y + _A76 * k6y)
+            k7x, k7y = function(x_new, y_new)
+
+            error_x = h * (_E1 * k1x + _E3 * k3x + _E4 * k4x + _E5 * k5x +
+                           _E6 * k6x + _E7 * k7x) / \
+                (atol + rtol * max(abs(x), abs(x_new)))
+            error_y = h * (_E1 * k1y + _E3 * k3y + _E4 * k4y + _E5 * k5y +
+                           _E6 * k6y + _E7 * k7y) / \
+                (atol + rtol * max(abs(y), abs(y_new)))
+            error = ((error_x ** 2 + error_y ** 2) / 2) ** 0.5
+
+            if error != error:
+                count(COUNTER_OVERFLOWS)
+                break
+
+            if error <= 1:
+                steps += 1
+                t_new = t + h
+                # Коэффициенты непрерывного продолжения на шаге [t, t + h]
+                diff_x, diff_y = x_new - x, y_new - y
+                b_x, b_y = h * k1x - diff_x, h * k1y - diff_y
+                c_x, c_y = diff_x - h * k7x - b_x, diff_y - h * k7y - b_y
+                d_x = h * (_D1 * k1x + _D3 * k3x + _D4 * k4x + _D5 * k5x +
+                           _D6 * k6x + _D7 * k7x)
+                d_y = h * (_D1 * k1y + _D3 * k3y + _D4 * k4y + _D5 * k5y +
+                           _D6 * k6y + _D7 * k7y)
+                while index <= amount_points and times[index] <= t_new:
+                    s = (times[index] - t) / h
+                    s1 = 1 - s
+                    result[index] = \
+                        x + s * (diff_x + s1 * (b_x + s * (c_x + s1 * d_x))), \
+                        y + s * (diff_y + s1 * (b_y + s * (c_y + s1 * d_y)))
+                    index += 1
+
+                if check and convergence.check(x_new, y_new, x, y, h):
+                    break
+
+                t, x, y = t_new, x_new, y_new
+                k1x, k1y = k7x, k7y
+
+            factor = 0.9 * error ** -0.2 if error > 0 else 10
+            h = h * min(10, max(0.2, factor))
+            if h < 1e-14 * max(1, abs(t)):
+                break
+    except (OverflowError, ZeroDivisionError, ValueError):
+        count(COUNTER_OVERFLOWS)
+
+    return result[:index], steps
+
+
+# Коэффициенты метода Розенброка 2(3) (ode23s)
+_ROS_D = 1 / (2 + 2 ** 0.5)
+_ROS_E32 = 6 + 2 ** 0.5
+
+
+def rosenbrock23(
+        point: Point,
+        function: Callable[[float, float], Tuple[float, float]],
+        jacobian: Callable[[float, float], Tuple[Tuple[float, ...], ...]],
+        time_end: float, amount_points: int, h_step: float,
+        rtol: float = 1e-6, atol: float = 1e-9,
+        max_steps: int = 1000000,
+        convergence: Optional[Convergence] = None) -> Tuple[
+            numpy.ndarray, int]:
+    """
+    Вычисляет точки фазовой траектории L-устойчивым методом Розенброка 2(3)
+    с адаптивным выбором шага, предназначенным для жёстких систем. На каждом
+    шаге решаются линейные системы с матрицей `I - h * d * J`, поэтому шаг
+    ограничен только точностью, а не устойчивостью.
+
+    Точки траектории вычисляются по непрерывному продолжению метода в
+    `amount_points + 1` равноотстоящих моментов времени от 0 до `time_end`.
+    Если траектория уходит на бесконечность или останавливается по
+    критериям `convergence`, возвращаются только точки, вычисленные до этого
+    момента
+
+    :param point: Начальная точка фазовой траектории
+    :type point: Point
+    :param function: Функция для расчёта значений обоих выражений
+    :type function: Callable[[float, float], Tuple[float, float]]
+    :param jacobian: Функция для расчёта матрицы Якоби системы
+    :type jacobian: Callable[[float, float], Tuple[Tuple[float, ...], ...]]
+    :param time_end: Время интегрирования
+    :type time_end: float
+    :param amount_points: Кол-во интервалов выходной сетки по времени
+    :type amount_points: int
+    :param h_step: Начальный временной шаг
+    :type h_step: float
+    :param rtol: Относительная точность
+    :type rtol: float
+    :param atol: Абсолютная точность
+    :type atol: float
+    :param max_steps: Максимальное кол-во шагов метода
+    :type max_steps: int
+    :param convergence: Критерии досрочной остановки
+    :type convergence: Optional[Convergence]
+    :return: Массив точек фазовой траектории формы (n, 2) и кол-во принятых
+    шагов метода
+    :rtype: Tuple[numpy.ndarray, int]
+    """
+    result = numpy.empty((amount_points + 1, 2))
+    times = numpy.linspace(0, time_end, amount_points + 1)
+
+    x, y = point
+    result[0] = x, y
+    index = 1
+
+    t = 0
+    h = min(h_step, time_end)
+    steps = 0
+    check = convergence is not None and convergence.is_enabled()
+    try:
+        f0x, f0y = function(x, y)
+        while index <= amount_points and steps < max_steps:
+            if t + h > time_end:
+                h = time_end - t
+
+            (j11, j12), (j21, j22) = jacobian(x, y)
+            # W = I - h * d * J, обратная матрица 2x2 выписана явно
+            w11, w12 = 1 - h * _ROS_D * j11, -h * _ROS_D * j12
+            w21, w22 = -h * _ROS_D * j21, 1 - h * _ROS_D * j22
+            det = w11 * w22 - w12 * w21
+
+            def solve_w(b_x: float, b_y: float) -> Tuple[float, float]:
+                return (w22 * b_x - w12 * b_y) / det, \
+                       (w11 * b_y - w21 * b_x) / det
+
+            k1x, k1y = solve_w(f0x, f0y)
+            f1x, f1y = function(x + h / 2 * k1x, y + h / 2 * k1y)
+            k2x, k2y = solve_w(f1x - k1x, f1y - k1y)
+            k2x, k2y = k2x + k1x, k2y + k1y
+            x_new, y_new = x + h * k2x, y + h * k2y
+            f2x, f2y = function(x_new, y_new)
+            k3x, k3y = solve_w(
+                f2x - _ROS_E32 * (k2x - f1x) - 2 * (k1x - f0x),
+                f2y - _ROS_E32 * (k2y - f1y) - 2 * (k1y - f0y))
+
+            error_x = h / 6 * (k1x - 2 * k2x + k3x) / \
+                (atol + rtol * max(abs(x), abs(x_new)))
+            error_y = h / 6 * (k1y - 2 * k2y + k3y) / \
+                (atol + rtol * max(abs(y), abs(y_new)))
+            error = ((error_x ** 2 + error_y ** 2) / 2) ** 0.5
+
+            if error != error:
+                count(COUNTER_OVERFLOWS)
+                break
+
+            if error <= 1:
+                steps += 1
+                t_new = t + h
+                while index <= amount_points and times[index] <= t_new:
+                    s = (times[index] - t) / h
+                    a = s * (1 - s) / (1 - 2 * _ROS_D)
+                    b = s * (s - 2 * _ROS_D) / (1 - 2 * _ROS_D)
+                    result[index] = \
+                        x + h * (a * k1x + b * k2x), \
+                        y + h * (a * k1y + b * k2y)
+                    index += 1
+
+                if check and convergence.check(x_new, y_new, x, y, h):
+                    break
+
+                t, x, y = t_new, x_new, y_new
+                f0x, f0y = f2x, f2y
+
+            factor = 0.9 * error ** (-1 / 3) if error > 0 else 10
+            h = h * min(10, max(0.2, factor))
+            if h < 1e-14 * max(1, abs(t)):
+                break
+    except (OverflowError, ZeroDivisionError, ValueError):
+        count(COUNTER_OVERFLOWS)
+
+    return result[:index], steps
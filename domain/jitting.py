@@ -0,0 +1,188 @@
+from typing import Any, Callable, Dict, Optional
+from functools import lru_cache, partial
+import logging
+
+import numpy
+
+from domain.compiling import CompiledSystem, get_numpy_namespace, \
+    get_scalar_namespace
+
+
+LOGGER = logging.getLogger('__main__')
+
+
+@lru_cache(maxsize=1)
+def is_available() -> bool:
+    """
+    Возвращает True, если установлен `numba` и выражения можно
+    компилировать в машинный код
+
+    :return: Доступна ли компиляция
+    :rtype: bool
+    """
+    try:
+        import numba  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+@lru_cache(maxsize=None)
+def get_rk4_kernel(system: CompiledSystem) -> Optional[Callable]:
+    """
+    Компилирует выражения системы вместе с циклом метода Рунге-Кутты
+    4ого порядка в машинный код (`numba`). Результат кэшируется, поэтому
+    каждая система компилируется один раз за время работы процесса.
+
+    Ядро вызывается как `kernel(x, y, active, ends, params, step_first,
+    amount_steps, h_step, tolerance, rest, radius, stoppable, block)`, где
+    `params` - массив `get_kernel_params`: для каждой траектории,
+    отмеченной в `active`, выполняет `amount_steps` шагов, начиная с шага
+    `step_first`, и записывает точки в `block` формы (кол-во траекторий,
+    amount_steps, 2). Текущие точки (`x`, `y`) обновляются на месте.
+    Траектория, отмеченная в `stoppable`, у которой перемещение за шаг
+    меньше `tolerance * h_step` или расстояние до одной из точек `rest`
+    меньше `radius` (отрицательные значения отключают критерий),
+    останавливается: снимается отметка `active`, а в `ends`
+    записывается номер её последнего шага
+
+    :param system: Система выражений
+    :type system: CompiledSystem
+    :return: Ядро или None, если `numba` не установлен или система не
+    может быть скомпилирована
+    :rtype: Optional[Callable]
+    """
+    if not is_available() or len(system.expressions) != 2:
+        return None
+    import numba
+
+    try:
+        rhs = numba.njit(error_model='numpy')(__get_rhs(system))
+        kernel = partial(__get_rk4_chunk(), rhs)
+        # Компиляция выполняется при первом вызове, поэтому ошибки
+        # (например, неподдерживаемые функции) проявляются здесь
+        kernel(numpy.zeros(1), numpy.zeros(1), numpy.ones(1, dtype=bool),
+               numpy.zeros(1, dtype=numpy.int64),
+               numpy.ones(len(system.parameters_variables) +
+                          len(system.program.constants)), 1, 1, 0.1, -1.0,
+               numpy.empty((0, 2)), -1.0, numpy.zeros(1, dtype=bool),
+               numpy.empty((1, 1, 2)))
+    except Exception as e:
+        LOGGER.warning(f'Не удалось скомпилировать выражения '
+                       f'{list(system.expressions)}, будет использован '
+                       f'`numpy`: {e}')
+        return None
+    return kernel
+
+
+def get_kernel_params(system: CompiledSystem,
+                      params: Dict[str, Any]) -> numpy.ndarray:
+    """
+    Возвращает массив параметров ядра `get_rk4_kernel`: значения параметров
+    в порядке `parameters_variables`, за которыми следуют значения
+    подвыражений, зависящих только от параметров (`Program.constants`).
+    Эти подвыражения вычисляются здесь один раз, а не на каждом шаге метода
+
+    :param system: Система выражений
+    :type system: CompiledSystem
+    :param params: Значения параметров
+    :type params: Dict[str, Any]
+    :return: Массив параметров ядра
+    :rtype: numpy.ndarray
+    """
+    values = dict(zip(system.parameters_variables,
+                      map(numpy.float64, system.order(params))))
+    namespace = get_numpy_namespace()
+    with numpy.errstate(all='ignore'):
+        for name, expression in system.program.constants:
+            values[name] = eval(expression, namespace, values)
+    return numpy.array(
+        [values[name] for name in system.parameters_variables] +
+        [values[name] for name, _ in system.program.constants], dtype=float)
+
+
+def __get_rhs(system: CompiledSystem) -> Callable:
+    """
+    Возвращает функцию `rhs(x, y, params)`, вычисляющую оба выражения при
+    значениях параметров и подвыражений от параметров из массива `params`
+    (см. `get_kernel_params`). Выражения берутся после предварительной
+    обработки (`CompiledSystem.program`), поэтому общие подвыражения
+    вычисляются один раз, а подвыражения от параметров не вычисляются вовсе
+
+    :param system: Система выражений
+    :type system: CompiledSystem
+    :return: Функция
+    :rtype: Callable
+    """
+    names = system.variables + system.parameters_variables
+    params = '_params'
+    while params in names:
+        params += '_'
+
+    lines = [f'def rhs({", ".join(system.variables)}, {params}):']
+    lines += [f'    {name} = {params}[{i}]'
+              for i, name in enumerate(system.parameters_variables)]
+    lines += [f'    {name} = {params}[{i}]'
+              for i, (name, _) in enumerate(
+                  system.program.constants,
+                  len(system.parameters_variables))]
+    lines += [f'    {name} = {expression}'
+              for name, expression in system.program.temporaries]
+    lines.append(
+        f'    return {", ".join(f"({e})" for e in system.program.results)}')
+
+    namespace = dict(get_scalar_namespace())
+    exec(compile('\n'.join(lines), '<jit>', 'exec'), namespace)
+    return namespace['rhs']
+
+
+@lru_cache(maxsize=1)
+def __get_rk4_chunk() -> Callable:
+    """
+    Возвращает скомпилированный цикл метода Рунге-Кутты 4ого порядка,
+    принимающий функцию правых частей первым аргументом
+
+    :return: Цикл метода
+    :rtype: Callable
+    """
+    import numba
+
+    @numba.njit(error_model='numpy')
+    def rk4_chunk(rhs, x, y, active, ends, params, step_first, amount_steps,
+                  h_step, tolerance, rest, radius, stoppable, block):
+        for j in range(x.shape[0]):
+            if not active[j]:
+                continue
+            x_j, y_j = x[j], y[j]
+            for i in range(amount_steps):
+                k1, l1 = rhs(x_j, y_j, params)
+                k2, l2 = rhs(x_j + h_step / 2 * k1, y_j + h_step / 2 * l1,
+                             params)
+                k3, l3 = rhs(x_j + h_step / 2 * k2, y_j + h_step / 2 * l2,
+                             params)
+                k4, l4 = rhs(x_j + h_step * k3, y_j + h_step * l3, params)
+                x_next = x_j + h_step / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+                y_next = y_j + h_step / 6 * (l1 + 2 * l2 + 2 * l3 + l4)
+                block[j, i, 0] = x_next
+                block[j, i, 1] = y_next
+
+                done = False
+                if stoppable[j]:
+                    if tolerance >= 0 and \
+                            (x_next - x_j) ** 2 + (y_next - y_j) ** 2 < \
+                            (tolerance * h_step) ** 2:
+                        done = True
+                    if radius >= 0:
+                        for r in range(rest.shape[0]):
+                            if (x_next - rest[r, 0]) ** 2 + \
+                                    (y_next - rest[r, 1]) ** 2 < radius ** 2:
+                                done = True
+
+                x_j, y_j = x_next, y_next
+                if done:
+                    active[j] = False
+                    ends[j] = step_first + i
+                    break
+            x[j], y[j] = x_j, y_j
+
+    return rk4_chunk
@@ -0,0 +1,423 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+import json
+import logging
+
+from domain.configuration import DataConfiguration, DataObjConfiguration, \
+    DataSetConfiguration, ExpressionsConfiguration, PlottingConfiguration, \
+    SweepConfiguration, TrajectoryConfiguration
+from domain.classes.point import Point
+
+
+LOGGER = logging.getLogger('__main__')
+
+# Поле с именем класса в файлах, сохранённых `jsonpickle`
+FIELD_CLASS = 'py/object'
+
+
+class ConfigurationError(ValueError):
+    """
+    Ошибка в файле с данными. `path` - путь к ошибочному значению в нотации
+    `JSONPath` (например, `$.dataset.values[0].trajectories[3].point`)
+    """
+
+    def __init__(self, path: str, message: str):
+        """
+        Конструктор класса
+
+        :param path: Путь к ошибочному значению
+        :param message: Описание ошибки
+        """
+        super().__init__(f'{path}: {message}')
+        self.path = path
+        self.message = message
+
+    def within(self, part: str) -> ConfigurationError:
+        """
+        Возвращает ту же ошибку с путём, дополненным спереди частью `part`.
+        Путь собирается только при ошибке, по мере выхода из функций чтения
+
+        :param part: Часть пути (`.field` или `[index]`)
+        :type part: str
+        :return: Ошибка
+        :rtype: ConfigurationError
+        """
+        return ConfigurationError(f'{part}{self.path}', self.message)
+
+
+def load_configuration(content: str) -> DataConfiguration:
+    """
+    Разбирает файл с данными по схеме классов `domain.configuration`.
+    В отличие от `jsonpickle`, классы не загружаются по именам из файла:
+    поле `py/object` необязательно и, если указано, лишь сверяется с
+    ожидаемым классом. Отсутствующие необязательные поля получают значения
+    по умолчанию конструкторов, неизвестные поля пропускаются с
+    предупреждением
+
+    :param content: Содержимое файла (`JSON`)
+    :type content: str
+    :return: Конфигурационные данные
+    :rtype: DataConfiguration
+    :raises ConfigurationError: Если файл не соответствует схеме
+    """
+    try:
+        value = json.loads(content)
+    except json.JSONDecodeError as e:
+        raise ConfigurationError(
+            '$', f'Некорректный JSON (строка {e.lineno}, столбец {e.colno}): '
+                 f'{e.msg}') from None
+
+    try:
+        result = __read_object(DataConfiguration)(value)
+        __check_points(result)
+        __check_values(result)
+    except ConfigurationError as e:
+        raise e.within('$') from None
+    return result
+
+
+def __check_points(configuration: DataConfiguration):
+    """
+    Проверяет представления всех точек файла одним разбором
+
+    :param configuration: Конфигурационные данные
+    :type configuration: DataConfiguration
+    :raises ConfigurationError: Если какая-либо строка не является
+    представлением точки
+    """
+    # Пути к точкам вне списков траекторий
+    paths = ['.rest_search_start', '.rest_search_end']
+    strings = [configuration.rest_search_start, configuration.rest_search_end]
+    for field in ('field_start', 'field_end'):
+        value = getattr(configuration.plotting, field)
+        if value is not None:
+            paths.append(f'.plotting.{field}')
+            strings.append(value)
+    for data in configuration.dataset.values:
+        strings += [t.point for t in data.trajectories]
+
+    try:
+        Point.parse_all(strings)
+    except ValueError as e:
+        index = e.args[1]
+        if index < len(paths):
+            raise ConfigurationError(paths[index], e.args[0])
+        index -= len(paths)
+        for i, data in enumerate(configuration.dataset.values):
+            if index < len(data.trajectories):
+                raise ConfigurationError(
+                    f'.dataset.values[{i}].trajectories[{index}].point',
+                    e.args[0])
+            index -= len(data.trajectories)
+        raise
+
+
+def __check_values(configuration: DataConfiguration):
+    """
+    Проверяет значения, допустимость которых определяется модулями
+    вычислений: названия методов интегрирования и способов рисования и
+    синтаксис выражений. Модули импортируются только здесь, чтобы импорт
+    `domain.loading` оставался быстрым
+
+    :param configuration: Конфигурационные данные
+    :type configuration: DataConfiguration
+    :raises ConfigurationError: Если какое-либо значение недопустимо
+    """
+    from domain.compiling import validate_expression
+    from domain.integrating import INTEGRATORS
+    from domain.rendering import FIELDS, RENDERERS
+
+    __check_choice('.integrator', configuration.integrator, INTEGRATORS)
+    for i, data in enumerate(configuration.dataset.values):
+        if data.integrator is not None:
+            __check_choice(f'.dataset.values[{i}].integrator',
+                           data.integrator, INTEGRATORS)
+    __check_choice('.plotting.renderer', configuration.plotting.renderer,
+                   RENDERERS)
+    if configuration.plotting.vector_field is not None:
+        __check_choice('.plotting.vector_field',
+                       configuration.plotting.vector_field, FIELDS)
+
+    expressions = configuration.expressions
+    names = expressions.variables + expressions.parameters_variables
+    for field in ('initial', 'simplified'):
+        for i, expression in enumerate(getattr(expressions, field)):
+            try:
+                validate_expression(expression, names)
+            except ValueError as e:
+                raise ConfigurationError(
+                    f'.expressions.{field}[{i}]', str(e)) from None
+
+
+def __check_choice(path: str, value: str, choices: Tuple[str, ...]):
+    """
+    Проверяет, что значение - одно из допустимых
+
+    :param path: Путь к значению
+    :type path: str
+    :param value: Значение
+    :type value: str
+    :param choices: Допустимые значения
+    :type choices: Tuple[str, ...]
+    :raises ConfigurationError: Если значение недопустимо
+    """
+    if value not in choices:
+        raise ConfigurationError(
+            path, f'Ожидается одно из значений {list(choices)}, получено '
+                  f'"{value}"!')
+
+
+def __read_object(_class: Type) -> Callable[[Any], Any]:
+    """
+    Возвращает функцию чтения объекта класса `_class` по его схеме из
+    `SCHEMA`
+
+    :param _class: Класс
+    :type _class: Type
+    :return: Функция чтения
+    :rtype: Callable[[Any], Any]
+    """
+    name = f'{_class.__module__}.{_class.__qualname__}'
+
+    def read(value: Any) -> Any:
+        if not isinstance(value, dict):
+            raise ConfigurationError('', 'Ожидается объект!')
+        if value.get(FIELD_CLASS, name) != name:
+            raise ConfigurationError(
+                f'.{FIELD_CLASS}',
+                f'Ожидается "{name}", получено "{value[FIELD_CLASS]}"!')
+
+        fields = SCHEMA[_class]
+        kwargs = {}
+        for field, (reader, required) in fields.items():
+            if field in value:
+                try:
+                    kwargs[field] = reader(value[field])
+                except ConfigurationError as e:
+                    raise e.within(f'.{field}') from None
+            elif required:
+                raise ConfigurationError(
+                    '', f'Отсутствует обязательное поле "{field}"!')
+        if len(value) - (FIELD_CLASS in value) != len(kwargs):
+            for field in value.keys() - fields.keys() - {FIELD_CLASS}:
+                LOGGER.warning(f'Неизвестное поле "{field}" объекта '
+                               f'`{_class.__name__}` пропущено.')
+        return _class(**kwargs)
+    return read
+
+
+def __read_optional(reader: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """
+    Возвращает функцию чтения значения, которое может быть `null`
+
+    :param reader: Функция чтения значения
+    :type reader: Callable[[Any], Any]
+    :return: Функция чтения
+    :rtype: Callable[[Any], Any]
+    """
+    def read(value: Any) -> Any:
+        return None if value is None else reader(value)
+    return read
+
+
+def __read_list(reader: Callable[[Any], Any],
+                length: Optional[int] = None) -> Callable[[Any], List]:
+    """
+    Возвращает функцию чтения списка значений
+
+    :param reader: Функция чтения элемента
+    :type reader: Callable[[Any], Any]
+    :param length: Длина списка (если должна быть фиксированной)
+    :type length: Optional[int]
+    :return: Функция чтения
+    :rtype: Callable[[Any], List]
+    """
+    def read(value: Any) -> List:
+        if not isinstance(value, list):
+            raise ConfigurationError('', 'Ожидается список!')
+        if length is not None and len(value) != length:
+            raise ConfigurationError(
+                '', f'Ожидается список из {length} элементов!')
+        try:
+            return [reader(item) for item in value]
+        except ConfigurationError as e:
+            # Номер ошибочного элемента ищется только при ошибке
+            for i, item in enumerate(value):
+                try:
+                    reader(item)
+                except ConfigurationError:
+                    raise e.within(f'[{i}]') from None
+            raise
+    return read
+
+
+def __read_dict(reader: Callable[[Any], Any]) -> Callable[[Any], Dict]:
+    """
+    Возвращает функцию чтения словаря со строковыми ключами
+
+    :param reader: Функция чтения значения
+    :type reader: Callable[[Any], Any]
+    :return: Функция чтения
+    :rtype: Callable[[Any], Dict]
+    """
+    def read(value: Any) -> Dict:
+        if not isinstance(value, dict):
+            raise ConfigurationError('', 'Ожидается объект!')
+        result = {}
+        for key, item in value.items():
+            try:
+                result[key] = reader(item)
+            except ConfigurationError as e:
+                raise e.within(f'.{key}') from None
+        return result
+    return read
+
+
+def __read_bounded(reader: Callable[[Any], Any], minimum: float,
+                   inclusive: bool = True) -> Callable[[Any], Any]:
+    """
+    Возвращает функцию чтения числа, ограниченного снизу
+
+    :param reader: Функция чтения числа
+    :type reader: Callable[[Any], Any]
+    :param minimum: Нижняя граница
+    :type minimum: float
+    :param inclusive: Допустимо ли значение, равное границе
+    :type inclusive: bool
+    :return: Функция чтения
+    :rtype: Callable[[Any], Any]
+    """
+    def read(value: Any) -> Any:
+        value = reader(value)
+        # Сравнения записаны так, чтобы NaN также считался недопустимым
+        if inclusive and not value >= minimum:
+            raise ConfigurationError(
+                '', f'Ожидается значение не меньше {minimum}, получено '
+                    f'{value}!')
+        if not inclusive and not value > minimum:
+            raise ConfigurationError(
+                '', f'Ожидается значение больше {minimum}, получено '
+                    f'{value}!')
+        return value
+    return read
+
+
+def __read_str(value: Any) -> str:
+    """
+    Читает строку
+
+    :param value: Значение
+    :type value: Any
+    :return: Строка
+    :rtype: str
+    """
+    if not isinstance(value, str):
+        raise ConfigurationError('', 'Ожидается строка!')
+    return value
+
+
+def __read_bool(value: Any) -> bool:
+    """
+    Читает логическое значение
+
+    :param value: Значение
+    :type value: Any
+    :return: Логическое значение
+    :rtype: bool
+    """
+    if not isinstance(value, bool):
+        raise ConfigurationError('', 'Ожидается true или false!')
+    return value
+
+
+def __read_int(value: Any) -> int:
+    """
+    Читает целое число
+
+    :param value: Значение
+    :type value: Any
+    :return: Целое число
+    :rtype: int
+    """
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ConfigurationError('', 'Ожидается целое число!')
+    return value
+
+
+def __read_number(value: Any) -> float:
+    """
+    Читает число
+
+    :param value: Значение
+    :type value: Any
+    :return: Число
+    :rtype: float
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ConfigurationError('', 'Ожидается число!')
+    return value
+
+
+# Схема файла с данными: для каждого класса - поля конструктора, функции
+# чтения их значений и обязательность полей
+SCHEMA: Dict[Type, Dict[str, Tuple[Callable[[Any], Any], bool]]] = {
+    TrajectoryConfiguration: {
+        'point': (__read_str, True),
+        'color': (__read_str, True),
+        'tend_to_rest': (__read_bool, True),
+    },
+    DataObjConfiguration: {
+        'name': (__read_str, True),
+        'parameters': (__read_dict(__read_number), True),
+        'trajectories': (
+            __read_list(__read_object(TrajectoryConfiguration)), True),
+        'plot_separate_line': (__read_bool, True),
+        'integrator': (__read_optional(__read_str), False),
+    },
+    DataSetConfiguration: {
+        'values': (__read_list(__read_object(DataObjConfiguration)), True),
+    },
+    ExpressionsConfiguration: {
+        'initial': (__read_list(__read_str, 2), True),
+        'simplified': (__read_list(__read_str, 2), True),
+        'variables': (__read_list(__read_str, 2), True),
+        'parameters_variables': (__read_list(__read_str), True),
+    },
+    PlottingConfiguration: {
+        'show_legend': (__read_bool, True),
+        'show_grid': (__read_bool, True),
+        'max_points': (__read_optional(__read_bounded(__read_int, 2)), False),
+        'time_series': (__read_bool, False),
+        'renderer': (__read_str, False),
+        'vector_field': (__read_optional(__read_str), False),
+        'nullclines': (__read_bool, False),
+        'field_start': (__read_optional(__read_str), False),
+        'field_end': (__read_optional(__read_str), False),
+    },
+    SweepConfiguration: {
+        'name': (__read_str, True),
+        'parameters': (__read_dict(__read_number), True),
+        'ranges': (__read_dict(__read_list(__read_number, 3)), True),
+        'domain_range': (__read_list(__read_number, 2), False),
+        'amount_points': (__read_int, False),
+    },
+    DataConfiguration: {
+        'expressions': (__read_object(ExpressionsConfiguration), True),
+        'amount_iterations': (__read_bounded(__read_int, 1), True),
+        'h_step': (__read_bounded(__read_number, 0, False), True),
+        'dataset': (__read_object(DataSetConfiguration), True),
+        'plotting': (__read_object(PlottingConfiguration), True),
+        'integrator': (__read_str, False),
+        'rtol': (__read_bounded(__read_number, 0, False), False),
+        'atol': (__read_bounded(__read_number, 0, False), False),
+        'amount_points': (
+            __read_optional(__read_bounded(__read_int, 2)), False),
+        'convergence_tolerance': (__read_optional(__read_number), False),
+        'rest_radius': (__read_optional(__read_number), False),
+        'rest_search_start': (__read_str, False),
+        'rest_search_end': (__read_str, False),
+        'sweeps': (__read_optional(
+            __read_list(__read_object(SweepConfiguration))), False),
+        'jit': (__read_bool, False),
+    },
+}
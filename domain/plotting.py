@@ -1,321 +1,682 @@
-import matplotlib.pyplot as plt
-from typing import List, Dict, Callable
+from matplotlib.figure import Figure
+from matplotlib.axes import Axes
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import repeat
+import matplotlib
+import numpy
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 import logging
-import uuid
-import os.path
+import os
 
 from domain.configuration import DataConfiguration, DataObjConfiguration, \
-    PlottingConfiguration
-from domain.functions import get_functions_for_expressions, \
-    get_functions_for_solving
-from domain.solving import solve
+    SweepConfiguration
+from domain.functions import get_system_for_expressions, \
+    get_system_for_solving
+from domain.caching import ResultCache
+from domain.exporting import Basins, ResultExport
+from domain.compiling import CompiledSystem
+from domain.instrumenting import COUNTER_PORTRAITS_REUSED, collecting, \
+    count, get_instrumentation, stage
+from domain.integrating import integrate, Convergence
+from domain.fielding import evaluate_field, get_nullclines
+from domain.rendering import get_extent, plot_nullclines, plot_series, \
+    plot_trajectories, plot_vector_field
+from domain.separating import classify_basins, get_grid, get_separate_lines
+from domain.solving import find_rest_points
+from domain.sweeping import sweep_roots, continue_roots
+from domain.visualizing import can_insert_documents
 from domain.classes.point import Point
+from domain.classes.trajectory import Trajectory
 
 
 LOGGER = logging.getLogger('__main__')
 
+# Радиус окрестности точек покоя при построении разделяющей кривой, если в
+# конфигурационных данных не задан `rest_radius`
+SEPARATE_LINE_REST_RADIUS = 0.01
+# Кол-во узлов сетки, кол-во шагов и временной шаг при построении
+# разделяющей кривой
+SEPARATE_LINE_SHAPE = (1001, 1501)
+SEPARATE_LINE_AMOUNT_ITERATIONS = 500
+SEPARATE_LINE_H_STEP = 0.0002
+# Кол-во узлов сетки поля направлений и нуль-изоклин
+FIELD_SHAPE = (401, 401)
+
+
+def plot(data: DataConfiguration, workers: int = 1,
+         cache: Optional[ResultCache] = None,
+         executor: Optional[Executor] = None,
+         export: Optional[ResultExport] = None,
+         incremental: bool = False) -> List[Union[Figure, str]]:
+    """
+    Строит множество фазовых портретов (и графики x(t), y(t), если включён
+    `time_series`). При `workers > 1` портреты строятся параллельно в пуле
+    процессов и передаются обратно в сериализованном виде, порядок
+    результатов при этом сохраняется.
+    Если задан `cache`, фазовые траектории и области притяжения, входные
+    данные которых не изменились, берутся из кэша. Если задан `executor`,
+    портреты строятся в нём, а не в новом пуле (например, при обработке
+    нескольких файлов подряд). Если задан `export`, вычисленные
+    траектории, точки покоя, области притяжения и разделяющие кривые каждого
+    портрета выгружаются в него.
+    Если включён `incremental` (требуется `cache` и `pypdf`), страницы
+    каждого фазового портрета сохраняются в кэш документом, ключ которого -
+    все входные данные портрета (выражения, параметры, начальные точки,
+    `h_step`, `amount_iterations`, настройки построения и т.д.). Портреты,
+    входные данные которых не изменились, не строятся: вместо их
+    изображений возвращаются пути к документам из кэша (см.
+    `domain.visualizing.show_as_pdf`), построенные портреты также
+    возвращаются путями к документам.
+    Время этапов и счётчики всех портретов (в том числе построенных в
+    других процессах) добавляются к данным текущего процесса (см.
+    `domain.instrumenting`)
 
-def plot(data: DataConfiguration) -> List[str]:
+    :param data: Данные для построения фазовых портретов
+    :type data: DataConfiguration
+    :param workers: Кол-во процессов
+    :type workers: int
+    :param cache: Кэш результатов вычислений
+    :type cache: Optional[ResultCache]
+    :param executor: Пул процессов
+    :type executor: Optional[Executor]
+    :param export: Выгрузка результатов вычислений
+    :type export: Optional[ResultExport]
+    :param incremental: Строить ли только изменившиеся портреты
+    :type incremental: bool
+    :return: Список построенных изображений и путей к документам
+    :rtype: List[Union[Figure, str]]
+    """
+    amount = len(data.dataset.values)
+
+    if incremental and cache is None:
+        LOGGER.warning('Для построения только изменившихся фазовых '
+                       'портретов нужен кэш, будут построены все портреты.')
+        incremental = False
+    if incremental and not can_insert_documents():
+        LOGGER.warning('Для построения только изменившихся фазовых '
+                       'портретов нужен пакет `pypdf` (`pip install pypdf`), '
+                       'будут построены все портреты.')
+        incremental = False
+
+    keys = [None] * amount
+    result: List[Optional[List[Union[Figure, str]]]] = [None] * amount
+    if incremental:
+        keys = [__get_portrait_key(data, index) for index in range(amount)]
+        for index, key in enumerate(keys):
+            path = cache.load_document(key)
+            # Выгрузка портрета должна быть на месте, иначе её нужно
+            # вычислить заново
+            if path is not None and (export is None or os.path.isdir(
+                    export.get_path(index, data.dataset.values[index]))):
+                result[index] = [path]
+
+    missing = [index for index in range(amount) if result[index] is None]
+    if incremental:
+        count(COUNTER_PORTRAITS_REUSED, amount - len(missing))
+        LOGGER.info(f'Фазовых портретов без изменений: '
+                    f'{amount - len(missing)} из {amount}.')
+
+    if executor is not None and len(missing) > 1:
+        __merge_results(result, missing, executor.map(
+            __plot_phase_portrait_task, repeat(data), missing,
+            repeat(cache), repeat(export), [keys[i] for i in missing]))
+    elif workers > 1 and len(missing) > 1:
+        LOGGER.info(f'Построение фазовых портретов в '
+                    f'{min(workers, len(missing))} процессах.')
+        with ProcessPoolExecutor(
+                max_workers=min(workers, len(missing))) as executor:
+            __merge_results(result, missing, executor.map(
+                __plot_phase_portrait_task, repeat(data), missing,
+                repeat(cache), repeat(export), [keys[i] for i in missing]))
+    else:
+        __merge_results(result, missing, (
+            __plot_phase_portrait_task(data, index, cache, export, keys[index])
+            for index in missing))
+
+    return [figure for figures in result for figure in figures]
+
+
+def __merge_results(
+        result: List[Optional[List[Union[Figure, str]]]],
+        indices: List[int],
+        results: Iterable[Tuple[List[Union[Figure, str]], Dict[str, Any]]]):
+    """
+    Записывает изображения построенных фазовых портретов на их места в
+    списке результатов и добавляет данные замеров их построения к данным
+    текущего процесса
+
+    :param result: Изображения каждого фазового портрета
+    :type result: List[Optional[List[Union[Figure, str]]]]
+    :param indices: Номера построенных фазовых портретов
+    :type indices: List[int]
+    :param results: Изображения и данные замеров каждого построенного
+    фазового портрета
+    :type results: Iterable[Tuple[List[Union[Figure, str]], Dict[str, Any]]]
     """
-    Строит множество фазовых портретов
+    for index, (figures, instrumentation) in zip(indices, results):
+        result[index] = figures
+        get_instrumentation().merge(instrumentation)
+
+
+def __get_portrait_key(data: DataConfiguration, index: int) -> str:
+    """
+    Вычисляет ключ документа фазового портрета по всем данным, от которых
+    зависят его страницы
 
     :param data: Данные для построения фазовых портретов
     :type data: DataConfiguration
-    :return: Список уникальных идентификаторов построенных фазовых портретов
-    :rtype: List[str]
+    :param index: Номер фазового портрета
+    :type index: int
+    :return: Ключ записи кэша
+    :rtype: str
     """
-    f1, f2 = get_functions_for_expressions(data)
-    f3, f4 = get_functions_for_solving(data)
+    value = data.dataset.values[index]
+    plotting = data.plotting
+    return ResultCache.key(
+        'portrait', matplotlib.__version__,
+        data.expressions.initial, data.expressions.variables,
+        data.expressions.parameters_variables,
+        value.name, value.parameters,
+        [[t.point, t.color, t.tend_to_rest] for t in value.trajectories],
+        value.plot_separate_line, value.integrator or data.integrator,
+        data.h_step, data.amount_iterations, data.rtol, data.atol,
+        data.amount_points, data.convergence_tolerance, data.rest_radius,
+        data.rest_search_start, data.rest_search_end,
+        [plotting.show_legend, plotting.show_grid, plotting.max_points,
+         plotting.time_series, plotting.renderer, plotting.vector_field,
+         plotting.nullclines, plotting.field_start, plotting.field_end],
+        [SEPARATE_LINE_REST_RADIUS, SEPARATE_LINE_SHAPE,
+         SEPARATE_LINE_AMOUNT_ITERATIONS, SEPARATE_LINE_H_STEP, FIELD_SHAPE]
+    )
 
-    fig_uuids = []
 
-    for dataobj in data.dataset.values:
-        fig_uuid = __plot_phase_portrait(
-            dataobj, f1, f2, data.amount_iterations,
-            data.h_step, f3, f4, data.plotting
-        )
-        fig_uuids.append(fig_uuid)
+def __plot_phase_portrait_task(data: DataConfiguration, index: int,
+                               cache: Optional[ResultCache] = None,
+                               export: Optional[ResultExport] = None,
+                               key: Optional[str] = None) -> \
+        Tuple[List[Union[Figure, str]], Dict[str, Any]]:
+    """
+    Строит фазовый портрет с заданным номером. Выражения компилируются в
+    вызывающем процессе (один раз на процесс), поэтому функция может
+    выполняться в пуле процессов. Время этапов и счётчики построения
+    собираются отдельно и возвращаются вместе с изображениями. Если задан
+    `key`, изображения сохраняются в кэш документом, и вместо них
+    возвращается путь к нему (если документ удалось сохранить)
 
-    return fig_uuids
+    :param data: Данные для построения фазовых портретов
+    :type data: DataConfiguration
+    :param index: Номер фазового портрета
+    :type index: int
+    :param cache: Кэш результатов вычислений
+    :type cache: Optional[ResultCache]
+    :param export: Выгрузка результатов вычислений
+    :type export: Optional[ResultExport]
+    :param key: Ключ документа фазового портрета в кэше
+    :type key: Optional[str]
+    :return: Построенные изображения (или путь к документу) и данные
+    замеров
+    :rtype: Tuple[List[Union[Figure, str]], Dict[str, Any]]
+    """
+    with collecting() as instrumentation:
+        result = __plot_phase_portrait(
+            data.dataset.values[index], get_system_for_expressions(data),
+            data, cache, export, index
+        )
+        if key is not None:
+            path = cache.store_document(key, result)
+            if path is not None:
+                result = [path]
+    return result, instrumentation.as_dict()
 
 
 def __plot_phase_portrait(
         data: DataObjConfiguration,
-        f1: Callable[[float, float, Dict[str, float]], float],
-        f2: Callable[[float, float, Dict[str, float]], float],
-        amount_iterations: int, h_step: float,
-        f3: Callable[[float, float, Dict[str, float]], float],
-        f4: Callable[[float, float, Dict[str, float]], float],
-        plotting_configuration: PlottingConfiguration) -> str:
+        system: CompiledSystem,
+        configuration: DataConfiguration,
+        cache: Optional[ResultCache] = None,
+        export: Optional[ResultExport] = None,
+        index: int = 0) -> List[Figure]:
     """
-    Строит фазовый портрет
+    Строит фазовый портрет и, если включён `time_series`, графики x(t) и
+    y(t) по тем же фазовым траекториям (без повторного интегрирования)
 
     :param data: Данные для построения фазового портрета
     :type data: DataObjConfiguration
-    :param f1: Функция для расчёта значения первого выражения
-    :type f1: Callable[[float, float, Dict[str, float]], float]
-    :param f2: Функция для расчёта значения второго выражения
-    :type f2: Callable[[float, float, Dict[str, float]], float]
-    :param amount_iterations: Кол-во точек фазовой траектории
-    :type amount_iterations: int
-    :param h_step: Временной шаг
-    :type h_step: float
-    :param f3: Функция для решения первого выражения
-    :type f3: Callable[[float, float, Dict[str, float]], float]
-    :param f4: Функция для решения второго выражения
-    :type f4: Callable[[float, float, Dict[str, float]], float]
-    :param plotting_configuration: Конфигурация построения графиков
-    :type plotting_configuration: PlottingConfiguration
-    :return: Уникальный идентификатор построенного фазового портрета
-    :rtype: str
+    :param system: Система выражений для расчёта фазовых траекторий
+    :type system: CompiledSystem
+    :param configuration: Конфигурационные данные (метод интегрирования,
+    кол-во шагов, конфигурация построения графиков)
+    :type configuration: DataConfiguration
+    :param cache: Кэш результатов вычислений
+    :type cache: Optional[ResultCache]
+    :param export: Выгрузка результатов вычислений
+    :type export: Optional[ResultExport]
+    :param index: Номер фазового портрета (для выгрузки)
+    :type index: int
+    :return: Построенные изображения
+    :rtype: List[Figure]
     """
     LOGGER.info(f'Построение фазового портрета: "{data.name}".')
 
-    rest_points = []
-    for t in data.trajectories:
-        point = Point.try_parse(t.point)
-        trajectory_points = __get_trajectory_points(
-            point, f1, f2, amount_iterations,
-            h_step, **data.parameters)
-        x_values = list(map(lambda _p: _p.x, trajectory_points))
-        y_values = list(map(lambda _p: _p.y, trajectory_points))
-
-        if t.tend_to_rest:
-            point_rest = trajectory_points[-1]
-            flag_new_point = True
-            for p in rest_points:
-                if point_rest.distance(p) < 0.1:
-                    flag_new_point = False
-                    break
-            if flag_new_point:
-                rest_points.append(point_rest)
-                # plt.plot(*point_rest, color='black', marker='.')
-
-        plt.plot(x_values, y_values, color=t.color, label='')
+    figure = Figure(figsize=(21, 10))
+    axes = figure.add_subplot()
+
+    with stage('rest_points'):
+        rest_points = find_rest_points(
+            system, data.parameters,
+            Point.try_parse(configuration.rest_search_start),
+            Point.try_parse(configuration.rest_search_end))
+    LOGGER.info(f'Найдены точки покоя: {rest_points}.')
+    # Траектории приходят только в устойчивые точки покоя, поэтому только
+    # они используются для остановки траекторий и построения разделяющей
+    # кривой
+    rest_points_stable = [p for p in rest_points if p.stable]
+
+    with stage('integration'):
+        trajectories = __get_trajectories(
+            data, system, configuration, rest_points_stable, cache)
+    time_end = configuration.amount_iterations * configuration.h_step
+    for t, trajectory in zip(data.trajectories, trajectories):
+        # Адаптивные методы выполняют произвольное кол-во шагов, поэтому
+        # для них досрочная остановка определяется по времени
+        if trajectory.has_times and len(trajectory):
+            stopped = trajectory.times[-1] < time_end * (1 - 1e-9)
+        else:
+            stopped = trajectory.steps < configuration.amount_iterations
+        if t.tend_to_rest and stopped:
+            LOGGER.info(f'Траектория из точки {t.point} остановлена после '
+                        f'{trajectory.steps} шагов.')
+
+    with stage('rendering'):
+        plot_trajectories(
+            axes, [trajectory.points for trajectory in trajectories],
+            [t.color for t in data.trajectories],
+            configuration.plotting.renderer)
 
     LOGGER.info('Построены траектории фазового портрета.')
 
+    if configuration.plotting.vector_field or \
+            configuration.plotting.nullclines:
+        with stage('field'):
+            __plot_field(axes, data, system, configuration, trajectories)
+        LOGGER.info('Построены поле направлений и нуль-изоклины.')
+
+    basins = None
     if data.plot_separate_line:
         LOGGER.info('Построение разделяющей кривой.')
-        __plot_separate_line(data, f1, f2, rest_points, Point(0, 1), Point(1, 8))
+        basins = __plot_separate_line(
+            axes, data, system, rest_points_stable, Point(0, 1), Point(1, 8),
+            configuration.rest_radius or SEPARATE_LINE_REST_RADIUS, cache)
         LOGGER.info('Построена разделяющая кривая.')
 
-    solves_x = solve(lambda x: f3(x, 0, **data.parameters), (0, 1))
-    solves_y = list(map(lambda x: f4(x, 0, **data.parameters), solves_x))
-    LOGGER.info(f'Найдены решения: {list(zip(solves_x, solves_y))}.')
-    for (_x, _y) in zip(solves_x, solves_y):
-        plt.plot(_x, _y, color='black', marker='.')
+    for p in rest_points:
+        axes.plot(p.x, p.y, color='black', marker='.')
 
-    plt.title(data.name)
-    if plotting_configuration.show_grid:
-        plt.grid()
-    if plotting_configuration.show_legend:
-        plt.legend()
+    axes.set_title(data.name)
+    if configuration.plotting.show_grid:
+        axes.grid()
+    if configuration.plotting.show_legend:
+        axes.legend()
 
-    _uuid = str(uuid.uuid4())
-    if not os.path.exists('figures'):
-        LOGGER.warning(f'Не найдена директория: "./figures/"!')
-        os.mkdir('figures')
-        LOGGER.info(f'Создана директория: "./figures/"!')
-    _path = os.path.join('figures', f'{_uuid}.png')
-    plt.gcf().set_size_inches(21, 10)
-    plt.savefig(_path, dpi=100)
-    plt.clf()
+    result = [figure]
+    LOGGER.info(f'Построен фазовый портрет: "{data.name}".')
 
-    LOGGER.info(f'Фазовый портрет сохранён: {_path}.')
+    if export is not None:
+        with stage('export'):
+            export.store_portrait(
+                index, data, configuration,
+                data.integrator or configuration.integrator, trajectories,
+                rest_points, basins)
 
-    return _uuid
+    if configuration.plotting.time_series:
+        with stage('rendering'):
+            result.append(
+                __plot_time_series(data, trajectories, configuration))
+        LOGGER.info(f'Построены графики x(t), y(t): "{data.name}".')
 
+    return result
 
-def __plot_separate_line(
-        data: DataObjConfiguration,
-        f1: Callable[[float, float, Dict[str, float]], float],
-        f2: Callable[[float, float, Dict[str, float]], float],
-        rest_points: List[Point], point_start: Point, point_end: Point):
+
+def __plot_field(axes: Axes, data: DataObjConfiguration,
+                 system: CompiledSystem, configuration: DataConfiguration,
+                 trajectories: List[Trajectory]):
+    """
+    Рисует поле направлений и (или) нуль-изоклины выражений. Выражения
+    вычисляются во всех узлах сетки `FIELD_SHAPE` одним векторизованным
+    вызовом. Часть плоскости задаётся `field_start` и `field_end`, по
+    умолчанию - область траекторий или, если траекторий нет, часть
+    плоскости, в которой ищутся точки покоя
+
+    :param axes: Оси
+    :type axes: Axes
+    :param data: Данные для построения фазового портрета
+    :type data: DataObjConfiguration
+    :param system: Система выражений
+    :type system: CompiledSystem
+    :param configuration: Конфигурационные данные
+    :type configuration: DataConfiguration
+    :param trajectories: Фазовые траектории портрета
+    :type trajectories: List[Trajectory]
+    """
+    plotting = configuration.plotting
+    extent = get_extent([trajectory.points for trajectory in trajectories])
+    if extent is None:
+        point_start = Point.try_parse(configuration.rest_search_start)
+        point_end = Point.try_parse(configuration.rest_search_end)
+    else:
+        point_start = Point(extent[0], extent[2])
+        point_end = Point(extent[1], extent[3])
+    # Точки проверены при чтении файла с данными
+    if plotting.field_start is not None:
+        point_start = Point.try_parse(plotting.field_start)
+    if plotting.field_end is not None:
+        point_end = Point.try_parse(plotting.field_end)
+
+    xs, ys = get_grid(point_start, point_end, FIELD_SHAPE)
+    u, v = evaluate_field(system.vectorized(data.parameters), xs, ys)
+
+    if plotting.vector_field:
+        plot_vector_field(axes, xs, ys, u, v, plotting.vector_field)
+    if plotting.nullclines:
+        plot_nullclines(
+            axes, [get_nullclines(xs, ys, u), get_nullclines(xs, ys, v)],
+            [f"{name}' = 0" for name in system.variables])
+
+
+def __plot_time_series(data: DataObjConfiguration,
+                       trajectories: List[Trajectory],
+                       configuration: DataConfiguration) -> Figure:
     """
-    Строит кривую, разделяющую плоскость на две части
+    Строит графики зависимостей переменных от времени x(t) и y(t) для
+    вычисленных фазовых траекторий
 
     :param data: Данные для построения фазового портрета
     :type data: DataObjConfiguration
-    :param f1: Функция для расчёта значения первого выражения
-    :type f1: Callable[[float, float, Dict[str, float]], float]
-    :param f2: Функция для расчёта значения второго выражения
-    :type f2: Callable[[float, float, Dict[str, float]], float]
-    :param rest_points: Список точек покоя
-    :type rest_points: List[Point]
-    :param point_start: Левая нижняя точка части плоскости, на которой будет
-    строиться разделяющая кривая
-    :type point_start: Point
-    :param point_end: Правая верхняя точка части плоскости, на которой будет
-    строиться разделяющая кривая
-    :type point_end: Point
+    :param trajectories: Фазовые траектории
+    :type trajectories: List[Trajectory]
+    :param configuration: Конфигурационные данные
+    :type configuration: DataConfiguration
+    :return: Изображение
+    :rtype: Figure
     """
-    if len(rest_points) != 2:
-        raise ValueError(
-            'Программа не умеет разделять фазовые портреты не на две части!'
-        )
-    rest_points.sort(key=lambda _p: _p.y)
-
-    point_start, point_end = \
-        Point(
-            min(point_start.x, point_end.x),
-            min(point_start.y, point_end.y)
-        ), \
-        Point(
-            max(point_start.x, point_end.x),
-            max(point_start.y, point_end.y)
-        )
+    figure = Figure(figsize=(21, 10))
+    axes_x, axes_y = figure.subplots(2, 1, sharex=True)
 
-    len_x = 1500
-    len_y = 1000
-
-    points_step_x = (point_end.x - point_start.x) / len_x
-    points_step_y = (point_end.y - point_start.y) / len_y
-
-    points_array = [[
-        [Point(
-            point_start.x + points_step_x * j,
-            point_start.y + points_step_y * i
-        ), 0]
-        for j in range(
-            0, int((point_end.x - point_start.x) / points_step_x) + 1)]
-        for i in range(
-            0, int((point_end.y - point_start.y) / points_step_y) + 1)
-    ]
+    for t, trajectory in zip(data.trajectories, trajectories):
+        times = trajectory.times
+        plot_series(axes_x, times, trajectory.x, t.color,
+                    configuration.plotting.renderer)
+        plot_series(axes_y, times, trajectory.y, t.color,
+                    configuration.plotting.renderer)
 
-    line = []
-    prev_i = 0
-    for j in range(len_x):
-        start, end = (0, len_y) if j == 0 else \
-            (max(0, prev_i - 20), min(len_y, prev_i + 20))
-        for i in range(start, end):
-            point_current = points_array[i][j][0]
-            try:
-                last_point = __get_trajectory_last_point(
-                    point_current, f1, f2, 500, 0.0002, **data.parameters
-                )
-
-                if last_point.distance(rest_points[0]) <= \
-                        last_point.distance(rest_points[1]):
-                    points_array[i][j][1] = 1
-                else:
-                    points_array[i][j][1] = -1
-            except OverflowError:
-                pass
-
-            if i != 0 and points_array[i - 1][j][1] + points_array[i][j][1] == 0:
-                prev_i = i
-                line.append(
-                    Point(points_array[i][j][0].x,
-                          (points_array[i - 1][j][0].y +
-                           points_array[i][j][0].y) / 2)
-                )
-                break
-
-    line_x = list(map(lambda _p: _p.x, line))
-    line_y = list(map(lambda _p: _p.y, line))
-
-    plt.plot(line_x, line_y, color='green', linestyle='--')
-
-
-def __get_trajectory_points(
-        point: Point,
-        f1: Callable[[float, float, Dict[str, float]], float],
-        f2: Callable[[float, float, Dict[str, float]], float],
-        amount_iterations: int, h_step: float,
-        **params: Dict[str, float]) -> List[Point]:
-    """
-    Вычисляет точки фазовой траектории по методу Рунге-Кутты 4ого порядка
-
-    :param point: Начальная точка фазовой траектории
-    :type point: Point
-    :param f1: Функция для расчёта значения первого выражения
-    :type f1: Callable[[float, float, Dict[str, float]], float]
-    :param f2: Функция для расчёта значения второго выражения
-    :type f2: Callable[[float, float, Dict[str, float]], float]
-    :param amount_iterations: Кол-во точек фазовой траектории
-    :type amount_iterations: int
-    :param h_step: Временной шаг
-    :type h_step: float
-    :param params: Параметры
-    :type params: Dict[str, float]
-    :return: Список точек фазовой траектории
-    :rtype: List[Point]
+    variable_x, variable_y = configuration.expressions.variables
+    axes_x.set_title(f'{data.name}: {variable_x}(t), {variable_y}(t)')
+    axes_x.set_ylabel(variable_x)
+    axes_y.set_ylabel(variable_y)
+    axes_y.set_xlabel('t')
+    if configuration.plotting.show_grid:
+        axes_x.grid()
+        axes_y.grid()
+
+    return figure
+
+
+def plot_sweeps(data: DataConfiguration) -> List[Figure]:
     """
-    result = [point]
+    Строит диаграммы изменения корней уравнения `simplified` при изменении
+    параметров: для одного параметра - бифуркационную диаграмму с ветвями,
+    найденными продолжением по параметру, и кол-во корней, для двух
+    параметров - карту кол-ва корней
 
-    for i in range(amount_iterations):
-        point = __get_next_point(point, f1, f2, h_step, **params)
-        result.append(point)
+    :param data: Конфигурационные данные
+    :type data: DataConfiguration
+    :return: Список построенных диаграмм
+    :rtype: List[Figure]
+    """
+    system = get_system_for_solving(data)
+    result = []
+    for sweep in data.sweeps or []:
+        LOGGER.info(f'Построение диаграммы: "{sweep.name}".')
+        ranges = {name: numpy.linspace(start, end, int(amount))
+                  for name, (start, end, amount) in sweep.ranges.items()}
+        if not 1 <= len(ranges) <= 2:
+            raise ValueError(f'Диаграмма "{sweep.name}" должна задавать '
+                             f'один или два изменяемых параметра!')
+
+        with stage('sweeps'):
+            counts, roots = sweep_roots(
+                system, sweep.parameters, ranges, tuple(sweep.domain_range),
+                sweep.amount_points)
+        LOGGER.info(f'Найдены корни для {counts.size} значений параметров.')
+
+        if len(ranges) == 1:
+            figure = __plot_bifurcation_diagram(
+                system, sweep, *ranges.items(), counts, roots)
+        else:
+            figure = __plot_roots_count_map(sweep, ranges, counts)
+
+        LOGGER.info(f'Построена диаграмма: "{sweep.name}".')
+        result.append(figure)
 
     return result
 
 
-def __get_trajectory_last_point(
-        point: Point,
-        f1: Callable[[float, float, Dict[str, float]], float],
-        f2: Callable[[float, float, Dict[str, float]], float],
-        amount_iterations: int, h_step: float,
-        **params: Dict[str, float]) -> Point:
+def __plot_bifurcation_diagram(
+        system: CompiledSystem, sweep: SweepConfiguration,
+        parameter: Tuple[str, numpy.ndarray], counts: numpy.ndarray,
+        roots: numpy.ndarray) -> Figure:
     """
-    Вычисляет последнюю точку фазовой траектории по методу Рунге-Кутты 4ого порядка
-
-    :param point: Начальная точка фазовой траектории
-    :type point: Point
-    :param f1: Функция для расчёта значения первого выражения
-    :type f1: Callable[[float, float, Dict[str, float]], float]
-    :param f2: Функция для расчёта значения второго выражения
-    :type f2: Callable[[float, float, Dict[str, float]], float]
-    :param amount_iterations: Кол-во точек фазовой траектории
-    :type amount_iterations: int
-    :param h_step: Временной шаг
-    :type h_step: float
-    :param params: Параметры
-    :type params: Dict[str, float]
-    :return: Последняя точка фазовой траектории
-    :rtype: Point
+    Строит бифуркационную диаграмму по одному параметру. Ветви, на которых
+    производная выражения по переменной отрицательна, рисуются сплошной
+    линией, остальные - пунктиром, точки поворота отмечаются красным
+
+    :param system: Система уравнений
+    :type system: CompiledSystem
+    :param sweep: Конфигурация диаграммы
+    :type sweep: SweepConfiguration
+    :param parameter: Имя и значения изменяемого параметра
+    :type parameter: Tuple[str, numpy.ndarray]
+    :param counts: Кол-ва корней
+    :type counts: numpy.ndarray
+    :param roots: Корни
+    :type roots: numpy.ndarray
+    :return: Диаграмма
+    :rtype: Figure
     """
-    for i in range(amount_iterations):
-        point = __get_next_point(point, f1, f2, h_step, **params)
-    return point
-
-
-def __get_next_point(
-        point: Point,
-        f1: Callable[[float, float, Dict[str, float]], float],
-        f2: Callable[[float, float, Dict[str, float]], float],
-        h_step: float, **params: Dict[str, float]) -> Point:
+    name, values = parameter
+    figure = Figure(figsize=(21, 10))
+    axes_roots, axes_counts = figure.subplots(
+        2, 1, sharex=True, gridspec_kw={'height_ratios': (3, 1)})
+
+    starts = [(values[0], x) for x in roots[0] if numpy.isfinite(x)] + \
+        [(values[-1], x) for x in roots[-1] if numpy.isfinite(x)]
+    branches = continue_roots(
+        system, sweep.parameters, name, (values[0], values[-1]), starts,
+        tuple(sweep.domain_range))
+    for branch in branches:
+        negative = branch.derivatives < 0
+        axes_roots.plot(branch.parameters,
+                        numpy.where(negative, branch.values, numpy.nan),
+                        color='blue', linestyle='-')
+        axes_roots.plot(branch.parameters,
+                        numpy.where(negative, numpy.nan, branch.values),
+                        color='blue', linestyle='--')
+        for fold in branch.folds:
+            LOGGER.info(f'Найдена точка поворота: {name} = {fold[0]}.')
+            axes_roots.plot(*fold, color='red', marker='o')
+
+    axes_roots.plot(numpy.repeat(values, roots.shape[-1]), roots.ravel(),
+                    color='black', marker='.', markersize=1, linestyle='')
+    axes_roots.set_ylabel(system.variables[0])
+    axes_roots.set_title(sweep.name)
+    axes_roots.grid()
+
+    axes_counts.step(values, counts, where='mid', color='black')
+    axes_counts.set_xlabel(name)
+    axes_counts.set_ylabel('Кол-во корней')
+    axes_counts.grid()
+
+    return figure
+
+
+def __plot_roots_count_map(sweep: SweepConfiguration,
+                           ranges: Dict[str, numpy.ndarray],
+                           counts: numpy.ndarray) -> Figure:
     """
-    Возвращает следующую точку по м.Рунге-Кутты 4-ого порядка для фазовой
-    траектории
-
-    :param point: Текущая точка фазовой траектории
-    :type point: Point
-    :param f1: Функция для расчёта значения первого выражения
-    :type f1: Callable[[float, float, Dict[str, float]], float]
-    :param f2: Функция для расчёта значения второго выражения
-    :type f2: Callable[[float, float, Dict[str, float]], float]
-    :param h_step: Временной шаг
-    :type h_step: float
-    :param params: Параметры
-    :type params: Dict[str, float]
-    :return: Следующая точка фазовой траектории
+    Строит карту кол-ва корней по двум параметрам. Первый параметр
+    откладывается по вертикали, второй - по горизонтали
+
+    :param sweep: Конфигурация диаграммы
+    :type sweep: SweepConfiguration
+    :param ranges: Значения изменяемых параметров
+    :type ranges: Dict[str, numpy.ndarray]
+    :param counts: Кол-ва корней
+    :type counts: numpy.ndarray
+    :return: Диаграмма
+    :rtype: Figure
     """
-    x, y = point
+    (name_y, values_y), (name_x, values_x) = ranges.items()
+    figure = Figure(figsize=(21, 10))
+    axes = figure.add_subplot()
+
+    # Карта выводится в документ изображением, а не отдельной векторной
+    # фигурой на каждую ячейку
+    mesh = axes.pcolormesh(values_x, values_y, counts, shading='nearest',
+                           cmap='viridis', rasterized=True)
+    figure.colorbar(mesh, ax=axes, label='Кол-во корней',
+                    ticks=range(int(counts.max(initial=0)) + 1))
+    axes.set_xlabel(name_x)
+    axes.set_ylabel(name_y)
+    axes.set_title(sweep.name)
+
+    return figure
+
+
+def __get_trajectories(
+        data: DataObjConfiguration, system: CompiledSystem,
+        configuration: DataConfiguration, rest_points: List[Point],
+        cache: Optional[ResultCache] = None) -> List[Trajectory]:
+    """
+    Вычисляет фазовые траектории фазового портрета. Траектории, найденные в
+    кэше, не вычисляются, а вычисленные траектории сохраняются в кэш
 
-    k1 = h_step * f1(x, y, **params)
-    l1 = h_step * f2(x, y, **params)
+    :param data: Данные для построения фазового портрета
+    :type data: DataObjConfiguration
+    :param system: Система выражений для расчёта фазовых траекторий
+    :type system: CompiledSystem
+    :param configuration: Конфигурационные данные
+    :type configuration: DataConfiguration
+    :param rest_points: Известные точки покоя
+    :type rest_points: List[Point]
+    :param cache: Кэш результатов вычислений
+    :type cache: Optional[ResultCache]
+    :return: Список фазовых траекторий
+    :rtype: List[Trajectory]
+    """
+    points = Point.parse_all([t.point for t in data.trajectories])
+    stoppable = [t.tend_to_rest for t in data.trajectories]
+    integrator = data.integrator or configuration.integrator
+
+    if cache is None:
+        return integrate(points, system, data.parameters, configuration,
+                         integrator, rest_points, stoppable,
+                         configuration.plotting.max_points)
+
+    keys = [
+        cache.key(
+            'trajectory', system.expressions, system.variables,
+            system.parameters_variables, data.parameters, point,
+            configuration.h_step, configuration.amount_iterations,
+            integrator, configuration.rtol, configuration.atol,
+            configuration.amount_points, configuration.plotting.max_points,
+            # Критерии остановки влияют только на останавливаемые траектории
+            [configuration.convergence_tolerance, configuration.rest_radius,
+             rest_points] if stop else None
+        )
+        for point, stop in zip(points, stoppable)
+    ]
+    result = [cache.load_trajectory(key) for key in keys]
+
+    missing = [i for i, trajectory in enumerate(result) if trajectory is None]
+    LOGGER.info(f'Траекторий найдено в кэше: {len(result) - len(missing)} '
+                f'из {len(result)}.')
+    if missing:
+        computed = integrate(
+            [points[i] for i in missing], system, data.parameters,
+            configuration, integrator, rest_points,
+            [stoppable[i] for i in missing],
+            configuration.plotting.max_points)
+        for i, trajectory in zip(missing, computed):
+            cache.store_trajectory(keys[i], trajectory)
+            result[i] = trajectory
 
-    k2 = h_step * f1(x + k1 / 2, y + l1 / 2, **params)
-    l2 = h_step * f2(x + k1 / 2, y + l1 / 2, **params)
+    return result
 
-    k3 = h_step * f1(x + k2 / 2, y + l2 / 2, **params)
-    l3 = h_step * f2(x + k2 / 2, y + l2 / 2, **params)
 
-    k4 = h_step * f1(x + k3, y + l3, **params)
-    l4 = h_step * f2(x + k3, y + l3, **params)
+def __plot_separate_line(
+        axes: Axes, data: DataObjConfiguration, system: CompiledSystem,
+        rest_points: List[Point], point_start: Point, point_end: Point,
+        rest_radius: float, cache: Optional[ResultCache] = None) -> Optional[
+            Basins]:
+    """
+    Строит кривые, разделяющие плоскость на области притяжения точек покоя
 
-    return Point(
-        x + 1 / 6 * (k1 + 2 * k2 + 2 * k3 + k4),
-        y + 1 / 6 * (l1 + 2 * l2 + 2 * l3 + l4)
-    )
+    :param axes: Оси, на которых строятся кривые
+    :type axes: Axes
+    :param data: Данные для построения фазового портрета
+    :type data: DataObjConfiguration
+    :param system: Система выражений для расчёта фазовых траекторий
+    :type system: CompiledSystem
+    :param rest_points: Список точек покоя
+    :type rest_points: List[Point]
+    :param point_start: Левая нижняя точка части плоскости, на которой будет
+    строиться разделяющая кривая
+    :type point_start: Point
+    :param point_end: Правая верхняя точка части плоскости, на которой будет
+    строиться разделяющая кривая
+    :type point_end: Point
+    :param rest_radius: Радиус окрестности точек покоя, попав в которую
+    траектория считается пришедшей в точку покоя
+    :type rest_radius: float
+    :param cache: Кэш результатов вычислений
+    :type cache: Optional[ResultCache]
+    :return: Области притяжения и разделяющие кривые или None, если
+    устойчивых точек покоя меньше двух
+    :rtype: Optional[Basins]
+    """
+    if len(rest_points) < 2:
+        LOGGER.warning(
+            f'Найдено устойчивых точек покоя: {len(rest_points)}, '
+            f'разделяющая кривая не будет построена!')
+        return None
+
+    key = labels = None
+    if cache is not None:
+        key = cache.key(
+            'basins', system.expressions, system.variables,
+            system.parameters_variables, data.parameters, rest_points,
+            point_start, point_end, SEPARATE_LINE_SHAPE,
+            SEPARATE_LINE_AMOUNT_ITERATIONS, SEPARATE_LINE_H_STEP,
+            rest_radius)
+        labels = cache.load(key)
+
+    if labels is None:
+        with stage('basins'):
+            _, _, labels = classify_basins(
+                system.vectorized(data.parameters), rest_points,
+                point_start, point_end, SEPARATE_LINE_SHAPE,
+                SEPARATE_LINE_AMOUNT_ITERATIONS, SEPARATE_LINE_H_STEP,
+                convergence=Convergence(rest_points=rest_points,
+                                        radius=rest_radius))
+        if cache is not None:
+            cache.store(key, labels.astype(numpy.int16))
+    else:
+        LOGGER.info('Области притяжения найдены в кэше.')
+
+    with stage('separatrix'):
+        xs, ys = get_grid(point_start, point_end, SEPARATE_LINE_SHAPE)
+        lines = get_separate_lines(xs, ys, labels, len(rest_points))
+    for line in lines:
+        axes.plot(line[:, 0], line[:, 1], color='green', linestyle='--')
+
+    return Basins(point_start, point_end, labels, rest_points, lines)
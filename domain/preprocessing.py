@@ -0,0 +1,592 @@
+from typing import Callable, Dict, List, Sequence, Set, Tuple
+import ast
+import copy
+
+
+# Узлы, которые могут быть вынесены в общие подвыражения
+COMPOUND_NODES = (ast.BinOp, ast.UnaryOp, ast.Call)
+
+
+class Program:
+    """
+    Система выражений после предварительной обработки - последовательность
+    присваиваний и результаты:
+
+    * `constants` - подвыражения, зависящие только от параметров и
+      констант; вычисляются один раз при подстановке значений параметров;
+    * `temporaries` - подвыражения, встречающиеся в выражениях несколько
+      раз; вычисляются один раз при каждом вычислении системы (в порядке
+      списка);
+    * `results` - выражения системы, записанные через имена `constants` и
+      `temporaries`.
+
+    Все выражения хранятся строками на языке Python
+    """
+
+    __slots__ = ('constants', 'temporaries', 'results')
+
+    def __init__(self, constants: List[Tuple[str, str]],
+                 temporaries: List[Tuple[str, str]], results: List[str]):
+        """
+        Конструктор класса
+
+        :param constants: Имена и выражения подвыражений от параметров
+        :param temporaries: Имена и выражения общих подвыражений
+        :param results: Выражения системы
+        """
+        self.constants = constants
+        self.temporaries = temporaries
+        self.results = results
+
+    def get_source(self, name: str, parameters: Sequence[str],
+                   variables: Sequence[str], shape: Tuple[int, ...]) -> str:
+        """
+        Возвращает исходный код функции `name(*parameters)`, которая
+        вычисляет `constants` и возвращает функцию `(*variables)`,
+        вычисляющую `temporaries` и `results`. Результаты возвращаются
+        кортежем формы `shape` (например, (2,) для системы или (2, 2) для
+        матрицы Якоби)
+
+        :param name: Имя функции
+        :type name: str
+        :param parameters: Имена параметров
+        :type parameters: Sequence[str]
+        :param variables: Имена переменных
+        :type variables: Sequence[str]
+        :param shape: Форма результата
+        :type shape: Tuple[int, ...]
+        :return: Исходный код
+        :rtype: str
+        """
+        lines = [f'def {name}({", ".join(parameters)}):']
+        lines += [f'    {c} = {e}' for c, e in self.constants]
+        lines.append(f'    def {name}_inner({", ".join(variables)}):')
+        lines += [f'        {t} = {e}' for t, e in self.temporaries]
+        lines.append(f'        return {self.__get_tuple(shape)}')
+        lines.append(f'    return {name}_inner')
+        return '\n'.join(lines)
+
+    def __get_tuple(self, shape: Tuple[int, ...]) -> str:
+        """
+        Возвращает кортеж результатов формы `shape` строкой кода
+
+        :param shape: Форма результата
+        :type shape: Tuple[int, ...]
+        :return: Строка кода
+        :rtype: str
+        """
+        items = [f'({r})' for r in self.results]
+        for size in reversed(shape):
+            items = [f'({", ".join(items[i:i + size])},)'
+                     for i in range(0, len(items), size)]
+        return items[0]
+
+
+def preprocess(expressions: Sequence[str], variables: Sequence[str],
+               parameters: Sequence[str]) -> Program:
+    """
+    Совместно обрабатывает выражения системы:
+
+    * `e ** u` заменяется на `exp(u)` (если `e` и `exp` не являются
+      именами переменных или параметров);
+    * подвыражения, не зависящие от переменных (например, `S / D`),
+      выносятся в `constants`;
+    * подвыражения, встречающиеся несколько раз (в том числе в разных
+      выражениях), выносятся в `temporaries`, начиная с самых крупных.
+
+    Выражения должны быть предварительно проверены (см.
+    `domain.compiling`)
+
+    :param expressions: Строки выражений
+    :type expressions: Sequence[str]
+    :param variables: Имена переменных
+    :type variables: Sequence[str]
+    :param parameters: Имена параметров
+    :type parameters: Sequence[str]
+    :return: Обработанная система
+    :rtype: Program
+    """
+    names = set(variables) | set(parameters)
+    trees = [ast.parse(e, mode='eval').body for e in expressions]
+    if 'e' not in names and 'exp' not in names:
+        trees = [__replace_exp(tree) for tree in trees]
+
+    used = names | {node.id for tree in trees for node in ast.walk(tree)
+                    if isinstance(node, ast.Name)}
+    dependent = set(variables)
+
+    constants = []
+    known = {}
+
+    def hoist(node: ast.AST) -> ast.AST:
+        # Подвыражения из одних чисел (например, `-1`) не выносятся
+        if isinstance(node, COMPOUND_NODES) and \
+                not __depends(node, dependent) and \
+                any(isinstance(n, ast.Name) for n in ast.walk(node)):
+            key = ast.dump(node)
+            if key not in known:
+                known[key] = __get_name('_c', used)
+                constants.append((known[key], node))
+            return ast.Name(id=known[key], ctx=ast.Load())
+        for field, value in ast.iter_fields(node):
+            if isinstance(value, ast.AST):
+                setattr(node, field, hoist(value))
+            elif isinstance(value, list):
+                setattr(node, field, [hoist(v) if isinstance(v, ast.AST)
+                                      else v for v in value])
+        return node
+
+    trees = [hoist(tree) for tree in trees]
+
+    temporaries = []
+    while True:
+        counts, nodes = {}, {}
+        roots = trees + [body for _, body in temporaries]
+        for i, root in enumerate(roots):
+            for node in ast.walk(root):
+                # Тело общего подвыражения не может быть заменено им самим
+                if node is root and i >= len(trees):
+                    continue
+                if isinstance(node, COMPOUND_NODES):
+                    key = ast.dump(node)
+                    counts[key] = counts.get(key, 0) + 1
+                    nodes[key] = node
+        repeated = [key for key, amount in counts.items() if amount > 1]
+        if not repeated:
+            break
+
+        key = max(repeated, key=lambda k: sum(1 for _ in ast.walk(nodes[k])))
+        name = __get_name('_t', used)
+        body = copy.deepcopy(nodes[key])
+        trees = [__substitute(tree, key, name) for tree in trees]
+        temporaries = [(t, __substitute(e, key, name))
+                       for t, e in temporaries]
+        temporaries.append((name, body))
+        dependent.add(name)
+
+    return Program(
+        [(name, ast.unparse(body)) for name, body in constants],
+        [(name, ast.unparse(body))
+         for name, body in __sort_temporaries(temporaries)],
+        [ast.unparse(tree) for tree in trees])
+
+
+def differentiate(expression: str, variable: str,
+                  names: Sequence[str] = ()) -> str:
+    """
+    Находит производную выражения по переменной символьно, по синтаксическому
+    дереву. Поддерживаются арифметические операции, степени и функции
+    `exp`, `log` (в том числе с основанием), `log10`, `log2`, `log1p`,
+    `expm1`, `sqrt`, тригонометрические и гиперболические функции и обратные
+    к ним, `abs`, `fabs`, `pow`, `atan2`, `hypot`
+
+    :param expression: Строка выражения
+    :type expression: str
+    :param variable: Имя переменной
+    :type variable: str
+    :param names: Имена переменных и параметров (чтобы отличить их от
+    констант `e` и `pi`)
+    :type names: Sequence[str]
+    :return: Строка производной
+    :rtype: str
+    :raises ValueError: Если выражение содержит операции, производная
+    которых не поддерживается
+    """
+    tree = ast.parse(expression, mode='eval').body
+    return ast.unparse(__derivative(tree, variable, set(names)))
+
+
+def __replace_exp(node: ast.AST) -> ast.AST:
+    """
+    Заменяет степени `e ** u` на `exp(u)`
+
+    :param node: Узел дерева
+    :type node: ast.AST
+    :return: Узел дерева
+    :rtype: ast.AST
+    """
+    for field, value in ast.iter_fields(node):
+        if isinstance(value, ast.AST):
+            setattr(node, field, __replace_exp(value))
+        elif isinstance(value, list):
+            setattr(node, field, [__replace_exp(v) if isinstance(v, ast.AST)
+                                  else v for v in value])
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow) and \
+            isinstance(node.left, ast.Name) and node.left.id == 'e':
+        return ast.Call(func=ast.Name(id='exp', ctx=ast.Load()),
+                        args=[node.right], keywords=[])
+    return node
+
+
+def __depends(node: ast.AST, names: Set[str]) -> bool:
+    """
+    Возвращает True, если подвыражение содержит одно из имён `names`
+
+    :param node: Узел дерева
+    :type node: ast.AST
+    :param names: Имена
+    :type names: Set[str]
+    :return: Содержит ли подвыражение одно из имён
+    :rtype: bool
+    """
+    return any(isinstance(n, ast.Name) and n.id in names
+               for n in ast.walk(node))
+
+
+def __get_name(prefix: str, used: Set[str]) -> str:
+    """
+    Возвращает новое имя с префиксом `prefix`, не входящее в `used`, и
+    добавляет его в `used`
+
+    :param prefix: Префикс имени
+    :type prefix: str
+    :param used: Занятые имена
+    :type used: Set[str]
+    :return: Имя
+    :rtype: str
+    """
+    index = 0
+    while f'{prefix}{index}' in used:
+        index += 1
+    used.add(f'{prefix}{index}')
+    return f'{prefix}{index}'
+
+
+def __substitute(node: ast.AST, key: str, name: str) -> ast.AST:
+    """
+    Заменяет подвыражения, совпадающие с `key` (результатом `ast.dump`), на
+    имя `name`
+
+    :param node: Узел дерева
+    :type node: ast.AST
+    :param key: Подвыражение
+    :type key: str
+    :param name: Имя
+    :type name: str
+    :return: Узел дерева
+    :rtype: ast.AST
+    """
+    if isinstance(node, COMPOUND_NODES) and ast.dump(node) == key:
+        return ast.Name(id=name, ctx=ast.Load())
+    for field, value in ast.iter_fields(node):
+        if isinstance(value, ast.AST):
+            setattr(node, field, __substitute(value, key, name))
+        elif isinstance(value, list):
+            setattr(node, field, [__substitute(v, key, name)
+                                  if isinstance(v, ast.AST) else v
+                                  for v in value])
+    return node
+
+
+def __sort_temporaries(temporaries: List[Tuple[str, ast.AST]]) -> List[
+        Tuple[str, ast.AST]]:
+    """
+    Упорядочивает общие подвыражения так, чтобы каждое вычислялось после
+    тех, через которые оно записано
+
+    :param temporaries: Имена и тела общих подвыражений
+    :type temporaries: List[Tuple[str, ast.AST]]
+    :return: Упорядоченные имена и тела
+    :rtype: List[Tuple[str, ast.AST]]
+    """
+    pending = list(temporaries)
+    names = {name for name, _ in temporaries}
+    result, defined = [], set()
+    while pending:
+        for item in pending:
+            required = {n.id for n in ast.walk(item[1])
+                        if isinstance(n, ast.Name)} & names
+            if required <= defined:
+                result.append(item)
+                defined.add(item[0])
+                pending.remove(item)
+                break
+    return result
+
+
+def __derivative(node: ast.AST, variable: str, names: Set[str]) -> ast.AST:
+    """
+    Возвращает дерево производной подвыражения по переменной
+
+    :param node: Узел дерева
+    :type node: ast.AST
+    :param variable: Имя переменной
+    :type variable: str
+    :param names: Имена переменных и параметров
+    :type names: Set[str]
+    :return: Дерево производной
+    :rtype: ast.AST
+    :raises ValueError: Если производная не поддерживается
+    """
+    if not __depends(node, {variable}):
+        return ast.Constant(0)
+    if isinstance(node, ast.Name):
+        return ast.Constant(1)
+
+    if isinstance(node, ast.UnaryOp):
+        d = __derivative(node.operand, variable, names)
+        return _neg(d) if isinstance(node.op, ast.USub) else d
+
+    if isinstance(node, ast.BinOp):
+        u, v = node.left, node.right
+        du = __derivative(u, variable, names)
+        dv = __derivative(v, variable, names)
+        if isinstance(node.op, ast.Add):
+            return _add(du, dv)
+        if isinstance(node.op, ast.Sub):
+            return _sub(du, dv)
+        if isinstance(node.op, ast.Mult):
+            return _add(_mul(du, v), _mul(u, dv))
+        if isinstance(node.op, ast.Div):
+            if _is_constant(dv, 0):
+                return _div(du, v)
+            return _div(_sub(_mul(du, v), _mul(u, dv)), _pow(v, 2))
+        if isinstance(node.op, ast.Pow):
+            return __derivative_pow(u, v, du, dv, names)
+        raise ValueError(f'Производная операции `{type(node.op).__name__}` '
+                         f'не поддерживается!')
+
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and \
+            not node.keywords:
+        name, args = node.func.id, node.args
+        if name in ('pow',) and len(args) == 2:
+            return __derivative_pow(
+                args[0], args[1], __derivative(args[0], variable, names),
+                __derivative(args[1], variable, names), names)
+        if name == 'log' and len(args) == 2:
+            return __derivative(
+                ast.BinOp(left=_call('log', args[0]), op=ast.Div(),
+                          right=_call('log', args[1])), variable, names)
+        if name == 'atan2' and len(args) == 2:
+            u, v = args
+            du = __derivative(u, variable, names)
+            dv = __derivative(v, variable, names)
+            return _div(_sub(_mul(v, du), _mul(u, dv)),
+                        _add(_pow(u, 2), _pow(v, 2)))
+        if name == 'hypot' and len(args) == 2:
+            u, v = args
+            du = __derivative(u, variable, names)
+            dv = __derivative(v, variable, names)
+            return _div(_add(_mul(u, du), _mul(v, dv)), node)
+        if len(args) == 1 and name in DERIVATIVES:
+            u = args[0]
+            return _mul(DERIVATIVES[name](u, node),
+                        __derivative(u, variable, names))
+
+    raise ValueError(f'Производная выражения `{ast.unparse(node)}` не '
+                     f'поддерживается!')
+
+
+def __derivative_pow(u: ast.AST, v: ast.AST, du: ast.AST, dv: ast.AST,
+                     names: Set[str]) -> ast.AST:
+    """
+    Возвращает дерево производной степени `u ** v`
+
+    :param u: Основание
+    :type u: ast.AST
+    :param v: Показатель
+    :type v: ast.AST
+    :param du: Производная основания
+    :type du: ast.AST
+    :param dv: Производная показателя
+    :type dv: ast.AST
+    :param names: Имена переменных и параметров
+    :type names: Set[str]
+    :return: Дерево производной
+    :rtype: ast.AST
+    """
+    power = ast.BinOp(left=u, op=ast.Pow(), right=v)
+    if _is_constant(dv, 0):
+        return _mul(_mul(v, _pow(u, _sub(v, ast.Constant(1)))), du)
+    if isinstance(u, ast.Name) and u.id == 'e' and 'e' not in names:
+        return _mul(power, dv)
+    if _is_constant(du, 0):
+        return _mul(_mul(power, _call('log', u)), dv)
+    return _mul(power, _add(_mul(dv, _call('log', u)),
+                            _div(_mul(v, du), u)))
+
+
+def _call(name: str, *args: ast.AST) -> ast.AST:
+    """
+    Возвращает вызов функции `name`
+
+    :param name: Имя функции
+    :type name: str
+    :return: Узел дерева
+    :rtype: ast.AST
+    """
+    return ast.Call(func=ast.Name(id=name, ctx=ast.Load()), args=list(args),
+                    keywords=[])
+
+
+def _is_constant(node: ast.AST, value: float) -> bool:
+    """
+    Возвращает True, если узел - число `value`
+
+    :param node: Узел дерева
+    :type node: ast.AST
+    :param value: Число
+    :type value: float
+    :return: Является ли узел числом `value`
+    :rtype: bool
+    """
+    return _is_number(node) and node.value == value
+
+
+def _is_number(node: ast.AST) -> bool:
+    """
+    Возвращает True, если узел - число
+
+    :param node: Узел дерева
+    :type node: ast.AST
+    :return: Является ли узел числом
+    :rtype: bool
+    """
+    return isinstance(node, ast.Constant) and \
+        isinstance(node.value, (int, float)) and \
+        not isinstance(node.value, bool)
+
+
+def _add(a: ast.AST, b: ast.AST) -> ast.AST:
+    """
+    Возвращает сумму `a + b`, упрощённую при нулевых слагаемых
+
+    :param a: Слагаемое
+    :param b: Слагаемое
+    :return: Узел дерева
+    :rtype: ast.AST
+    """
+    if _is_constant(a, 0):
+        return b
+    if _is_constant(b, 0):
+        return a
+    if _is_number(a) and _is_number(b):
+        return ast.Constant(a.value + b.value)
+    return ast.BinOp(left=a, op=ast.Add(), right=b)
+
+
+def _sub(a: ast.AST, b: ast.AST) -> ast.AST:
+    """
+    Возвращает разность `a - b`, упрощённую при нулевых операндах
+
+    :param a: Уменьшаемое
+    :param b: Вычитаемое
+    :return: Узел дерева
+    :rtype: ast.AST
+    """
+    if _is_constant(b, 0):
+        return a
+    if _is_constant(a, 0):
+        return _neg(b)
+    if _is_number(a) and _is_number(b):
+        return ast.Constant(a.value - b.value)
+    return ast.BinOp(left=a, op=ast.Sub(), right=b)
+
+
+def _neg(a: ast.AST) -> ast.AST:
+    """
+    Возвращает `-a`
+
+    :param a: Операнд
+    :return: Узел дерева
+    :rtype: ast.AST
+    """
+    if _is_number(a):
+        return ast.Constant(-a.value)
+    if isinstance(a, ast.UnaryOp) and isinstance(a.op, ast.USub):
+        return a.operand
+    return ast.UnaryOp(op=ast.USub(), operand=a)
+
+
+def _mul(a: ast.AST, b: ast.AST) -> ast.AST:
+    """
+    Возвращает произведение `a * b`, упрощённое при множителях 0 и 1
+
+    :param a: Множитель
+    :param b: Множитель
+    :return: Узел дерева
+    :rtype: ast.AST
+    """
+    if _is_constant(a, 0) or _is_constant(b, 0):
+        return ast.Constant(0)
+    if _is_constant(a, 1):
+        return b
+    if _is_constant(b, 1):
+        return a
+    if _is_number(a) and _is_number(b):
+        return ast.Constant(a.value * b.value)
+    if _is_constant(a, -1):
+        return _neg(b)
+    if _is_constant(b, -1):
+        return _neg(a)
+    return ast.BinOp(left=a, op=ast.Mult(), right=b)
+
+
+def _div(a: ast.AST, b: ast.AST) -> ast.AST:
+    """
+    Возвращает частное `a / b`, упрощённое при нулевом делимом и единичном
+    делителе
+
+    :param a: Делимое
+    :param b: Делитель
+    :return: Узел дерева
+    :rtype: ast.AST
+    """
+    if _is_constant(a, 0):
+        return ast.Constant(0)
+    if _is_constant(b, 1):
+        return a
+    return ast.BinOp(left=a, op=ast.Div(), right=b)
+
+
+def _pow(a: ast.AST, b) -> ast.AST:
+    """
+    Возвращает степень `a ** b`, упрощённую при показателях 0 и 1
+
+    :param a: Основание
+    :param b: Показатель (узел дерева или число)
+    :return: Узел дерева
+    :rtype: ast.AST
+    """
+    if not isinstance(b, ast.AST):
+        b = ast.Constant(b)
+    if _is_constant(b, 0):
+        return ast.Constant(1)
+    if _is_constant(b, 1):
+        return a
+    return ast.BinOp(left=a, op=ast.Pow(), right=b)
+
+
+# Производные функций одного аргумента: по аргументу `u` и самому вызову
+# `f` возвращают f'(u)
+DERIVATIVES: Dict[str, Callable[[ast.AST, ast.AST], ast.AST]] = {
+    'exp': lambda u, f: f,
+    'expm1': lambda u, f: _call('exp', u),
+    'log': lambda u, f: _div(ast.Constant(1), u),
+    'log10': lambda u, f: _div(ast.Constant(1),
+                               _mul(u, _call('log', ast.Constant(10)))),
+    'log2': lambda u, f: _div(ast.Constant(1),
+                              _mul(u, _call('log', ast.Constant(2)))),
+    'log1p': lambda u, f: _div(ast.Constant(1), _add(ast.Constant(1), u)),
+    'sqrt': lambda u, f: _div(ast.Constant(1), _mul(ast.Constant(2), f)),
+    'sin': lambda u, f: _call('cos', u),
+    'cos': lambda u, f: _neg(_call('sin', u)),
+    'tan': lambda u, f: _div(ast.Constant(1), _pow(_call('cos', u), 2)),
+    'asin': lambda u, f: _div(ast.Constant(1), _call(
+        'sqrt', _sub(ast.Constant(1), _pow(u, 2)))),
+    'acos': lambda u, f: _neg(_div(ast.Constant(1), _call(
+        'sqrt', _sub(ast.Constant(1), _pow(u, 2))))),
+    'atan': lambda u, f: _div(ast.Constant(1),
+                              _add(ast.Constant(1), _pow(u, 2))),
+    'sinh': lambda u, f: _call('cosh', u),
+    'cosh': lambda u, f: _call('sinh', u),
+    'tanh': lambda u, f: _div(ast.Constant(1), _pow(_call('cosh', u), 2)),
+    'asinh': lambda u, f: _div(ast.Constant(1), _call(
+        'sqrt', _add(_pow(u, 2), ast.Constant(1)))),
+    'acosh': lambda u, f: _div(ast.Constant(1), _call(
+        'sqrt', _sub(_pow(u, 2), ast.Constant(1)))),
+    'atanh': lambda u, f: _div(ast.Constant(1),
+                               _sub(ast.Constant(1), _pow(u, 2))),
+    'abs': lambda u, f: _call('copysign', ast.Constant(1), u),
+    'fabs': lambda u, f: _call('copysign', ast.Constant(1), u),
+}
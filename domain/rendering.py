@@ -0,0 +1,416 @@
+from typing import List, Optional, Sequence, Tuple
+import math
+
+import numpy
+from matplotlib.axes import Axes
+from matplotlib.colors import to_rgba
+
+
+# Траектории передаются в `matplotlib` целиком
+RENDERER_LINES = 'lines'
+# Из каждой последовательности точек, попадающих в один пиксель, остаются
+# только первая и последняя
+RENDERER_PIXELS = 'pixels'
+# Траектории упрощаются алгоритмом Дугласа-Пекера с допуском в полпикселя
+RENDERER_DOUGLAS_PEUCKER = 'douglas_peucker'
+# Траектории рисуются сразу в массив пикселей, который выводится как
+# изображение
+RENDERER_RASTER = 'raster'
+
+RENDERERS = (RENDERER_LINES, RENDERER_PIXELS, RENDERER_DOUGLAS_PEUCKER,
+             RENDERER_RASTER)
+
+# Поле направлений рисуется стрелками одинаковой длины
+FIELD_QUIVER = 'quiver'
+# Поле направлений рисуется линиями тока
+FIELD_STREAMPLOT = 'streamplot'
+
+FIELDS = (FIELD_QUIVER, FIELD_STREAMPLOT)
+
+# Кол-во стрелок поля направлений по каждой оси
+QUIVER_AMOUNT = 25
+# Плотность линий тока (см. `matplotlib.axes.Axes.streamplot`)
+STREAMPLOT_DENSITY = 1.5
+# Цвет поля направлений
+FIELD_COLOR = '0.6'
+# Цвета нуль-изоклин выражений
+NULLCLINE_COLORS = ('tab:green', 'tab:purple')
+
+# Доля размаха данных, добавляемая к границам осей (как в `matplotlib`)
+MARGIN = 0.05
+# Толщина линий при рисовании в массив пикселей (в пикселях)
+RASTER_LINE_WIDTH = 2
+
+
+def plot_trajectories(axes: Axes, trajectories: Sequence[numpy.ndarray],
+                      colors: Sequence[str], renderer: str = RENDERER_LINES):
+    """
+    Рисует фазовые траектории на осях выбранным способом. Все способы,
+    кроме `RENDERER_LINES`, дают изображение, отличающееся от полного на
+    величину порядка пикселя, а время их работы не зависит от кол-ва точек
+    траекторий в той мере, в какой от него зависит `matplotlib`
+
+    :param axes: Оси
+    :type axes: Axes
+    :param trajectories: Массивы точек траекторий формы (n, 2)
+    :type trajectories: Sequence[numpy.ndarray]
+    :param colors: Цвета траекторий
+    :type colors: Sequence[str]
+    :param renderer: Способ рисования
+    :type renderer: str
+    """
+    if renderer not in RENDERERS:
+        raise ValueError(f'Неизвестный способ рисования: "{renderer}"!')
+
+    if renderer == RENDERER_LINES:
+        for points, color in zip(trajectories, colors):
+            axes.plot(points[:, 0], points[:, 1], color=color, label='')
+        return
+
+    extent = get_extent(trajectories)
+    if extent is None:
+        return
+    width, height = get_axes_size(axes)
+
+    if renderer == RENDERER_RASTER:
+        image = numpy.zeros((height, width, 4), dtype=numpy.float32)
+        for points, color in zip(trajectories, colors):
+            rasterize(image, points, extent, to_rgba(color))
+        axes.imshow(image, extent=extent, origin='lower', aspect='auto',
+                    interpolation='nearest')
+        return
+
+    pixel = ((extent[1] - extent[0]) / width,
+             (extent[3] - extent[2]) / height)
+    for points, color in zip(trajectories, colors):
+        points = points[decimate_to_pixels(points, extent[::2], pixel)]
+        if renderer == RENDERER_DOUGLAS_PEUCKER:
+            points = points[douglas_peucker(points, pixel)]
+        axes.plot(points[:, 0], points[:, 1], color=color, label='')
+
+
+def plot_vector_field(axes: Axes, xs: numpy.ndarray, ys: numpy.ndarray,
+                      u: numpy.ndarray, v: numpy.ndarray,
+                      kind: str = FIELD_QUIVER):
+    """
+    Рисует поле направлений системы под траекториями. При `FIELD_QUIVER`
+    на сетке из `QUIVER_AMOUNT` узлов по каждой оси рисуются стрелки
+    одинаковой длины (направление без величины), при `FIELD_STREAMPLOT` -
+    линии тока. Узлы, в которых значения не конечны, пропускаются
+
+    :param axes: Оси
+    :type axes: Axes
+    :param xs: Узлы сетки по оси X (с постоянным шагом)
+    :type xs: numpy.ndarray
+    :param ys: Узлы сетки по оси Y (с постоянным шагом)
+    :type ys: numpy.ndarray
+    :param u: Значения первого выражения формы (len(ys), len(xs))
+    :type u: numpy.ndarray
+    :param v: Значения второго выражения формы (len(ys), len(xs))
+    :type v: numpy.ndarray
+    :param kind: Способ рисования
+    :type kind: str
+    """
+    if kind not in FIELDS:
+        raise ValueError(f'Неизвестный способ рисования поля направлений: '
+                         f'"{kind}"!')
+
+    if kind == FIELD_STREAMPLOT:
+        axes.streamplot(xs, ys, numpy.ma.masked_invalid(u),
+                        numpy.ma.masked_invalid(v),
+                        density=STREAMPLOT_DENSITY, color=FIELD_COLOR,
+                        linewidth=0.6, arrowsize=0.8, zorder=0)
+        return
+
+    step_x = max(1, math.ceil(len(xs) / QUIVER_AMOUNT))
+    step_y = max(1, math.ceil(len(ys) / QUIVER_AMOUNT))
+    xs, ys = xs[::step_x], ys[::step_y]
+    u, v = u[::step_y, ::step_x], v[::step_y, ::step_x]
+    cell_x = (xs[-1] - xs[0]) / max(1, len(xs) - 1) or 1.0
+    cell_y = (ys[-1] - ys[0]) / max(1, len(ys) - 1) or 1.0
+
+    # Направление нормируется в долях ячейки сетки, чтобы стрелки
+    # не зависели от масштаба осей и не перекрывались
+    with numpy.errstate(all='ignore'):
+        u, v = u / cell_x, v / cell_y
+        length = numpy.hypot(u, v)
+        u, v = u / length * 0.8 * cell_x, v / length * 0.8 * cell_y
+    x, y = numpy.meshgrid(xs, ys)
+    visible = numpy.isfinite(u) & numpy.isfinite(v)
+    axes.quiver(x[visible], y[visible], u[visible], v[visible],
+                angles='xy', scale_units='xy', scale=1, color=FIELD_COLOR,
+                width=0.0015, zorder=0)
+
+
+def plot_nullclines(axes: Axes, nullclines: Sequence[List[numpy.ndarray]],
+                    labels: Sequence[str]):
+    """
+    Рисует нуль-изоклины выражений пунктиром, каждое выражение своим
+    цветом из `NULLCLINE_COLORS`
+
+    :param axes: Оси
+    :type axes: Axes
+    :param nullclines: Кривые каждого выражения
+    :type nullclines: Sequence[List[numpy.ndarray]]
+    :param labels: Подписи кривых каждого выражения для легенды
+    :type labels: Sequence[str]
+    """
+    for i, (lines, label) in enumerate(zip(nullclines, labels)):
+        color = NULLCLINE_COLORS[i % len(NULLCLINE_COLORS)]
+        for j, line in enumerate(lines):
+            axes.plot(line[:, 0], line[:, 1], color=color, linestyle='--',
+                      linewidth=1, label=label if j == 0 else '')
+
+
+def plot_series(axes: Axes, times: numpy.ndarray, values: numpy.ndarray,
+                color: str, renderer: str = RENDERER_LINES):
+    """
+    Рисует график зависимости от времени. При любом способе, кроме
+    `RENDERER_LINES`, в каждом столбце пикселей остаются только первая,
+    последняя, минимальная и максимальная точки
+
+    :param axes: Оси
+    :type axes: Axes
+    :param times: Моменты времени (по возрастанию)
+    :type times: numpy.ndarray
+    :param values: Значения
+    :type values: numpy.ndarray
+    :param color: Цвет графика
+    :type color: str
+    :param renderer: Способ рисования
+    :type renderer: str
+    """
+    if renderer != RENDERER_LINES and len(times) > 1:
+        indexes = decimate_to_columns(times, values, get_axes_size(axes)[0])
+        times, values = times[indexes], values[indexes]
+    axes.plot(times, values, color=color)
+
+
+def get_axes_size(axes: Axes) -> Tuple[int, int]:
+    """
+    Возвращает размер области осей в пикселях
+
+    :param axes: Оси
+    :type axes: Axes
+    :return: Ширина и высота
+    :rtype: Tuple[int, int]
+    """
+    bbox = axes.get_position()
+    width, height = axes.figure.get_size_inches() * axes.figure.dpi
+    return max(1, math.ceil(bbox.width * width)), \
+        max(1, math.ceil(bbox.height * height))
+
+
+def get_extent(trajectories: Sequence[numpy.ndarray],
+               margin: float = MARGIN) -> Optional[
+                   Tuple[float, float, float, float]]:
+    """
+    Возвращает границы области, занимаемой конечными точками траекторий, с
+    полями как у `matplotlib`
+
+    :param trajectories: Массивы точек траекторий формы (n, 2)
+    :type trajectories: Sequence[numpy.ndarray]
+    :param margin: Доля размаха, добавляемая к границам
+    :type margin: float
+    :return: Границы (x_min, x_max, y_min, y_max) или None, если конечных
+    точек нет
+    :rtype: Optional[Tuple[float, float, float, float]]
+    """
+    bounds = []
+    for points in trajectories:
+        x, y = points[:, 0], points[:, 1]
+        finite = numpy.isfinite(x) & numpy.isfinite(y)
+        if not finite.all():
+            x, y = x[finite], y[finite]
+        if len(x):
+            bounds.append(((x.min(), y.min()), (x.max(), y.max())))
+    if not bounds:
+        return None
+
+    low = numpy.min([b[0] for b in bounds], axis=0)
+    high = numpy.max([b[1] for b in bounds], axis=0)
+    size = numpy.where(high > low, high - low, 1.0)
+    low, high = low - margin * size, high + margin * size
+    return float(low[0]), float(high[0]), float(low[1]), float(high[1])
+
+
+def decimate_to_pixels(points: numpy.ndarray, origin: Tuple[float, float],
+                       pixel: Tuple[float, float]) -> numpy.ndarray:
+    """
+    Возвращает номера точек, которые нужно нарисовать: из каждой
+    последовательности соседних точек, попадающих в один пиксель, остаются
+    первая и последняя. Неконечные точки сохраняются, чтобы разрывы линии
+    остались на месте
+
+    :param points: Массив точек формы (n, 2)
+    :type points: numpy.ndarray
+    :param origin: Координаты левого нижнего угла области
+    :type origin: Tuple[float, float]
+    :param pixel: Размеры пикселя
+    :type pixel: Tuple[float, float]
+    :return: Номера точек
+    :rtype: numpy.ndarray
+    """
+    if len(points) <= 2:
+        return numpy.arange(len(points))
+
+    with numpy.errstate(invalid='ignore'):
+        columns = numpy.floor((points[:, 0] - origin[0]) / pixel[0])
+        rows = numpy.floor((points[:, 1] - origin[1]) / pixel[1])
+    finite = numpy.isfinite(columns) & numpy.isfinite(rows)
+
+    # Неконечные точки не равны соседним, поэтому всегда сохраняются
+    change = (columns[1:] != columns[:-1]) | (rows[1:] != rows[:-1])
+    keep = ~finite
+    keep[0] = keep[-1] = True
+    keep[1:] |= change
+    keep[:-1] |= change
+    return numpy.nonzero(keep)[0]
+
+
+def douglas_peucker(points: numpy.ndarray,
+                    pixel: Tuple[float, float],
+                    tolerance: float = 0.5) -> numpy.ndarray:
+    """
+    Возвращает номера точек ломаной, упрощённой алгоритмом Дугласа-Пекера:
+    отклонение упрощённой ломаной от исходной не превышает `tolerance`
+    пикселей. Участки между неконечными точками упрощаются отдельно
+
+    :param points: Массив точек формы (n, 2)
+    :type points: numpy.ndarray
+    :param pixel: Размеры пикселя
+    :type pixel: Tuple[float, float]
+    :param tolerance: Допустимое отклонение (в пикселях)
+    :type tolerance: float
+    :return: Номера точек
+    :rtype: numpy.ndarray
+    """
+    scaled = points / pixel
+    finite = numpy.isfinite(scaled).all(axis=1)
+    keep = ~finite
+
+    # Границы участков из конечных точек
+    edges = numpy.diff(numpy.concatenate(([0], finite.astype(int), [0])))
+    stack = list(zip(numpy.nonzero(edges == 1)[0].tolist(),
+                     (numpy.nonzero(edges == -1)[0] - 1).tolist()))
+    for start, end in stack:
+        keep[start] = keep[end] = True
+
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        inner = scaled[start + 1:end]
+        direction = scaled[end] - scaled[start]
+        length = math.hypot(*direction)
+        if length == 0:
+            distances = numpy.hypot(*(inner - scaled[start]).T)
+        else:
+            distances = numpy.abs(
+                direction[0] * (inner[:, 1] - scaled[start, 1]) -
+                direction[1] * (inner[:, 0] - scaled[start, 0])) / length
+        index = int(numpy.argmax(distances))
+        if distances[index] > tolerance:
+            middle = start + 1 + index
+            keep[middle] = True
+            stack.append((start, middle))
+            stack.append((middle, end))
+
+    return numpy.nonzero(keep)[0]
+
+
+def decimate_to_columns(times: numpy.ndarray, values: numpy.ndarray,
+                        width: int) -> numpy.ndarray:
+    """
+    Возвращает номера точек графика, которые нужно нарисовать: в каждом из
+    `width` столбцов по времени остаются первая, последняя, минимальная и
+    максимальная точки (алгоритм M4). Неконечные значения сохраняются
+
+    :param times: Моменты времени (по возрастанию)
+    :type times: numpy.ndarray
+    :param values: Значения
+    :type values: numpy.ndarray
+    :param width: Кол-во столбцов
+    :type width: int
+    :return: Номера точек
+    :rtype: numpy.ndarray
+    """
+    span = times[-1] - times[0]
+    if span <= 0 or len(times) <= 4 * width:
+        return numpy.arange(len(times))
+
+    columns = numpy.minimum(
+        ((times - times[0]) / span * width).astype(int), width - 1)
+    finite = numpy.isfinite(values)
+    indexes = numpy.nonzero(finite)[0]
+    columns_finite = columns[indexes]
+
+    starts = numpy.nonzero(numpy.diff(columns_finite, prepend=-1))[0]
+    ends = numpy.append(starts[1:], len(indexes)) - 1
+    order = indexes[numpy.lexsort((values[indexes], columns_finite))]
+
+    result = [indexes[starts], indexes[ends], order[starts], order[ends],
+              numpy.nonzero(~finite)[0]]
+    return numpy.unique(numpy.concatenate(result))
+
+
+def rasterize(image: numpy.ndarray, points: numpy.ndarray,
+              extent: Tuple[float, float, float, float],
+              color: Tuple[float, float, float, float],
+              line_width: int = RASTER_LINE_WIDTH):
+    """
+    Рисует ломаную в массив пикселей: каждый отрезок заменяется точками с
+    шагом не больше пикселя. Нижняя строка массива соответствует нижней
+    границе области
+
+    :param image: Массив пикселей формы (высота, ширина, 4), изменяется на
+    месте
+    :type image: numpy.ndarray
+    :param points: Массив точек формы (n, 2)
+    :type points: numpy.ndarray
+    :param extent: Границы области (x_min, x_max, y_min, y_max)
+    :type extent: Tuple[float, float, float, float]
+    :param color: Цвет RGBA
+    :type color: Tuple[float, float, float, float]
+    :param line_width: Толщина линии (в пикселях)
+    :type line_width: int
+    """
+    height, width = image.shape[:2]
+    size = ((extent[1] - extent[0]) / width, (extent[3] - extent[2]) / height)
+    points = points[decimate_to_pixels(points, extent[::2], size)]
+    u = (points[:, 0] - extent[0]) / size[0] - 0.5
+    v = (points[:, 1] - extent[2]) / size[1] - 0.5
+
+    # Отрезки с неконечными концами не рисуются, длинные отрезки
+    # ограничиваются размером изображения
+    valid = numpy.isfinite(u[:-1]) & numpy.isfinite(v[:-1]) & \
+        numpy.isfinite(u[1:]) & numpy.isfinite(v[1:])
+    u_start, v_start = u[:-1][valid], v[:-1][valid]
+    du, dv = u[1:][valid] - u_start, v[1:][valid] - v_start
+    amounts = numpy.clip(numpy.ceil(numpy.maximum(
+        numpy.abs(du), numpy.abs(dv))), 1, width + height).astype(int)
+
+    segments = numpy.repeat(numpy.arange(len(amounts)), amounts)
+    offsets = numpy.arange(len(segments)) - numpy.repeat(
+        numpy.cumsum(amounts) - amounts, amounts)
+    fractions = offsets / amounts[segments]
+    columns = numpy.rint(u_start[segments] + du[segments] * fractions)
+    rows = numpy.rint(v_start[segments] + dv[segments] * fractions)
+    if len(u) and numpy.isfinite(u[-1]) and numpy.isfinite(v[-1]):
+        columns = numpy.append(columns, numpy.rint(u[-1]))
+        rows = numpy.append(rows, numpy.rint(v[-1]))
+
+    inside = (rows >= 0) & (rows < height) & (columns >= 0) & \
+        (columns < width)
+    mask = numpy.zeros((height, width), dtype=bool)
+    mask[rows[inside].astype(int), columns[inside].astype(int)] = True
+
+    # Утолщение линии: пиксель закрашивается, если закрашен соседний снизу
+    # или слева на расстоянии меньше `line_width`
+    covered = mask.copy()
+    for shift in range(1, line_width):
+        covered[shift:] |= mask[:-shift]
+    mask = covered.copy()
+    for shift in range(1, line_width):
+        covered[:, shift:] |= mask[:, :-shift]
+    image[covered] = color
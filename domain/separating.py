@@ -0,0 +1,271 @@
+from typing import Callable, List, Optional, Tuple
+import numpy
+import contourpy
+
+from domain.classes.point import Point
+from domain.integrating import rk4_last_batch, Convergence
+from domain.instrumenting import COUNTER_BASIN_CELLS, \
+    COUNTER_BASIN_CELLS_INTEGRATED, COUNTER_FUNCTION_EVALUATIONS, \
+    COUNTER_INTEGRATION_STEPS, COUNTER_OVERFLOWS, count
+
+
+# Метка ячейки, траектория из которой ушла на бесконечность
+LABEL_DIVERGED = -1
+# Метка ячейки, которая ещё не была классифицирована
+LABEL_UNKNOWN = -2
+
+
+def classify_basins(
+        function: Callable[[numpy.ndarray, numpy.ndarray],
+                           Tuple[numpy.ndarray, numpy.ndarray]],
+        rest_points: List[Point], point_start: Point, point_end: Point,
+        shape: Tuple[int, int] = (1001, 1501),
+        amount_iterations: int = 500, h_step: float = 0.0002,
+        coarse_step: int = 10, slab_size: int = 16384,
+        convergence: Optional[Convergence] = None) -> Tuple[
+            numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """
+    Разбивает прямоугольную часть плоскости на области притяжения точек
+    покоя. Каждая ячейка сетки получает номер ближайшей к концу её
+    траектории точки покоя.
+
+    Сначала классифицируются углы блоков грубой сетки с шагом
+    `coarse_step` и середины их сторон, затем траектории считаются для всех
+    ячеек блоков, углы которых принадлежат разным областям, и соседних с
+    ними блоков. Уточнение распространяется на каждый блок, на границе
+    которого найдена ячейка с меткой, отличной от меток в его углах, пока
+    такие блоки не закончатся; поэтому разделяющая кривая, проходящая
+    между углами блоков, не теряется. Блоки, траектории из углов которых
+    уходят на бесконечность, считаются целиком. Остальные блоки
+    заполняются значением в углах. При `coarse_step = 1` считается вся сетка.
+
+    :param function: Функция для расчёта значений обоих выражений над
+    массивами
+    :type function: Callable[[numpy.ndarray, numpy.ndarray],
+    Tuple[numpy.ndarray, numpy.ndarray]]
+    :param rest_points: Список точек покоя
+    :type rest_points: List[Point]
+    :param point_start: Левая нижняя точка части плоскости
+    :type point_start: Point
+    :param point_end: Правая верхняя точка части плоскости
+    :type point_end: Point
+    :param shape: Кол-во узлов сетки по вертикали и горизонтали
+    :type shape: Tuple[int, int]
+    :param amount_iterations: Кол-во шагов метода для каждой ячейки
+    :type amount_iterations: int
+    :param h_step: Временной шаг
+    :type h_step: float
+    :param coarse_step: Шаг грубой сетки (в ячейках)
+    :type coarse_step: int
+    :param slab_size: Кол-во ячеек, интегрируемых одновременно
+    :type slab_size: int
+    :param convergence: Критерии досрочной остановки траекторий
+    :type convergence: Optional[Convergence]
+    :return: Узлы сетки по оси X, узлы сетки по оси Y и массив меток формы
+    `shape`
+    :rtype: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+    """
+    rest = numpy.array([tuple(p) for p in rest_points], dtype=float)
+    len_y, len_x = shape
+
+    xs, ys = get_grid(point_start, point_end, shape)
+    labels = numpy.full(shape, LABEL_UNKNOWN, dtype=int)
+
+    coarse_i = numpy.unique(numpy.append(
+        numpy.arange(0, len_y, coarse_step), len_y - 1))
+    coarse_j = numpy.unique(numpy.append(
+        numpy.arange(0, len_x, coarse_step), len_x - 1))
+    if coarse_step <= 1 or len(coarse_i) < 2 or len(coarse_j) < 2:
+        cells_i, cells_j = numpy.nonzero(labels == LABEL_UNKNOWN)
+        __classify_cells(labels, cells_i, cells_j, xs, ys, rest, function,
+                         amount_iterations, h_step, slab_size, convergence)
+        count(COUNTER_BASIN_CELLS, labels.size)
+        return xs, ys, labels
+
+    # Углы блоков и середины их сторон
+    middle_i = (coarse_i[:-1] + coarse_i[1:]) // 2
+    middle_j = (coarse_j[:-1] + coarse_j[1:]) // 2
+    nodes = numpy.zeros(shape, dtype=bool)
+    nodes[numpy.ix_(coarse_i, coarse_j)] = True
+    nodes[numpy.ix_(coarse_i, middle_j)] = True
+    nodes[numpy.ix_(middle_i, coarse_j)] = True
+    cells_i, cells_j = numpy.nonzero(nodes)
+    __classify_cells(labels, cells_i, cells_j, xs, ys, rest, function,
+                     amount_iterations, h_step, slab_size, convergence)
+
+    corners = labels[numpy.ix_(coarse_i, coarse_j)]
+    values = corners[:-1, :-1]
+    # Траектории, уходящие на бесконечность, чередуются с сошедшимися
+    # отдельными ячейками, поэтому такие блоки не считаются однородными
+    uniform = \
+        (values == corners[1:, :-1]) & (values == corners[:-1, 1:]) & \
+        (values == corners[1:, 1:]) & (values != LABEL_DIVERGED)
+    # Уточняются неоднородные блоки и их соседи
+    refined = __dilate(~uniform)
+
+    # Номера блоков, которым принадлежит узел сетки (узлы на границах
+    # блоков принадлежат двум блокам по каждой оси)
+    blocks_i = [numpy.clip(numpy.searchsorted(coarse_i, numpy.arange(len_y),
+                                              side=side) - 1,
+                           0, len(coarse_i) - 2)
+                for side in ('left', 'right')]
+    blocks_j = [numpy.clip(numpy.searchsorted(coarse_j, numpy.arange(len_x),
+                                              side=side) - 1,
+                           0, len(coarse_j) - 2)
+                for side in ('left', 'right')]
+
+    while True:
+        # Блок, на границе которого есть узел с меткой, отличной от меток
+        # в его углах, также уточняется: так уточнение следует за
+        # разделяющей кривой от блока к блоку
+        known = labels != LABEL_UNKNOWN
+        for block_i in blocks_i:
+            for block_j in blocks_j:
+                index = numpy.ix_(block_i, block_j)
+                differs = known & ~refined[index] & \
+                    (labels != values[index])
+                cells_i, cells_j = numpy.nonzero(differs)
+                refined[block_i[cells_i], block_j[cells_j]] = True
+
+        cells_i, cells_j = numpy.nonzero(
+            ~known & refined[numpy.ix_(blocks_i[1], blocks_j[1])])
+        if not len(cells_i):
+            break
+        __classify_cells(labels, cells_i, cells_j, xs, ys, rest, function,
+                         amount_iterations, h_step, slab_size, convergence)
+
+    unknown = labels == LABEL_UNKNOWN
+    labels[unknown] = values[numpy.ix_(blocks_i[1], blocks_j[1])][unknown]
+
+    count(COUNTER_BASIN_CELLS, labels.size)
+    return xs, ys, labels
+
+
+def get_grid(point_start: Point, point_end: Point,
+             shape: Tuple[int, int]) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Возвращает узлы сетки, покрывающей прямоугольную часть плоскости
+
+    :param point_start: Левая нижняя точка части плоскости
+    :type point_start: Point
+    :param point_end: Правая верхняя точка части плоскости
+    :type point_end: Point
+    :param shape: Кол-во узлов сетки по вертикали и горизонтали
+    :type shape: Tuple[int, int]
+    :return: Узлы сетки по оси X и по оси Y
+    :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+    """
+    len_y, len_x = shape
+    xs = numpy.linspace(min(point_start.x, point_end.x),
+                        max(point_start.x, point_end.x), len_x)
+    ys = numpy.linspace(min(point_start.y, point_end.y),
+                        max(point_start.y, point_end.y), len_y)
+    return xs, ys
+
+
+def get_separate_lines(xs: numpy.ndarray, ys: numpy.ndarray,
+                       labels: numpy.ndarray, amount_rest_points: int,
+                       min_points: int = 10) -> List[numpy.ndarray]:
+    """
+    Выделяет кривые, разделяющие области притяжения, методом marching
+    squares. Ячейки, траектории которых ушли на бесконечность, не участвуют
+    в построении кривых. Кривые, состоящие менее чем из `min_points` точек
+    (вокруг отдельных ячеек-выбросов), отбрасываются
+
+    :param xs: Узлы сетки по оси X
+    :type xs: numpy.ndarray
+    :param ys: Узлы сетки по оси Y
+    :type ys: numpy.ndarray
+    :param labels: Массив меток
+    :type labels: numpy.ndarray
+    :param amount_rest_points: Кол-во точек покоя
+    :type amount_rest_points: int
+    :param min_points: Минимальное кол-во точек кривой
+    :type min_points: int
+    :return: Список кривых, каждая из которых - массив точек формы (n, 2)
+    :rtype: List[numpy.ndarray]
+    """
+    mask = labels < 0
+    result = []
+    # Граница между областями `i` и `j` (i < j) выделяется только по области
+    # `i`, поэтому последнюю область отдельно рассматривать не нужно
+    for label in range(amount_rest_points - 1):
+        indicator = numpy.ma.array((labels == label).astype(float), mask=mask)
+        generator = contourpy.contour_generator(xs, ys, indicator)
+        result.extend(line for line in generator.lines(0.5)
+                      if len(line) >= min_points)
+    return result
+
+
+def __dilate(mask: numpy.ndarray) -> numpy.ndarray:
+    """
+    Расширяет отмеченную область массива на одну ячейку во все стороны
+    (включая диагональные)
+
+    :param mask: Массив отметок
+    :type mask: numpy.ndarray
+    :return: Расширенный массив отметок
+    :rtype: numpy.ndarray
+    """
+    padded = numpy.pad(mask, 1)
+    result = numpy.zeros_like(mask)
+    for di in range(3):
+        for dj in range(3):
+            result |= padded[di:di + mask.shape[0], dj:dj + mask.shape[1]]
+    return result
+
+
+def __classify_cells(
+        labels: numpy.ndarray, cells_i: numpy.ndarray, cells_j: numpy.ndarray,
+        xs: numpy.ndarray, ys: numpy.ndarray, rest: numpy.ndarray,
+        function: Callable[[numpy.ndarray, numpy.ndarray],
+                           Tuple[numpy.ndarray, numpy.ndarray]],
+        amount_iterations: int, h_step: float, slab_size: int,
+        convergence: Optional[Convergence]):
+    """
+    Классифицирует заданные ячейки сетки, интегрируя их порциями по
+    `slab_size` ячеек
+
+    :param labels: Массив меток, заполняемый на месте
+    :type labels: numpy.ndarray
+    :param cells_i: Номера строк ячеек
+    :type cells_i: numpy.ndarray
+    :param cells_j: Номера столбцов ячеек
+    :type cells_j: numpy.ndarray
+    :param xs: Узлы сетки по оси X
+    :type xs: numpy.ndarray
+    :param ys: Узлы сетки по оси Y
+    :type ys: numpy.ndarray
+    :param rest: Массив точек покоя формы (k, 2)
+    :type rest: numpy.ndarray
+    :param function: Функция для расчёта значений обоих выражений над
+    массивами
+    :type function: Callable[[numpy.ndarray, numpy.ndarray],
+    Tuple[numpy.ndarray, numpy.ndarray]]
+    :param amount_iterations: Кол-во шагов метода для каждой ячейки
+    :type amount_iterations: int
+    :param h_step: Временной шаг
+    :type h_step: float
+    :param slab_size: Кол-во ячеек, интегрируемых одновременно
+    :type slab_size: int
+    :param convergence: Критерии досрочной остановки траекторий
+    :type convergence: Optional[Convergence]
+    """
+    for start in range(0, len(cells_i), slab_size):
+        slab_i = cells_i[start:start + slab_size]
+        slab_j = cells_j[start:start + slab_size]
+        x, y, steps = rk4_last_batch(xs[slab_j], ys[slab_i], function,
+                                     amount_iterations, h_step, convergence)
+
+        distances = numpy.hypot(x[:, None] - rest[None, :, 0],
+                                y[:, None] - rest[None, :, 1])
+        result = numpy.argmin(numpy.nan_to_num(distances, nan=numpy.inf),
+                              axis=1)
+        diverged = ~(numpy.isfinite(x) & numpy.isfinite(y))
+        result[diverged] = LABEL_DIVERGED
+        labels[slab_i, slab_j] = result
+
+        count(COUNTER_BASIN_CELLS_INTEGRATED, len(slab_i))
+        count(COUNTER_INTEGRATION_STEPS, steps.sum())
+        count(COUNTER_FUNCTION_EVALUATIONS, 4 * steps.sum())
+        count(COUNTER_OVERFLOWS, diverged.sum())
@@ -1,11 +1,45 @@
-from typing import Callable, List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
+import cmath
+import math
+
+import numpy
+
+from domain.classes.point import Point
+from domain.classes.rest_point import RestPoint, KIND_STABLE_NODE, \
+    KIND_STABLE_FOCUS, KIND_UNSTABLE_NODE, KIND_UNSTABLE_FOCUS, \
+    KIND_SADDLE, KIND_CENTER, KIND_DEGENERATE
+from domain.compiling import CompiledSystem
+
+
+# Относительный порог, ниже которого определитель и след матрицы Якоби
+# считаются нулевыми
+CLASSIFY_TOLERANCE = 1e-9
+# Машинная точность float64
+EPSILON = 2.220446049250313e-16
+# Относительный (к размаху значений функции) порог, ниже которого минимум
+# функции без смены знака считается касанием нуля: значение, отличимое от
+# нуля на несколько порядков машинной точности, - не корень
+TANGENCY_TOLERANCE = 1e3 * EPSILON
+# Относительная длина шага метода Ньютона, после которой уточнение решения
+# прекращается
+POLISH_TOLERANCE = 1e-12
 
 
 def solve(f: Callable, domain_range: Tuple[float, float],
-          amount_points: int = 1000) -> List[float]:
+          amount_points: int = 1000,
+          accuracy: float = 10 ** (-5),
+          f_vectorized: Optional[Callable[[numpy.ndarray],
+                                          numpy.ndarray]] = None) -> List[
+                                              float]:
     """
     Находит численные решения заданной функции на промежутке, разделённом на
-    множество более мелких
+    множество более мелких. Значения в узлах разбиения вычисляются одним
+    вызовом `f_vectorized` (если она задана). Корни на промежутках со
+    сменой знака уточняются методом Брента. В узлах, где модуль функции
+    имеет локальный минимум без смены знака, ищется экстремум функции: если
+    за ним функция меняет знак, уточняются оба корня, а если экстремум
+    равен нулю с точностью `TANGENCY_TOLERANCE` (относительно размаха
+    значений функции), он считается корнем чётной кратности
 
     :param f: Функция
     :type f: Callable
@@ -13,27 +47,273 @@ def solve(f: Callable, domain_range: Tuple[float, float],
     :type domain_range: Tuple[float, float]
     :param amount_points: Количество точек разбиения
     :type amount_points: int
-    :return: Список корней функции
+    :param accuracy: Точность поиска корней
+    :type accuracy: float
+    :param f_vectorized: Та же функция над массивами
+    :type f_vectorized: Optional[Callable[[numpy.ndarray], numpy.ndarray]]
+    :return: Список корней функции в порядке возрастания
     :rtype: List[float]
     """
+    nodes = numpy.linspace(domain_range[0], domain_range[1],
+                           amount_points + 1)
+    if f_vectorized is None:
+        f_vectorized = numpy.vectorize(f, otypes=[float])
+    with numpy.errstate(all='ignore'):
+        values = numpy.broadcast_to(numpy.asarray(
+            f_vectorized(nodes), dtype=float), nodes.shape)
+    signs = numpy.sign(values)
+
+    result = nodes[values == 0].tolist()
+
+    for i in numpy.nonzero(signs[:-1] * signs[1:] < 0)[0].tolist():
+        result.append(__brent(f, float(nodes[i]), float(nodes[i + 1]),
+                              float(values[i]), float(values[i + 1]),
+                              accuracy))
+
+    modules = numpy.abs(values)
+    scale = numpy.nanmax(modules) if numpy.isfinite(modules).any() else 0
+    inner = numpy.arange(1, len(nodes) - 1)
+    minimums = inner[
+        (modules[inner] < modules[inner - 1]) &
+        (modules[inner] <= modules[inner + 1]) &
+        (signs[inner - 1] == signs[inner]) &
+        (signs[inner] == signs[inner + 1]) & (signs[inner] != 0)
+    ]
+    for i in minimums.tolist():
+        start, end = float(nodes[i - 1]), float(nodes[i + 1])
+        sign = float(signs[i])
+        # Экстремум находится с точностью порядка корня из машинной
+        # точности - лучшей, с которой различимы значения функции вблизи
+        # касания
+        _var, value = __golden_minimum(
+            lambda t: sign * f(t), start, end,
+            math.sqrt(EPSILON) * max(1.0, abs(start), abs(end)))
+        if value < 0:
+            result.append(__brent(f, start, _var, float(values[i - 1]),
+                                  sign * value, accuracy))
+            result.append(__brent(f, _var, end, sign * value,
+                                  float(values[i + 1]), accuracy))
+        elif value <= TANGENCY_TOLERANCE * scale:
+            result.append(_var)
+
+    return sorted(result)
+
+
+def find_rest_points(system: CompiledSystem, params: Dict[str, float],
+                     point_start: Point, point_end: Point,
+                     shape: Tuple[int, int] = (401, 401),
+                     tolerance: float = 1e-9) -> List[RestPoint]:
+    """
+    Находит точки покоя системы двух уравнений в прямоугольной части
+    плоскости и определяет их тип.
+
+    Значения системы вычисляются сразу на всей сетке. Кандидатами служат
+    ячейки, в которых меняют знак обе компоненты системы, и узлы, в которых
+    норма системы имеет локальный минимум (корни чётной кратности). Каждый
+    кандидат уточняется методом Ньютона с дроблением шага. Вблизи
+    вырожденных точек покоя метод сходится медленно, поэтому решения,
+    расстояние между которыми меньше погрешности одного из них (по
+    последнему шагу метода), объединяются; тип определяется только для
+    оставшихся решений
+
+    :param system: Система выражений
+    :type system: CompiledSystem
+    :param params: Параметры
+    :type params: Dict[str, float]
+    :param point_start: Левая нижняя точка части плоскости
+    :type point_start: Point
+    :param point_end: Правая верхняя точка части плоскости
+    :type point_end: Point
+    :param shape: Кол-во узлов сетки по вертикали и горизонтали
+    :type shape: Tuple[int, int]
+    :param tolerance: Допустимая норма системы в точке покоя
+    :type tolerance: float
+    :return: Список точек покоя, упорядоченный по абсциссе
+    :rtype: List[RestPoint]
+    """
+    x_min, x_max = sorted((point_start.x, point_end.x))
+    y_min, y_max = sorted((point_start.y, point_end.y))
+    xs = numpy.linspace(x_min, x_max, shape[1])
+    ys = numpy.linspace(y_min, y_max, shape[0])
+    grid_x, grid_y = numpy.meshgrid(xs, ys)
+
+    with numpy.errstate(all='ignore'):
+        f1, f2 = (numpy.broadcast_to(v, grid_x.shape).astype(float)
+                  for v in system.vectorized(params)(grid_x, grid_y))
+        norm = f1 ** 2 + f2 ** 2
+
+        cells = __straddles_zero(f1) & __straddles_zero(f2)
+        cells_i, cells_j = numpy.nonzero(cells)
+        candidates = list(zip(
+            ((xs[cells_j] + xs[cells_j + 1]) / 2).tolist(),
+            ((ys[cells_i] + ys[cells_i + 1]) / 2).tolist()))
+
+        center = norm[1:-1, 1:-1]
+        minimums = numpy.isfinite(center)
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                if di or dj:
+                    minimums &= center <= norm[1 + di:norm.shape[0] - 1 + di,
+                                               1 + dj:norm.shape[1] - 1 + dj]
+        minimums_i, minimums_j = numpy.nonzero(minimums)
+        candidates.extend(zip(xs[minimums_j + 1].tolist(),
+                              ys[minimums_i + 1].tolist()))
+
+    function = system.scalar(params)
+    jacobian = system.jacobian(params)
+    margin_x = (x_max - x_min) / max(1, shape[1] - 1)
+    margin_y = (y_max - y_min) / max(1, shape[0] - 1)
+    distinct = 1e-7 * max(1.0, math.hypot(x_max - x_min, y_max - y_min))
+
+    # Решения и их погрешности
+    solutions: List[List[float]] = []
+    for x, y in candidates:
+        x, y, converged, error = __newton(function, jacobian, x, y, tolerance)
+        if not converged or \
+                not x_min - margin_x <= x <= x_max + margin_x or \
+                not y_min - margin_y <= y <= y_max + margin_y:
+            continue
+        radius = max(distinct, 2 * error)
+        for solution in solutions:
+            if math.hypot(x - solution[0], y - solution[1]) < \
+                    max(radius, solution[2]):
+                if radius < solution[2]:
+                    solution[:] = x, y, radius
+                break
+        else:
+            solutions.append([x, y, radius])
+
     result = []
+    for x, y, _ in solutions:
+        kind, eigenvalues = classify_rest_point(jacobian(x, y))
+        result.append(RestPoint(x, y, kind, eigenvalues))
+    return sorted(result, key=lambda p: (p.x, p.y))
 
-    prev_var, prev_value = domain_range[0], f(domain_range[0])
-    step = (domain_range[1] - domain_range[0]) / amount_points
-    for _var in [domain_range[0] + step * i for i in range(1, amount_points + 1)]:
-        value = f(_var)
-        if prev_value * value < 0:
-            result.append(__bin_search(f, prev_var, _var))
-        prev_var, prev_value = _var, value
 
-    return result
+def classify_rest_point(
+        jacobian: Tuple[Tuple[float, float], Tuple[float, float]]) -> Tuple[
+            str, Tuple[complex, complex]]:
+    """
+    Определяет тип точки покоя по матрице Якоби системы в этой точке
+
+    :param jacobian: Матрица Якоби ((df1/dx, df1/dy), (df2/dx, df2/dy))
+    :type jacobian: Tuple[Tuple[float, float], Tuple[float, float]]
+    :return: Тип точки покоя и собственные значения матрицы Якоби
+    :rtype: Tuple[str, Tuple[complex, complex]]
+    """
+    (a, b), (c, d) = jacobian
+    trace, determinant = a + d, a * d - b * c
+    root = cmath.sqrt(trace ** 2 - 4 * determinant)
+    eigenvalues = ((trace - root) / 2, (trace + root) / 2)
+
+    scale = max(abs(a), abs(b), abs(c), abs(d), 1e-300)
+    if abs(determinant) <= CLASSIFY_TOLERANCE * scale ** 2:
+        return KIND_DEGENERATE, eigenvalues
+    if determinant < 0:
+        return KIND_SADDLE, eigenvalues
+    if abs(trace) <= CLASSIFY_TOLERANCE * scale:
+        return KIND_CENTER, eigenvalues
 
+    focus = trace ** 2 < 4 * determinant
+    if trace < 0:
+        return (KIND_STABLE_FOCUS if focus else KIND_STABLE_NODE), \
+            eigenvalues
+    return (KIND_UNSTABLE_FOCUS if focus else KIND_UNSTABLE_NODE), \
+        eigenvalues
+
+
+def __straddles_zero(values: numpy.ndarray) -> numpy.ndarray:
+    """
+    Возвращает признаки ячеек сетки, в углах которых значения имеют разные
+    знаки (или равны нулю)
 
-def __bin_search(f: Callable, start: float, end: float,
-                 accuracy: float = 10 ** (-5)) -> float:
+    :param values: Значения в узлах сетки
+    :type values: numpy.ndarray
+    :return: Признаки ячеек, массив на единицу меньшего размера
+    :rtype: numpy.ndarray
     """
-    Возвращает результат работы метода половинного деления для заданного
-    интервала
+    corners = (values[:-1, :-1], values[1:, :-1],
+               values[:-1, 1:], values[1:, 1:])
+    low = numpy.minimum.reduce(corners)
+    high = numpy.maximum.reduce(corners)
+    return (low <= 0) & (high >= 0)
+
+
+def __newton(function: Callable[[float, float], Tuple[float, float]],
+             jacobian: Callable[[float, float],
+                                Tuple[Tuple[float, float], ...]],
+             x: float, y: float, tolerance: float,
+             max_iterations: int = 50) -> Tuple[float, float, bool, float]:
+    """
+    Уточняет решение системы двух уравнений методом Ньютона. Шаг дробится,
+    пока норма системы не уменьшится; значения системы в принятой точке
+    используются на следующей итерации повторно. После того как норма
+    системы стала допустимой, решение уточняется, пока шаг не станет
+    пренебрежимо малым или норма не перестанет уменьшаться (у корней
+    кратности больше единицы метод сходится линейно). Длина последнего
+    шага служит оценкой погрешности решения
+
+    :param function: Функция для расчёта значений обоих выражений
+    :type function: Callable[[float, float], Tuple[float, float]]
+    :param jacobian: Функция для расчёта матрицы Якоби
+    :type jacobian: Callable[[float, float], Tuple[Tuple[float, float], ...]]
+    :param x: Начальная абсцисса
+    :type x: float
+    :param y: Начальная ордината
+    :type y: float
+    :param tolerance: Допустимая норма системы в решении
+    :type tolerance: float
+    :param max_iterations: Максимальное кол-во итераций
+    :type max_iterations: int
+    :return: Абсцисса и ордината решения, признак сходимости и оценка
+    погрешности
+    :rtype: Tuple[float, float, bool, float]
+    """
+    error = math.inf
+    try:
+        f1, f2 = function(x, y)
+        norm = f1 * f1 + f2 * f2
+        for _ in range(max_iterations):
+            if norm == 0:
+                error = 0.0
+                break
+            (a, b), (c, d) = jacobian(x, y)
+            determinant = a * d - b * c
+            if determinant == 0 or not math.isfinite(determinant):
+                break
+            dx = (d * f1 - b * f2) / determinant
+            dy = (a * f2 - c * f1) / determinant
+            error = math.hypot(dx, dy)
+            if norm <= tolerance ** 2 and \
+                    error <= POLISH_TOLERANCE * max(1.0, abs(x), abs(y)):
+                break
+
+            step = 1.0
+            while True:
+                x_next, y_next = x - step * dx, y - step * dy
+                g1, g2 = function(x_next, y_next)
+                norm_next = g1 * g1 + g2 * g2
+                if norm_next < norm:
+                    break
+                step /= 2
+                if step < 1e-6:
+                    break
+            if norm_next >= norm:
+                break
+            x, y, f1, f2, norm = x_next, y_next, g1, g2, norm_next
+    except (OverflowError, ZeroDivisionError, ValueError):
+        return x, y, False, error
+
+    return x, y, norm <= tolerance ** 2, error
+
+
+def __brent(f: Callable, start: float, end: float,
+            f_start: float, f_end: float, accuracy: float,
+            max_iterations: int = 100) -> float:
+    """
+    Возвращает корень функции на интервале со сменой знака, найденный
+    методом Брента. Значения функции на концах интервала передаются
+    готовыми, на каждой итерации функция вычисляется один раз
 
     :param f: Функция
     :type f: Callable
@@ -41,19 +321,87 @@ def __bin_search(f: Callable, start: float, end: float,
     :type start: float
     :param end: Правый конец интервала
     :type end: float
+    :param f_start: Значение функции на левом конце
+    :type f_start: float
+    :param f_end: Значение функции на правом конце
+    :type f_end: float
     :param accuracy: Точность поиска значения
     :type accuracy: float
-    :return: Результат работы метода половинного деления
+    :param max_iterations: Максимальное кол-во итераций
+    :type max_iterations: int
+    :return: Корень функции
     :rtype: float
     """
-    left, right = min(start, end), max(start, end)
-    while abs(right - left) > accuracy:
-        m = (left + right) / 2
-        if f(left) * f(m) < 0:
-            right = m
-        elif f(left) * f(m) > 0:
-            left = m
+    a, b, fa, fb = start, end, f_start, f_end
+    c, fc = b, fb
+    d = e = b - a
+
+    for _ in range(max_iterations):
+        if (fb > 0) == (fc > 0):
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+
+        tolerance = 2 * 2.2e-16 * abs(b) + accuracy / 2
+        middle = (c - b) / 2
+        if abs(middle) <= tolerance or fb == 0:
+            return b
+
+        if abs(e) >= tolerance and abs(fa) > abs(fb):
+            s = fb / fa
+            if a == c:
+                p, q = 2 * middle * s, 1 - s
+            else:
+                q, r = fa / fc, fb / fc
+                p = s * (2 * middle * q * (q - r) - (b - a) * (r - 1))
+                q = (q - 1) * (r - 1) * (s - 1)
+            if p > 0:
+                q = -q
+            p = abs(p)
+            if 2 * p < min(3 * middle * q - abs(tolerance * q), abs(e * q)):
+                e, d = d, p / q
+            else:
+                d = e = middle
         else:
-            return m
+            d = e = middle
+
+        a, fa = b, fb
+        b += d if abs(d) > tolerance else math.copysign(tolerance, middle)
+        fb = f(b)
 
-    return (left + right) / 2
+    return b
+
+
+def __golden_minimum(f: Callable, start: float, end: float,
+                     accuracy: float) -> Tuple[float, float]:
+    """
+    Находит минимум унимодальной функции на интервале методом золотого
+    сечения
+
+    :param f: Функция
+    :type f: Callable
+    :param start: Левый конец интервала
+    :type start: float
+    :param end: Правый конец интервала
+    :type end: float
+    :param accuracy: Точность поиска значения
+    :type accuracy: float
+    :return: Точка минимума и значение функции в ней
+    :rtype: Tuple[float, float]
+    """
+    ratio = (math.sqrt(5) - 1) / 2
+    left, right = start, end
+    m1, m2 = right - ratio * (right - left), left + ratio * (right - left)
+    f1, f2 = f(m1), f(m2)
+    while right - left > accuracy:
+        if f1 <= f2:
+            right, m2, f2 = m2, m1, f1
+            m1 = right - ratio * (right - left)
+            f1 = f(m1)
+        else:
+            left, m1, f1 = m1, m2, f2
+            m2 = left + ratio * (right - left)
+            f2 = f(m2)
+    return (m1, f1) if f1 <= f2 else (m2, f2)
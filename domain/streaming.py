@@ -0,0 +1,223 @@
+from abc import ABC, abstractmethod
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+import numpy
+
+from domain.classes.trajectory import Trajectory
+
+
+class TrajectorySink(ABC):
+    """
+    Приёмник точек одной фазовой траектории, получающий их блоками по мере
+    вычисления
+    """
+
+    @abstractmethod
+    def consume(self, points: numpy.ndarray) -> None:
+        """
+        Принимает очередной блок точек траектории
+
+        :param points: Массив точек формы (m, 2)
+        :type points: numpy.ndarray
+        """
+
+    @abstractmethod
+    def finish(self) -> Any:
+        """
+        Завершает приём точек и возвращает результат
+
+        :return: Результат приёмника
+        :rtype: Any
+        """
+
+
+class CollectingSink(TrajectorySink):
+    """
+    Приёмник, собирающий все точки траектории
+    """
+
+    def __init__(self, capacity: int, time_step: float = 1.0):
+        """
+        Конструктор класса
+
+        :param capacity: Ожидаемое кол-во точек траектории
+        :param time_step: Шаг по времени между соседними точками
+        """
+        self.__trajectory = Trajectory.allocate(capacity)
+        self.__trajectory.time_step = time_step
+
+    def consume(self, points: numpy.ndarray) -> None:
+        self.__trajectory.extend(points)
+
+    def finish(self) -> Trajectory:
+        self.__trajectory.steps = len(self.__trajectory) - 1
+        return self.__trajectory
+
+
+class DecimatingSink(TrajectorySink):
+    """
+    Приёмник, прореживающий траекторию до не более чем `amount` точек без
+    хранения всей траектории. Точки разбиваются на группы по номерам, от
+    каждой группы остаются первая точка и точки с минимальными и
+    максимальными координатами (алгоритм M4), поэтому размах траектории
+    сохраняется. Последняя точка траектории сохраняется всегда. Моменты
+    времени оставшихся точек сохраняются в траектории. При `amount` меньше
+    6 группа из пяти точек не помещается в результат, поэтому остаются
+    точки с равномерно распределёнными номерами (первая и последняя в том
+    числе)
+    """
+
+    def __init__(self, total: int, amount: int, time_step: float = 1.0):
+        """
+        Конструктор класса
+
+        :param total: Максимальное кол-во точек траектории
+        :param amount: Максимальное кол-во точек результата
+        :param time_step: Шаг по времени между соседними точками
+        """
+        if amount < 2:
+            raise ValueError('Кол-во точек должно быть не меньше двух!')
+        self.__size = max(1, -(-total // max(1, (amount - 1) // 5)))
+        # Номера точек, остающихся при малом `amount`
+        self.__uniform = None
+        if amount < 6:
+            self.__uniform = numpy.unique(numpy.round(
+                numpy.linspace(0, max(0, total - 1), amount)).astype(int))
+        self.__time_step = time_step
+        self.__points, self.__indexes = [], []
+        self.__pending = numpy.empty((0, 2))
+        self.__pending_indexes = numpy.empty(0, dtype=int)
+        self.__pending_bucket = 0
+        self.__position = 0
+        self.__last = None
+
+    def consume(self, points: numpy.ndarray) -> None:
+        if len(points) == 0:
+            return
+        self.__last = points[-1].copy()
+
+        start = self.__position
+        self.__position += len(points)
+        if self.__uniform is not None:
+            indexes = self.__uniform[
+                (self.__uniform >= start) & (self.__uniform < self.__position)]
+            self.__points.append(points[indexes - start])
+            self.__indexes.append(indexes)
+            return
+
+        bucket_first = start // self.__size
+        bucket_last = (self.__position - 1) // self.__size
+
+        for bucket in range(bucket_first, bucket_last + 1):
+            left = max(bucket * self.__size, start)
+            right = min((bucket + 1) * self.__size, self.__position)
+            part = points[left - start:right - start]
+            indexes = numpy.arange(left, right)
+            if bucket == self.__pending_bucket and len(self.__pending):
+                part = numpy.concatenate((self.__pending, part))
+                indexes = numpy.concatenate((self.__pending_indexes, indexes))
+            selected = _select_m4(part)
+
+            if bucket == bucket_last and \
+                    self.__position < (bucket + 1) * self.__size:
+                self.__pending = part[selected]
+                self.__pending_indexes = indexes[selected]
+                self.__pending_bucket = bucket
+            else:
+                self.__points.append(part[selected])
+                self.__indexes.append(indexes[selected])
+                self.__pending = numpy.empty((0, 2))
+                self.__pending_indexes = numpy.empty(0, dtype=int)
+
+    def finish(self) -> Trajectory:
+        self.__points.append(self.__pending)
+        self.__indexes.append(self.__pending_indexes)
+        points = numpy.concatenate(self.__points)
+        indexes = numpy.concatenate(self.__indexes)
+        if self.__last is not None and (
+                len(indexes) == 0 or indexes[-1] != self.__position - 1):
+            points = numpy.concatenate((points, self.__last[None, :]))
+            indexes = numpy.append(indexes, self.__position - 1)
+        return Trajectory(points, self.__position - 1,
+                          times=indexes * self.__time_step)
+
+
+class RawFileSink(TrajectorySink):
+    """
+    Приёмник, записывающий точки (или другие значения, например, моменты
+    времени) в файл в виде массива float64 без заголовка. Файл можно
+    прочитать без загрузки в память:
+    `numpy.memmap(path, dtype=numpy.float64, mode='r').reshape(-1, 2)`.
+    Если задана форма `shape` всего массива, файл начинается с заголовка
+    `.npy`, и его можно прочитать `numpy.load(path, mmap_mode='r')`; тогда
+    записывать можно последовательно несколько траекторий в один файл
+    """
+
+    def __init__(self, path: str, shape: Optional[Tuple[int, ...]] = None):
+        """
+        Конструктор класса
+
+        :param path: Путь к файлу
+        :param shape: Форма всего массива (для заголовка `.npy`)
+        """
+        self.path = path
+        self.__shape = shape
+        self.__file = open(path, mode='wb')
+        self.__amount = 0
+        if shape is not None:
+            numpy.lib.format.write_array_header_1_0(self.__file, {
+                'descr': '<f8', 'fortran_order': False, 'shape': shape})
+
+    def consume(self, points: numpy.ndarray) -> None:
+        self.__file.write(
+            numpy.ascontiguousarray(points, dtype='<f8').tobytes())
+        self.__amount += len(points)
+
+    def finish(self) -> int:
+        self.__file.close()
+        if self.__shape is not None and self.__amount != self.__shape[0]:
+            raise ValueError(f'Записано {self.__amount} значений вместо '
+                             f'{self.__shape[0]}: "{self.path}"!')
+        return self.__amount
+
+
+def consume_chunks(
+        chunks: Iterable[Tuple[numpy.ndarray, numpy.ndarray]],
+        sinks: Sequence[Sequence[TrajectorySink]]) -> List[List[Any]]:
+    """
+    Передаёт блоки точек, полученные от потокового метода интегрирования,
+    приёмникам траекторий
+
+    :param chunks: Блоки точек и кол-ва точек каждой траектории в блоках
+    :type chunks: Iterable[Tuple[numpy.ndarray, numpy.ndarray]]
+    :param sinks: Приёмники каждой траектории
+    :type sinks: Sequence[Sequence[TrajectorySink]]
+    :return: Результаты приёмников каждой траектории
+    :rtype: List[List[Any]]
+    """
+    for block, counts in chunks:
+        for index, count in enumerate(counts):
+            if count:
+                for sink in sinks[index]:
+                    sink.consume(block[index, :count])
+
+    return [[sink.finish() for sink in trajectory_sinks]
+            for trajectory_sinks in sinks]
+
+
+def _select_m4(points: numpy.ndarray) -> numpy.ndarray:
+    """
+    Возвращает номера первой точки группы и точек с минимальными и
+    максимальными координатами в исходном порядке
+
+    :param points: Массив точек группы формы (m, 2)
+    :type points: numpy.ndarray
+    :return: Номера выбранных точек
+    :rtype: numpy.ndarray
+    """
+    if len(points) <= 5:
+        return numpy.arange(len(points))
+    indexes = [0]
+    for column in (points[:, 0], points[:, 1]):
+        if numpy.isfinite(column).any():
+            indexes.extend((numpy.nanargmin(column), numpy.nanargmax(column)))
+    return numpy.unique(indexes)
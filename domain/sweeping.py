@@ -0,0 +1,433 @@
+from typing import Any, Dict, List, Sequence, Tuple
+import math
+
+import numpy
+
+from domain.compiling import CompiledSystem
+
+
+# Кол-во значений функции, вычисляемых за один вызов при сканировании сетки
+# параметров (ограничивает потребление памяти)
+SWEEP_BUDGET = 4 * 1024 * 1024
+
+
+class Branch:
+    """
+    Ветвь решений уравнения f(x, p) = 0, найденная продолжением по параметру
+    """
+
+    __slots__ = ('parameters', 'values', 'derivatives', 'folds')
+
+    def __init__(self, parameters: numpy.ndarray, values: numpy.ndarray,
+                 derivatives: numpy.ndarray, folds: List[Tuple[float, float]]):
+        """
+        Конструктор класса
+
+        :param parameters: Значения параметра вдоль ветви
+        :param values: Значения решения вдоль ветви
+        :param derivatives: Значения производной df/dx вдоль ветви
+        :param folds: Точки поворота ветви (параметр, решение)
+        """
+        self.parameters = parameters
+        self.values = values
+        self.derivatives = derivatives
+        self.folds = folds
+
+
+def sweep_roots(system: CompiledSystem, params: Dict[str, float],
+                ranges: Dict[str, numpy.ndarray],
+                domain_range: Tuple[float, float] = (0, 1),
+                amount_points: int = 100, accuracy: float = 1e-10,
+                max_iterations: int = 60) -> Tuple[numpy.ndarray,
+                                                   numpy.ndarray]:
+    """
+    Находит корни первого выражения системы (при нулевой второй переменной)
+    для каждой точки сетки параметров.
+
+    Выражение вычисляется сразу для всей сетки параметров и узлов
+    промежутка `domain_range` (порциями по `SWEEP_BUDGET` значений), корни
+    отделяются по смене знака между соседними узлами и уточняются для всех
+    точек сетки одновременно методом ложного положения (модификация
+    Illinois), на каждой итерации которого выражение вычисляется один раз.
+    Нулевое значение в узле считается положительным, поэтому корень в узле
+    находится один раз. Корни чётной кратности не находятся - на сетке
+    параметров они соответствуют границам областей с разным кол-вом корней
+
+    :param system: Система выражений
+    :type system: CompiledSystem
+    :param params: Значения параметров, не входящих в `ranges`
+    :type params: Dict[str, float]
+    :param ranges: Значения изменяемых параметров (один или два параметра)
+    :type ranges: Dict[str, numpy.ndarray]
+    :param domain_range: Промежуток поиска корней
+    :type domain_range: Tuple[float, float]
+    :param amount_points: Количество точек разбиения промежутка
+    :type amount_points: int
+    :param accuracy: Точность поиска корней
+    :type accuracy: float
+    :param max_iterations: Максимальное кол-во итераций уточнения
+    :type max_iterations: int
+    :return: Массив кол-в корней формы сетки параметров и массив корней
+    той же формы с дополнительной последней осью (по возрастанию, пустые
+    места заполнены `nan`)
+    :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+    """
+    grids = numpy.meshgrid(*(numpy.asarray(v, dtype=float)
+                             for v in ranges.values()), indexing='ij')
+    shape = grids[0].shape
+    flat = dict(zip(ranges, (g.ravel() for g in grids)))
+    amount = grids[0].size
+
+    nodes = numpy.linspace(domain_range[0], domain_range[1],
+                           amount_points + 1)
+    slab = max(1, SWEEP_BUDGET // len(nodes))
+
+    indexes, lefts, rights, values_left, values_right = [], [], [], [], []
+    with numpy.errstate(all='ignore'):
+        for start in range(0, amount, slab):
+            part = {name: values[start:start + slab, None]
+                    for name, values in flat.items()}
+            values = __evaluate(system, params, part, nodes[None, :])
+            values = numpy.broadcast_to(
+                values, (min(slab, amount - start), len(nodes)))
+            negative = numpy.signbit(values)
+
+            j, i = numpy.nonzero(negative[:, :-1] != negative[:, 1:])
+            indexes.append(j + start)
+            lefts.append(nodes[i])
+            rights.append(nodes[i + 1])
+            values_left.append(values[j, i])
+            values_right.append(values[j, i + 1])
+
+        indexes = numpy.concatenate(indexes)
+        roots = __refine(
+            system, params,
+            {name: values[indexes] for name, values in flat.items()},
+            numpy.concatenate(lefts), numpy.concatenate(rights),
+            numpy.concatenate(values_left), numpy.concatenate(values_right),
+            accuracy, max_iterations)
+
+    order = numpy.lexsort((roots, indexes))
+    indexes, roots = indexes[order], roots[order]
+
+    counts = numpy.bincount(indexes, minlength=amount)
+    result = numpy.full((amount, max(1, int(counts.max(initial=0)))),
+                        numpy.nan)
+    positions = numpy.arange(len(indexes)) - \
+        numpy.searchsorted(indexes, indexes, side='left')
+    result[indexes, positions] = roots
+
+    return counts.reshape(shape), result.reshape(shape + (-1,))
+
+
+def continue_roots(system: CompiledSystem, params: Dict[str, float],
+                   name: str, parameter_range: Tuple[float, float],
+                   starts: Sequence[Tuple[float, float]],
+                   domain_range: Tuple[float, float] = (0, 1),
+                   step: float = 0.01, max_steps: int = 10000,
+                   accuracy: float = 1e-10) -> List[Branch]:
+    """
+    Продолжает корни первого выражения системы (при нулевой второй
+    переменной) по параметру `name` методом продолжения по длине дуги.
+    Ветви проходят через точки поворота, в которых сливаются пары корней,
+    поэтому одна ветвь может содержать несколько корней при одном значении
+    параметра. Каждая начальная точка продолжается в обе стороны; начальные
+    точки, лежащие на уже построенных ветвях, пропускаются
+
+    :param system: Система выражений
+    :type system: CompiledSystem
+    :param params: Значения остальных параметров
+    :type params: Dict[str, float]
+    :param name: Имя изменяемого параметра
+    :type name: str
+    :param parameter_range: Промежуток изменения параметра
+    :type parameter_range: Tuple[float, float]
+    :param starts: Начальные точки ветвей (значение параметра, корень)
+    :type starts: Sequence[Tuple[float, float]]
+    :param domain_range: Промежуток значений решения
+    :type domain_range: Tuple[float, float]
+    :param step: Максимальный шаг по длине дуги (в долях промежутков
+    параметра и решения)
+    :type step: float
+    :param max_steps: Максимальное кол-во шагов в каждую сторону
+    :type max_steps: int
+    :param accuracy: Точность коррекции
+    :type accuracy: float
+    :return: Список ветвей
+    :rtype: List[Branch]
+    """
+    function = system.components_scalar[0]
+    order = system.parameters_variables
+    p_start, p_end = sorted(parameter_range)
+    x_start, x_end = sorted(domain_range)
+    # Параметр и решение масштабируются к единичным промежуткам, чтобы шаг
+    # по длине дуги одинаково учитывал оба направления
+    p_scale, x_scale = (p_end - p_start) or 1.0, (x_end - x_start) or 1.0
+
+    def f(x: float, p: float) -> float:
+        values = dict(params)
+        values[name] = p_start + p * p_scale
+        return function(x_start + x * x_scale, 0,
+                        *(values[v] for v in order))
+
+    result = []
+    for parameter, start in starts:
+        x = (start - x_start) / x_scale
+        p = (parameter - p_start) / p_scale
+        if any(numpy.any(numpy.hypot((b.values - start) / x_scale,
+                                     (b.parameters - parameter) / p_scale)
+                         < step) for b in result):
+            continue
+
+        sides = [__continue(f, x, p, direction, step, max_steps, accuracy)
+                 for direction in (-1, 1)]
+        points = sides[0][0][::-1] + sides[1][0][1:]
+        folds = sides[0][1] + sides[1][1]
+        if not points:
+            continue
+
+        points = numpy.array(points)
+        result.append(Branch(
+            p_start + points[:, 1] * p_scale,
+            x_start + points[:, 0] * x_scale,
+            points[:, 2] / x_scale,
+            [(p_start + _p * p_scale, x_start + _x * x_scale)
+             for _x, _p in folds]))
+
+    return result
+
+
+def __evaluate(system: CompiledSystem, params: Dict[str, float],
+               arrays: Dict[str, Any], x: Any) -> numpy.ndarray:
+    """
+    Вычисляет первое выражение системы при нулевой второй переменной, где
+    часть параметров заданы массивами
+
+    :param system: Система выражений
+    :type system: CompiledSystem
+    :param params: Значения параметров
+    :type params: Dict[str, float]
+    :param arrays: Массивы значений изменяемых параметров
+    :type arrays: Dict[str, Any]
+    :param x: Значения первой переменной
+    :type x: Any
+    :return: Значения выражения
+    :rtype: numpy.ndarray
+    """
+    values = [arrays[p] if p in arrays else params[p]
+              for p in system.parameters_variables]
+    return numpy.asarray(system.components_vectorized[0](x, 0, *values),
+                         dtype=float)
+
+
+def __refine(system: CompiledSystem, params: Dict[str, float],
+             arrays: Dict[str, numpy.ndarray], a: numpy.ndarray,
+             b: numpy.ndarray, fa: numpy.ndarray, fb: numpy.ndarray,
+             accuracy: float, max_iterations: int) -> numpy.ndarray:
+    """
+    Уточняет корни на всех интервалах со сменой знака одновременно методом
+    ложного положения (модификация Illinois)
+
+    :param system: Система выражений
+    :type system: CompiledSystem
+    :param params: Значения параметров
+    :type params: Dict[str, float]
+    :param arrays: Значения изменяемых параметров для каждого интервала
+    :type arrays: Dict[str, numpy.ndarray]
+    :param a: Левые концы интервалов
+    :type a: numpy.ndarray
+    :param b: Правые концы интервалов
+    :type b: numpy.ndarray
+    :param fa: Значения на левых концах
+    :type fa: numpy.ndarray
+    :param fb: Значения на правых концах
+    :type fb: numpy.ndarray
+    :param accuracy: Точность поиска корней
+    :type accuracy: float
+    :param max_iterations: Максимальное кол-во итераций
+    :type max_iterations: int
+    :return: Корни
+    :rtype: numpy.ndarray
+    """
+    result = (a + b) / 2
+    # Номера ещё не уточнённых интервалов и сторона интервала, заменённая
+    # на предыдущей итерации
+    active = numpy.arange(len(a))
+    side = numpy.zeros(len(a), dtype=int)
+    c = result.copy()
+    for _ in range(max_iterations):
+        if len(active) == 0:
+            break
+        c_prev = c
+        c = (a * fb - b * fa) / (fb - fa)
+        fc = numpy.broadcast_to(__evaluate(
+            system, params,
+            {name: values[active] for name, values in arrays.items()}, c),
+            c.shape)
+        result[active] = c
+
+        to_a = numpy.signbit(fc) == numpy.signbit(fa)
+        fb = numpy.where(to_a & (side == -1), fb / 2, fb)
+        fa = numpy.where(~to_a & (side == 1), fa / 2, fa)
+        a, fa = numpy.where(to_a, c, a), numpy.where(to_a, fc, fa)
+        b, fb = numpy.where(to_a, b, c), numpy.where(to_a, fb, fc)
+        side = numpy.where(to_a, -1, 1)
+
+        keep = (numpy.abs(c - c_prev) > accuracy) & (fc != 0)
+        if not keep.all():
+            active, a, b, fa, fb, side, c = active[keep], a[keep], \
+                b[keep], fa[keep], fb[keep], side[keep], c[keep]
+    return result
+
+
+def __continue(f, x: float, p: float, direction: int, step: float,
+               max_steps: int, accuracy: float) -> Tuple[
+                   List[Tuple[float, float, float]],
+                   List[Tuple[float, float]]]:
+    """
+    Продолжает решение уравнения f(x, p) = 0 в масштабированных координатах
+    в одну сторону, пока ветвь не покинет единичный квадрат
+
+    :param f: Функция f(x, p)
+    :param x: Начальное решение
+    :type x: float
+    :param p: Начальное значение параметра
+    :type p: float
+    :param direction: Начальное направление по параметру (1 или -1)
+    :type direction: int
+    :param step: Максимальный шаг по длине дуги
+    :type step: float
+    :param max_steps: Максимальное кол-во шагов
+    :type max_steps: int
+    :param accuracy: Точность коррекции
+    :type accuracy: float
+    :return: Точки ветви (x, p, df/dx) и точки поворота (x, p)
+    :rtype: Tuple[List[Tuple[float, float, float]], List[Tuple[float, float]]]
+    """
+    h = 1e-7
+
+    def gradient(_x: float, _p: float) -> Tuple[float, float]:
+        return ((f(_x + h, _p) - f(_x - h, _p)) / (2 * h),
+                (f(_x, _p + h) - f(_x, _p - h)) / (2 * h))
+
+    points, folds = [], []
+    try:
+        x, converged = __correct_parameter(f, gradient, x, p, accuracy)
+        if not converged:
+            return points, folds
+        f_x, f_p = gradient(x, p)
+        points.append((x, p, f_x))
+
+        # Касательная (dx, dp) ортогональна градиенту (f_x, f_p)
+        t_x, t_p = -f_p, f_x
+        norm = math.hypot(t_x, t_p)
+        if norm == 0:
+            return points, folds
+        t_x, t_p = t_x / norm, t_p / norm
+        if t_p * direction < 0:
+            t_x, t_p = -t_x, -t_p
+
+        ds = step
+        for _ in range(max_steps):
+            if ds < step * 1e-4:
+                break
+            x_pred, p_pred = x + ds * t_x, p + ds * t_p
+            x_new, p_new, converged = __correct_arclength(
+                f, gradient, x_pred, p_pred, t_x, t_p, accuracy)
+            if not converged or math.hypot(x_new - x, p_new - p) > 2 * ds:
+                ds /= 2
+                continue
+
+            f_x, f_p = gradient(x_new, p_new)
+            n_x, n_p = -f_p, f_x
+            norm = math.hypot(n_x, n_p)
+            if norm == 0:
+                break
+            n_x, n_p = n_x / norm, n_p / norm
+            if n_x * t_x + n_p * t_p < 0:
+                n_x, n_p = -n_x, -n_p
+            if n_p * t_p < 0:
+                folds.append(((x + x_new) / 2, (p + p_new) / 2))
+
+            x, p, t_x, t_p = x_new, p_new, n_x, n_p
+            points.append((x, p, f_x))
+            if not (0 <= p <= 1 and -0.5 <= x <= 1.5):
+                break
+            ds = min(step, ds * 1.5)
+    except (OverflowError, ZeroDivisionError, ValueError):
+        pass
+
+    return points, folds
+
+
+def __correct_parameter(f, gradient, x: float, p: float,
+                        accuracy: float,
+                        max_iterations: int = 50) -> Tuple[float, bool]:
+    """
+    Уточняет решение методом Ньютона при фиксированном параметре
+
+    :param f: Функция f(x, p)
+    :param gradient: Функция, возвращающая частные производные (df/dx,
+    df/dp)
+    :param x: Начальное приближение
+    :type x: float
+    :param p: Значение параметра
+    :type p: float
+    :param accuracy: Точность коррекции
+    :type accuracy: float
+    :param max_iterations: Максимальное кол-во итераций
+    :type max_iterations: int
+    :return: Решение и признак сходимости
+    :rtype: Tuple[float, bool]
+    """
+    for _ in range(max_iterations):
+        f_x = gradient(x, p)[0]
+        if f_x == 0:
+            return x, abs(f(x, p)) <= accuracy
+        delta = f(x, p) / f_x
+        x -= delta
+        if abs(delta) <= accuracy:
+            return x, True
+    return x, False
+
+
+def __correct_arclength(f, gradient, x: float, p: float, t_x: float,
+                        t_p: float, accuracy: float,
+                        max_iterations: int = 10) -> Tuple[
+                            float, float, bool]:
+    """
+    Уточняет решение методом Ньютона на прямой, ортогональной касательной
+    (t_x, t_p) и проходящей через предсказанную точку
+
+    :param f: Функция f(x, p)
+    :param gradient: Функция, возвращающая частные производные (df/dx,
+    df/dp)
+    :param x: Предсказанное решение
+    :type x: float
+    :param p: Предсказанное значение параметра
+    :type p: float
+    :param t_x: Компонента касательной по решению
+    :type t_x: float
+    :param t_p: Компонента касательной по параметру
+    :type t_p: float
+    :param accuracy: Точность коррекции
+    :type accuracy: float
+    :param max_iterations: Максимальное кол-во итераций
+    :type max_iterations: int
+    :return: Решение, параметр и признак сходимости
+    :rtype: Tuple[float, float, bool]
+    """
+    x_pred, p_pred = x, p
+    for _ in range(max_iterations):
+        value = f(x, p)
+        constraint = t_x * (x - x_pred) + t_p * (p - p_pred)
+        f_x, f_p = gradient(x, p)
+        determinant = f_x * t_p - f_p * t_x
+        if determinant == 0:
+            return x, p, False
+        d_x = (value * t_p - f_p * constraint) / determinant
+        d_p = (f_x * constraint - value * t_x) / determinant
+        x, p = x - d_x, p - d_p
+        if math.hypot(d_x, d_p) <= accuracy:
+            return x, p, True
+    return x, p, False
@@ -1,43 +1,122 @@
+from __future__ import annotations
 import os
-from typing import List
-import fpdf
-import webbrowser
+from typing import List, Optional, TYPE_CHECKING, Union
 from datetime import datetime
+from functools import lru_cache
 import logging
 
+from domain.instrumenting import COUNTER_BYTES_WRITTEN, COUNTER_PAGES, count
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
 
 LOGGER = logging.getLogger('__main__')
 
+# Директория документов по умолчанию
+DEFAULT_DIRECTORY = 'results'
+
 
-def show_as_pdf(figures: List[str]):
+@lru_cache(maxsize=1)
+def can_insert_documents() -> bool:
     """
-    Формирует `pdf` документ на основе списка изображений и открывает его в
-    браузере
+    Возвращает True, если установлен `pypdf` и в документ можно вставлять
+    страницы готовых документов
 
-    :param figures: Список идентификаторов изображений
-    :type figures: List[int]
+    :return: Можно ли вставлять страницы документов
+    :rtype: bool
     """
-    pdf = fpdf.FPDF('P', 'mm', (210, 100))
-    images = list(map(lambda f: os.path.join('figures', f'{f}.png'), figures))
-    flag_file_empty = True
-    for image in images:
-        if os.path.exists(image):
-            pdf.add_page()
-            pdf.image(image, x=0, y=0, w=210, h=100)
-            flag_file_empty = False
-        else:
-            LOGGER.warning(f'Не найден файл: "{image}"!')
-
-    if flag_file_empty:
+    try:
+        import pypdf  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def show_as_pdf(figures: List[Union[Figure, str]],
+                directory: str = DEFAULT_DIRECTORY,
+                name: Optional[str] = None,
+                show: bool = True) -> Optional[str]:
+    """
+    Формирует многостраничный `pdf` документ из изображений (по одной
+    странице на изображение, в векторном виде) и, если задан `show`,
+    открывает его в браузере. Изображения записываются в документ напрямую,
+    без промежуточных файлов. Вместо изображения может быть указан путь к
+    готовому документу (например, из кэша), тогда в документ вставляются
+    все его страницы (требуется `pypdf`, см. `can_insert_documents`)
+
+    :param figures: Список изображений и путей к документам
+    :type figures: List[Union[Figure, str]]
+    :param directory: Директория, в которую сохраняется документ
+    :type directory: str
+    :param name: Имя документа без расширения (по умолчанию - по текущему
+    времени)
+    :type name: Optional[str]
+    :param show: Открывать ли документ в браузере
+    :type show: bool
+    :return: Путь к документу или None, если документ не сформирован
+    :rtype: Optional[str]
+    """
+    # `PdfPages` и `webbrowser` загружаются только при формировании документа
+    from matplotlib.backends.backend_pdf import PdfPages
+    import webbrowser
+
+    if not figures:
         LOGGER.warning(f'Сформирован пустой файл! Ничего не будет сохранено!')
+        return None
+
+    if not os.path.exists(directory):
+        LOGGER.warning(f'Не найдена директория: "{directory}"!')
+        os.makedirs(directory, exist_ok=True)
+        LOGGER.info(f'Создана директория: "{directory}"!')
+    if name is None:
+        name = f'result_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}'
+    path = os.path.join(directory, f'{name}.pdf')
+    if any(isinstance(figure, str) for figure in figures):
+        __write_with_documents(path, figures)
     else:
-        if not os.path.exists('results'):
-            LOGGER.warning(f'Не найдена директория: "./results/"!')
-            os.mkdir('results')
-            LOGGER.info(f'Создана директория: "./results/"!')
-        path = os.path.join(
-            'results',
-            f'result_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.pdf')
-        pdf.output(path, 'F')
-        LOGGER.warning(f'Сформирован .pdf файл и сохранён: "{path}".')
-        webbrowser.open('file://' + os.path.join(os.getcwd(), path), new=2)
\ No newline at end of file
+        with PdfPages(path) as pdf:
+            for figure in figures:
+                pdf.savefig(figure)
+                count(COUNTER_PAGES)
+    count(COUNTER_BYTES_WRITTEN, os.path.getsize(path))
+    LOGGER.warning(f'Сформирован .pdf файл и сохранён: "{path}".')
+    if show:
+        webbrowser.open('file://' + os.path.abspath(path), new=2)
+    return path
+
+
+def __write_with_documents(path: str, figures: List[Union[Figure, str]]):
+    """
+    Записывает документ из изображений и страниц готовых документов.
+    Идущие подряд изображения записываются одним промежуточным документом
+    в памяти
+
+    :param path: Путь к документу
+    :type path: str
+    :param figures: Список изображений и путей к документам
+    :type figures: List[Union[Figure, str]]
+    """
+    from io import BytesIO
+    from matplotlib.backends.backend_pdf import PdfPages
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    index = 0
+    while index < len(figures):
+        if isinstance(figures[index], str):
+            writer.append(figures[index])
+            index += 1
+            continue
+        buffer = BytesIO()
+        with PdfPages(buffer) as pdf:
+            while index < len(figures) and \
+                    not isinstance(figures[index], str):
+                pdf.savefig(figures[index])
+                index += 1
+        buffer.seek(0)
+        writer.append(buffer)
+
+    with open(path, mode='wb') as f:
+        writer.write(f)
+    count(COUNTER_PAGES, len(writer.pages))
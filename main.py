@@ -1,13 +1,24 @@
 import os
 import sys
+import json
+import time
 import logging
-import jsonpickle
+import argparse
 import configparser
-import matplotlib
+from contextlib import ExitStack
+from typing import List, Optional, TYPE_CHECKING
 
+# Тяжёлые модули (`matplotlib`, `numpy`) импортируются только
+# на тех этапах, где они нужны, чтобы разбор аргументов и конфигурационного
+# файла не ждал их загрузки
 from domain.configuration import DataConfiguration
-from domain.plotting import plot
-from domain.visualizing import show_as_pdf
+from domain.instrumenting import get_instrumentation, get_profile_summary, \
+    stage, write_report
+from domain.loading import ConfigurationError, load_configuration
+from domain.visualizing import DEFAULT_DIRECTORY
+
+if TYPE_CHECKING:
+    import cProfile
 
 
 # Относительный путь к конфигурационному файлу
@@ -55,173 +66,260 @@ def parse_input(file: str) -> DataConfiguration:
     :type file: str
     :return: Конфигурационные данные
     :rtype: DataConfiguration
+    :raises ConfigurationError: Если файл не соответствует схеме (путь к
+    ошибочному значению - в `path`)
     """
     if not os.path.exists(file):
         raise FileExistsError(f'No such file: "{file}"!')
     with open(file, mode='r') as f:
         content = f.read()
-        result = jsonpickle.loads(content)
-        if isinstance(result, DataConfiguration):
-            return result
-        raise ValueError(f'Can not parse input file: "{file}"!')
-
-
-def temp():
-    config = parse_config(FILE_CONFIGURATION)
-    data = parse_input(config['Data']['file'])
-
-    matplotlib.use('TkAgg')
-
-    from domain.functions import get_functions_for_solving
-    import matplotlib.pyplot as plt
-    from domain.solving import solve
-    f1, f2 = get_functions_for_solving(data)
-
-    # =====================================================================
-    parameters = [
-        ({'b': 0.05, 'g': 0.03, 'S': 0.4, 'D': 0.05}, 'brown'),
-        ({'b': 0.05, 'g': 0.03, 'S': 0.4, 'D': 0.06}, 'lime'),
-        ({'b': 0.05, 'g': 0.03, 'S': 0.4, 'D': 0.0643}, 'red'),
-        ({'b': 0.05, 'g': 0.03, 'S': 0.4, 'D': 0.07}, 'blue'),
-        ({'b': 0.05, 'g': 0.03, 'S': 0.4, 'D': 0.0644}, 'orange')
-    ]
-
-    x_values = [x / 1000 for x in range(1001)]
-    for params, color in parameters:
-        f = lambda x: f1(x, 0, **params)
-
-        solves = solve(f, (0, 1), 1000)
-        for s in solves:
-            plt.plot([s], [f(s)], marker='.', color=color)
-
-        y_values = list(map(f, x_values))
-        plt.plot(x_values, y_values, label=f'D = {params["D"]} [{len(solves)}]', color=color)
-
-    plt.title(f'S = {parameters[0][0]["S"]}')
-    plt.grid()
-    plt.legend()
-    plt.show()
-
-    # =====================================================================
-    # parameters = [
-    #     ({'b': 0.05, 'g': 0.03, 'S': 0.7, 'D': 0.05}, 'brown'),
-    #     ({'b': 0.05, 'g': 0.03, 'S': 0.7, 'D': 0.06}, 'lime'),
-    #     ({'b': 0.05, 'g': 0.03, 'S': 0.7, 'D': 0.0643}, 'red'),
-    #     ({'b': 0.05, 'g': 0.03, 'S': 0.7, 'D': 0.07}, 'blue')
-    # ]
-    #
-    # x_values = [x / 1000 for x in range(1001)]
-    # for params, color in parameters:
-    #     f = lambda x: f1(x, 0, **params)
-    #
-    #     solves = solve(f, (0, 1), 1000)
-    #     for s in solves:
-    #         plt.plot([s], [f(s)], marker='.', color=color)
-    #
-    #     y_values = list(map(f, x_values))
-    #     plt.plot(x_values, y_values,
-    #              label=f'D = {params["D"]} [{len(solves)}]', color=color)
-    #
-    # plt.title(f'S = {parameters[0][0]["S"]}')
-    # plt.grid()
-    # plt.legend()
-    # plt.show()
-
-    # =====================================================================
-    # parameters = [
-    #     ({'b': 0.05, 'g': 0.03, 'S': 0.5, 'D': 0.05}, 'brown'),
-    #     ({'b': 0.05, 'g': 0.03, 'S': 0.55, 'D': 0.05}, 'lime'),
-    #     ({'b': 0.05, 'g': 0.03, 'S': 0.6, 'D': 0.05}, 'red'),
-    #     ({'b': 0.05, 'g': 0.03, 'S': 0.65, 'D': 0.05}, 'blue'),
-    #     ({'b': 0.05, 'g': 0.03, 'S': 0.7, 'D': 0.05}, 'orange')
-    # ]
-    #
-    # x_values = [x / 1000 for x in range(1001)]
-    # for params, color in parameters:
-    #     f = lambda x: f1(x, 0, **params)
-    #
-    #     solves = solve(f, (0, 1), 1000)
-    #     for s in solves:
-    #         plt.plot([s], [f(s)], marker='.', color=color)
-    #
-    #     y_values = list(map(f, x_values))
-    #     plt.plot(x_values, y_values,
-    #              label=f'S = {params["S"]} [{len(solves)}]', color=color)
-    #
-    # plt.title(f'D = {parameters[0][0]["D"]}')
-    # plt.grid()
-    # plt.legend()
-    # plt.show()
-
-
-def temp_2():
-    config = parse_config(FILE_CONFIGURATION)
-    data = parse_input(config['Data']['file'])
-
-    matplotlib.use('TkAgg')
-
-    from domain.functions import get_functions_for_expressions, \
-        get_functions_for_solving
-    import matplotlib.pyplot as plt
-    from domain.solving import solve
-    from domain.plotting import __get_trajectory_points
-    from domain.classes.point import Point
-
-    f1, f2 = get_functions_for_expressions(data)
-
-    for dataobj in data.dataset.values:
-        x_values = []
-        y_values = []
-        for t in dataobj.trajectories:
-            point = Point.try_parse(t.point)
-            trajectory_points = __get_trajectory_points(
-                point, f1, f2, data.amount_iterations,
-                data.h_step, **dataobj.parameters)
-            x_values.append((list(map(lambda _p: _p.x, trajectory_points)), t.color))
-            y_values.append((list(map(lambda _p: _p.y, trajectory_points)), t.color))
-
-        h_values = [h * data.h_step for h in range(data.amount_iterations + 1)]
-        plt.title(f'x=x(t) | Params: {dataobj.parameters}')
-        for xx, color in x_values:
-            plt.plot(h_values, xx, color=color)
-        plt.show()
-        plt.clf()
-
-        plt.title(f'y=y(t) | Params: {dataobj.parameters}')
-        for yy, color in y_values:
-            plt.plot(h_values, yy, color=color)
-        plt.show()
-        plt.clf()
-
-
-def main():
+    try:
+        return load_configuration(content)
+    except ConfigurationError as e:
+        raise ConfigurationError(
+            e.path,
+            f'Can not parse input file "{file}": {e.message}') from None
+
+
+def parse_manifest(file: str) -> List[str]:
+    """
+    Достаёт пути к файлам с данными из манифеста - `JSON` списка путей.
+    Относительные пути отсчитываются от директории манифеста
+
+    :param file: Путь к манифесту
+    :type file: str
+    :return: Пути к файлам с данными
+    :rtype: List[str]
+    """
+    if not os.path.exists(file):
+        raise FileExistsError(f'No such file: "{file}"!')
+    with open(file, mode='r') as f:
+        result = json.load(f)
+    if not isinstance(result, list) or \
+            not all(isinstance(path, str) for path in result):
+        raise ValueError(f'Manifest must be a list of paths: "{file}"!')
+    directory = os.path.dirname(file)
+    return [os.path.join(directory, path) for path in result]
+
+
+def parse_arguments(args: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Разбирает аргументы командной строки
+
+    :param args: Аргументы (по умолчанию - аргументы процесса)
+    :type args: Optional[List[str]]
+    :return: Значения аргументов
+    :rtype: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(
+        description='Построение фазовых портретов и диаграмм по файлам с '
+                    'данными. Если файлы не заданы, используется файл из '
+                    'секции `Data` конфигурационного файла.')
+    parser.add_argument(
+        'files', nargs='*', metavar='FILE', help='файлы с данными')
+    parser.add_argument(
+        '-m', '--manifest', action='append', default=[],
+        help='манифест - JSON список путей к файлам с данными')
+    parser.add_argument(
+        '-o', '--output', default=DEFAULT_DIRECTORY,
+        help=f'директория документов (по умолчанию "{DEFAULT_DIRECTORY}")')
+    parser.add_argument(
+        '-e', '--export', metavar='DIRECTORY',
+        help='директория выгрузки траекторий, точек покоя и областей '
+             'притяжения в файлы `.npy` (по поддиректории на файл с данными)')
+    parser.add_argument(
+        '-c', '--config', default=FILE_CONFIGURATION,
+        help=f'конфигурационный файл (по умолчанию "{FILE_CONFIGURATION}")')
+    parser.add_argument(
+        '-w', '--workers', type=int,
+        help='кол-во процессов (0 - по кол-ву ядер), заменяет значение из '
+             'конфигурационного файла')
+    parser.add_argument(
+        '-i', '--incremental', action='store_true',
+        help='строить только фазовые портреты с изменившимися данными, '
+             'страницы остальных брать из кэша (нужен кэш и пакет `pypdf`)')
+    parser.add_argument(
+        '--headless', action='store_true',
+        help='не открывать документы и не использовать графический backend '
+             '(включается автоматически, если заданы файлы или манифест)')
+    return parser.parse_args(args)
+
+
+def get_document_names(files: List[str]) -> List[str]:
+    """
+    Возвращает имена документов для файлов с данными: имя файла без
+    расширения, при совпадении имён - с номером
+
+    :param files: Пути к файлам с данными
+    :type files: List[str]
+    :return: Имена документов
+    :rtype: List[str]
+    """
+    result = []
+    for file in files:
+        name = os.path.splitext(os.path.basename(file))[0]
+        if name in result:
+            index = 2
+            while f'{name}_{index}' in result:
+                index += 1
+            name = f'{name}_{index}'
+        result.append(name)
+    return result
+
+
+def write_run_report(path: str, file: str, workers: int, time_total: float,
+                     profiler: Optional['cProfile.Profile'] = None,
+                     profile_top: int = 30) -> str:
+    """
+    Сохраняет отчёт о выполнении рядом с документом (файл с тем же именем
+    и расширением `.json`): время этапов, счётчики и, если задан
+    `profiler`, функции с наибольшим временем выполнения. Данные
+    профилировщика сохраняются в файл с расширением `.prof`
+
+    :param path: Путь к документу
+    :type path: str
+    :param file: Путь к файлу с данными
+    :type file: str
+    :param workers: Кол-во процессов
+    :type workers: int
+    :param time_total: Общее время обработки файла (в секундах)
+    :type time_total: float
+    :param profiler: Профилировщик основного процесса
+    :type profiler: Optional[cProfile.Profile]
+    :param profile_top: Кол-во функций профиля в отчёте
+    :type profile_top: int
+    :return: Путь к отчёту
+    :rtype: str
+    """
+    base = os.path.splitext(path)[0]
+    extra = {'file': file, 'document': path, 'workers': workers,
+             'time': time_total, 'profile': None}
+    if profiler is not None:
+        profiler.dump_stats(f'{base}.prof')
+        extra['profile'] = {
+            'file': f'{base}.prof',
+            'functions': get_profile_summary(profiler, profile_top),
+        }
+    result = write_report(f'{base}.json', get_instrumentation(), extra)
+    logging.getLogger(__name__).info(
+        f'Сохранён отчёт о выполнении: "{result}".')
+    return result
+
+
+def main(args: Optional[List[str]] = None):
     logger = logging.getLogger(__name__)
 
-    config = parse_config(FILE_CONFIGURATION)
+    arguments = parse_arguments(args)
+    config = parse_config(arguments.config)
+
+    files = list(arguments.files)
+    for manifest in arguments.manifest:
+        files += parse_manifest(manifest)
+    batch = len(files) > 0
+    headless = batch or arguments.headless
 
-    if 'Matplotlib' in config.sections() and \
+    import matplotlib
+
+    if headless:
+        matplotlib.use('Agg')
+    elif 'Matplotlib' in config.sections() and \
             'backend' in config['Matplotlib']:
         matplotlib.use(config['Matplotlib']['backend'])
     else:
         logger.warning('Не найдена опция `backend` в секции `Matplotlib`!')
 
-    if not ('Data' in config.sections() and 'file' in config['Data']):
-        logger.error('Не найдена опция `file` в секции `Data`!')
-        sys.exit(3)
-
-    logger.info('Начата обработка!')
-    data = parse_input(config['Data']['file'])
-    res = plot(data)
-    show_as_pdf(res)
+    if not batch:
+        if not ('Data' in config.sections() and 'file' in config['Data']):
+            logger.error('Не найдена опция `file` в секции `Data`!')
+            sys.exit(3)
+        files = [config['Data']['file']]
+
+    workers = 1
+    if 'Processing' in config.sections():
+        workers = config['Processing'].getint('workers', fallback=1)
+    if arguments.workers is not None:
+        workers = arguments.workers
+    if workers < 1:
+        workers = os.cpu_count() or 1
+
+    from concurrent.futures import ProcessPoolExecutor
+    from domain.caching import ResultCache
+    from domain.exporting import ResultExport
+    from domain.plotting import plot, plot_sweeps
+    from domain.visualizing import show_as_pdf
+
+    cache = None
+    if 'Cache' in config.sections() and config['Cache'].get('directory'):
+        cache = ResultCache(
+            config['Cache']['directory'],
+            config['Cache'].getint('max_size', fallback=512) * 1024 * 1024)
+
+    report, profile, profile_top = False, False, 30
+    if 'Profiling' in config.sections():
+        report = config['Profiling'].getboolean('report', fallback=False)
+        profile = config['Profiling'].getboolean('profile', fallback=False)
+        profile_top = config['Profiling'].getint('profile_top', fallback=30)
+
+    # Один пул процессов на все файлы: процессы запускаются и компилируют
+    # выражения один раз
+    with ExitStack() as stack:
+        executor = None
+        if workers > 1:
+            executor = stack.enter_context(
+                ProcessPoolExecutor(max_workers=workers))
+            logger.info(f'Построение фазовых портретов в {workers} '
+                        f'процессах.')
+
+        failed = 0
+        for file, name in zip(files, get_document_names(files)):
+            logger.info(f'Начата обработка: "{file}"!')
+            get_instrumentation().clear()
+            profiler = None
+            if profile:
+                import cProfile
+                profiler = cProfile.Profile()
+            time_start = time.perf_counter()
+            try:
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    with stage('loading'):
+                        data = parse_input(file)
+                    export = None
+                    if arguments.export:
+                        export = ResultExport(
+                            os.path.join(arguments.export, name))
+                    with stage('portraits'):
+                        res = plot(data, workers, cache, executor, export,
+                                   arguments.incremental)
+                    res += plot_sweeps(data)
+                    with stage('pdf'):
+                        path = show_as_pdf(res, arguments.output,
+                                           name if batch else None,
+                                           not headless)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+                if path is not None and (report or profile):
+                    write_run_report(path, file, workers,
+                                     time.perf_counter() - time_start,
+                                     profiler, profile_top)
+            except Exception as e:
+                if not batch:
+                    raise
+                logger.error(f'Ошибка при обработке "{file}": {e}')
+                failed += 1
+
+    if failed:
+        logger.error(f'Не обработано файлов: {failed} из {len(files)}.')
+        sys.exit(2)
 
 
 if __name__ == '__main__':
     configure_logger()
 
     try:
-        # main()
-        # temp()
-        temp_2()
+        main()
     except KeyboardInterrupt:
         sys.exit(1)
     except Exception as e:
@@ -0,0 +1,22 @@
+import os
+
+import pytest
+
+from domain.configuration import DataConfiguration
+from domain.loading import load_configuration
+
+
+# Файл с данными примера
+FILE_EXAMPLE = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'data_example.json')
+
+
+@pytest.fixture(scope='session')
+def example_content() -> str:
+    with open(FILE_EXAMPLE, encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.fixture
+def example(example_content) -> DataConfiguration:
+    return load_configuration(example_content)
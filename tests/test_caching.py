@@ -0,0 +1,100 @@
+import json
+import os
+
+import numpy
+import pytest
+
+from domain.caching import ResultCache
+from domain.instrumenting import COUNTER_CACHE_HITS, COUNTER_CACHE_MISSES, \
+    COUNTER_PORTRAITS_REUSED, collecting
+from domain.loading import load_configuration
+from domain.plotting import plot
+
+
+def get_content(color: str = 'blue', h_step: float = 0.01,
+                a: float = 1.0) -> str:
+    return json.dumps({
+        'expressions': {
+            'initial': ['y', '-a * x - y'],
+            'simplified': ['x', 'x'],
+            'variables': ['x', 'y'],
+            'parameters_variables': ['a'],
+        },
+        'amount_iterations': 200,
+        'h_step': h_step,
+        'rest_search_start': '(-1, -1)',
+        'rest_search_end': '(1, 1)',
+        'dataset': {'values': [{
+            'name': 'Name', 'parameters': {'a': a},
+            'trajectories': [
+                {'point': '(0.5, 0.5)', 'color': color,
+                 'tend_to_rest': False}],
+            'plot_separate_line': False,
+        }]},
+        'plotting': {'show_legend': False, 'show_grid': False},
+    })
+
+
+def run(cache: ResultCache, **changes) -> dict:
+    with collecting() as instrumentation:
+        plot(load_configuration(get_content(**changes)), cache=cache)
+    return instrumentation.counters
+
+
+def test_trajectory_key_ignores_color(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    assert run(cache).get(COUNTER_CACHE_MISSES) == 1
+    counters = run(cache, color='red')
+    assert counters.get(COUNTER_CACHE_HITS) == 1
+    assert COUNTER_CACHE_MISSES not in counters
+
+
+@pytest.mark.parametrize('changes', [{'h_step': 0.02}, {'a': 2.0}])
+def test_trajectory_key_depends_on_inputs(tmp_path, changes):
+    cache = ResultCache(str(tmp_path))
+    run(cache)
+    counters = run(cache, **changes)
+    assert counters.get(COUNTER_CACHE_MISSES) == 1
+    assert COUNTER_CACHE_HITS not in counters
+
+
+def test_evict_removes_least_recently_used(tmp_path):
+    array = numpy.zeros(100)
+    cache = ResultCache(str(tmp_path))
+    cache.store('a', array)
+    size = os.path.getsize(tmp_path / 'a.npy')
+    cache.max_size = 2 * size
+
+    cache.store('b', array)
+    # Время обращения задаётся явно, чтобы не зависеть от точности времени
+    # файловой системы: 'a' - самая старая запись, 'b' - более новая
+    os.utime(tmp_path / 'a.npy', (1000, 1000))
+    os.utime(tmp_path / 'b.npy', (2000, 2000))
+    assert cache.load('a') is not None
+    cache.store('c', array)
+
+    assert sorted(os.listdir(tmp_path)) == ['a.npy', 'c.npy']
+    assert cache.load('b') is None
+
+
+def test_incremental_reuses_unchanged_portraits(tmp_path):
+    pytest.importorskip('pypdf')
+    cache = ResultCache(str(tmp_path))
+
+    def run_incremental(**changes):
+        with collecting() as instrumentation:
+            result = plot(load_configuration(get_content(**changes)),
+                          cache=cache, incremental=True)
+        return result, instrumentation.counters.get(
+            COUNTER_PORTRAITS_REUSED, 0)
+
+    first, reused = run_incremental()
+    assert reused == 0
+    assert len(first) == 1 and os.path.isfile(first[0])
+
+    second, reused = run_incremental()
+    assert reused == 1 and second == first
+
+    # Цвет траектории не влияет на траекторию, но меняет страницу
+    third, reused = run_incremental(color='red')
+    assert reused == 0 and third != first
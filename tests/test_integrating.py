@@ -0,0 +1,120 @@
+import numpy
+import pytest
+
+import domain.integrating
+from domain.classes.point import Point
+from domain.compiling import get_scalar_namespace
+from domain.functions import get_system_for_expressions
+from domain.integrating import integrate
+from domain.loading import load_configuration
+
+
+def get_portraits(data):
+    return [(Point.parse_all([t.point for t in v.trajectories]),
+             v.parameters) for v in data.dataset.values]
+
+
+def rk4_reference(data, point, parameters):
+    # Прежний расчёт траектории по точке (`__get_next_point`)
+    namespace = dict(get_scalar_namespace(), **parameters)
+    f1, f2 = (eval(f'lambda x, y: {e}', namespace)
+              for e in data.expressions.initial)
+    h = data.h_step
+    x, y = point
+    result = [(x, y)]
+    for _ in range(data.amount_iterations):
+        k1, l1 = f1(x, y), f2(x, y)
+        k2, l2 = f1(x + h / 2 * k1, y + h / 2 * l1), \
+            f2(x + h / 2 * k1, y + h / 2 * l1)
+        k3, l3 = f1(x + h / 2 * k2, y + h / 2 * l2), \
+            f2(x + h / 2 * k2, y + h / 2 * l2)
+        k4, l4 = f1(x + h * k3, y + h * l3), f2(x + h * k3, y + h * l3)
+        x, y = x + h / 6 * (k1 + 2 * k2 + 2 * k3 + k4), \
+            y + h / 6 * (l1 + 2 * l2 + 2 * l3 + l4)
+        result.append((x, y))
+    return numpy.array(result)
+
+
+def test_rk4_matches_scalar_reference(example):
+    example.amount_iterations = 2000
+    example.jit = False
+    system = get_system_for_expressions(example)
+    for points, parameters in get_portraits(example):
+        trajectories = integrate(points, system, parameters, example, 'rk4',
+                                 stoppable=[False] * len(points))
+        for point, trajectory in zip(points, trajectories):
+            assert trajectory.steps == example.amount_iterations
+            assert numpy.allclose(
+                trajectory.points,
+                rk4_reference(example, point, parameters),
+                rtol=1e-12, atol=1e-12)
+
+
+def test_rk4_jit_matches_numpy(example, monkeypatch):
+    pytest.importorskip('numba')
+    from domain.jitting import get_rk4_kernel
+
+    monkeypatch.setattr(domain.integrating, 'JIT_MIN_ITERATIONS', 1)
+    example.amount_iterations = 2000
+    system = get_system_for_expressions(example)
+    assert get_rk4_kernel(system) is not None
+    for points, parameters in get_portraits(example):
+        result = []
+        for jit in (False, True):
+            example.jit = jit
+            result.append(integrate(points, system, parameters, example,
+                                    'rk4', stoppable=[False] * len(points)))
+        for expected, trajectory in zip(*result):
+            assert trajectory.steps == expected.steps
+            assert numpy.allclose(trajectory.points, expected.points,
+                                  rtol=1e-12, atol=1e-12)
+
+
+# Время интегрирования и шаг эталонного метода Рунге-Кутты при проверке
+# адаптивных методов
+ADAPTIVE_TIME_END = 0.2
+REFERENCE_H_STEP = 2e-5
+
+
+@pytest.fixture(scope='module')
+def fine_rk4(example_content):
+    data = load_configuration(example_content)
+    data.h_step = REFERENCE_H_STEP
+    data.amount_iterations = round(ADAPTIVE_TIME_END / REFERENCE_H_STEP)
+    data.jit = False
+    system = get_system_for_expressions(data)
+    return [numpy.array([trajectory.points[-1] for trajectory in integrate(
+        points, system, parameters, data, 'rk4',
+        stoppable=[False] * len(points))])
+        for points, parameters in get_portraits(data)]
+
+
+def check_adaptive(data, integrator, references, tolerance):
+    # Метод решает с запасом по точности (`tolerance` ограничивает ошибку
+    # каждого шага, а не всей траектории) и должен совпасть с эталоном в
+    # пределах точности по умолчанию
+    rtol, atol = data.rtol, data.atol
+    data.rtol, data.atol = tolerance, tolerance * 1e-3
+    data.h_step = 1e-3
+    data.amount_iterations = round(ADAPTIVE_TIME_END / data.h_step)
+    data.amount_points = 50
+    system = get_system_for_expressions(data)
+    for (points, parameters), reference in zip(get_portraits(data),
+                                               references):
+        trajectories = integrate(points, system, parameters, data,
+                                 integrator, stoppable=[False] * len(points))
+        for trajectory in trajectories:
+            assert len(trajectory) == data.amount_points + 1
+            assert trajectory.times[-1] == pytest.approx(ADAPTIVE_TIME_END)
+        end = numpy.array([trajectory.points[-1]
+                           for trajectory in trajectories])
+        assert numpy.allclose(end, reference, rtol=rtol, atol=atol)
+
+
+def test_dopri45_matches_fine_rk4(example, fine_rk4):
+    check_adaptive(example, 'dopri45', fine_rk4, 1e-9)
+
+
+def test_rosenbrock23_matches_fine_rk4(example, fine_rk4):
+    # Метод второго порядка: ошибки шагов накапливаются сильнее
+    check_adaptive(example, 'rosenbrock23', fine_rk4, 1e-11)
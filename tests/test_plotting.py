@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from domain.loading import ConfigurationError, load_configuration
+from domain.plotting import plot
+
+
+def get_content(**changes) -> str:
+    data = {
+        'expressions': {
+            'initial': ['y', '-x - y'],
+            'simplified': ['x', 'x'],
+            'variables': ['x', 'y'],
+            'parameters_variables': [],
+        },
+        'amount_iterations': 200,
+        'h_step': 0.01,
+        'rest_search_start': '(-1, -1)',
+        'rest_search_end': '(1, 1e0)',
+        'dataset': {'values': [{
+            'name': 'Name', 'parameters': {},
+            'trajectories': [
+                {'point': '(-0.5, 2.5e-1)', 'color': 'blue',
+                 'tend_to_rest': True}],
+            'plot_separate_line': False,
+        }]},
+        'plotting': {'show_legend': False, 'show_grid': False},
+    }
+    data.update(changes)
+    return json.dumps(data)
+
+
+def test_plot_with_negative_and_exponent_points():
+    figures = plot(load_configuration(get_content()))
+    assert len(figures) == 1
+    axes = figures[0].axes[0]
+    # Траектория и точка покоя (0, 0), найденная в части плоскости с
+    # отрицательными координатами
+    assert any(line.get_xdata()[0] == -0.5 for line in axes.lines)
+    assert any(list(line.get_xdata()) == [0.0] for line in axes.lines)
+
+
+def test_plot_field_with_negative_region():
+    content = get_content(plotting={
+        'show_legend': True, 'show_grid': False, 'vector_field': 'quiver',
+        'nullclines': True, 'field_start': '(-0.5, -1)',
+        'field_end': '(0.5, 1)'})
+    axes = plot(load_configuration(content))[0].axes[0]
+    assert axes.get_xlim()[0] <= -0.5 and axes.get_ylim()[0] <= -1
+
+
+@pytest.mark.parametrize('changes, path', [
+    ({'rest_search_start': '(-1; -1)'}, '$.rest_search_start'),
+    ({'integrator': 'rk5'}, '$.integrator'),
+    ({'plotting': {'show_legend': False, 'show_grid': False,
+                   'field_end': '(1, -)'}}, '$.plotting.field_end'),
+    ({'expressions': {'initial': ['y +', 'x'], 'simplified': ['x', 'x'],
+                      'variables': ['x', 'y'], 'parameters_variables': []}},
+     '$.expressions.initial[0]'),
+    ({'h_step': 0}, '$.h_step'),
+    ({'h_step': -0.01}, '$.h_step'),
+    ({'amount_iterations': -5}, '$.amount_iterations'),
+    ({'amount_iterations': 0}, '$.amount_iterations'),
+    ({'amount_points': 1}, '$.amount_points'),
+    ({'plotting': {'show_legend': False, 'show_grid': False,
+                   'max_points': 1}}, '$.plotting.max_points'),
+    ({'rtol': 0}, '$.rtol'),
+    ({'atol': -1e-9}, '$.atol'),
+])
+def test_load_configuration_reports_path(changes, path):
+    with pytest.raises(ConfigurationError) as error:
+        load_configuration(get_content(**changes))
+    assert error.value.path == path
@@ -0,0 +1,81 @@
+import math
+
+import numpy
+import pytest
+
+from domain.compiling import compile_system, get_scalar_namespace
+from domain.preprocessing import differentiate, preprocess
+
+
+# Значения параметров примера `data_example.json`
+PARAMETERS = {'b': 0.05, 'g': 0.03, 'S': 0.4, 'D': 0.04}
+# Системы для проверки: выражения примера и функции из таблицы производных
+SYSTEMS = [
+    ('(1 - x) * e ** (y / (1 + b * y)) - x / D',
+     '((1 - x) * e ** (y / (1 + b * y)) - y / S) / g'),
+    ('(1 - x) * exp((S / D * x) / (1 + b * S / D * x)) - x / D',
+     'S / D * x'),
+    ('sin(x * y) + cos(x) ** 2 - tan(y / S)', 'exp(-x) * log(y + D)'),
+    ('log10(x + 1) + log2(y + 1) + log1p(x * y)', 'expm1(x) - sqrt(x + y)'),
+    ('asin(x / 2) + acos(y / 2) + atan(x - y)',
+     'sinh(x) * cosh(y) - tanh(x * y)'),
+    ('asinh(x * y) + acosh(1 + x * x + y) + atanh(y / 2)',
+     'abs(x - y) + fabs(x + y) * b'),
+    ('pow(x + 1, y) + x ** 3 - y ** -2', 'atan2(y, x) + hypot(x, y) ** D'),
+    ('log(x + 2, 3) + 2 ** x + x ** y', '-x / (1 + y) ** 0.5'),
+]
+# Точки, в которых сравниваются значения (вне изломов `abs`)
+POINTS = [(0.2, 0.3), (0.35, 0.7), (0.6, 0.15), (0.45, 0.55)]
+
+
+def get_raw(expressions):
+    namespace = dict(get_scalar_namespace(), **PARAMETERS)
+    return [eval(f'lambda x, y: {e}', namespace) for e in expressions]
+
+
+def get_system(expressions):
+    return compile_system(tuple(expressions), ('x', 'y'),
+                          tuple(PARAMETERS))
+
+
+def test_preprocess_shares_and_hoists_subexpressions():
+    program = preprocess(SYSTEMS[0], ('x', 'y'), tuple(PARAMETERS))
+    assert len(program.temporaries) == 1
+    assert 'exp' in program.temporaries[0][1]
+    program = preprocess(SYSTEMS[1], ('x', 'y'), tuple(PARAMETERS))
+    assert ('_c0', 'S / D') in program.constants
+
+
+@pytest.mark.parametrize('expressions', SYSTEMS)
+def test_preprocessed_system_matches_raw(expressions):
+    raw = get_raw(expressions)
+    system = get_system(expressions)
+    scalar = system.scalar(PARAMETERS)
+    vectorized = system.vectorized(PARAMETERS)
+    xs, ys = numpy.array(POINTS).T
+    for x, y in POINTS:
+        expected = [f(x, y) for f in raw]
+        assert numpy.allclose(scalar(x, y), expected, rtol=1e-13, atol=0)
+    expected = [[f(x, y) for x, y in POINTS] for f in raw]
+    assert numpy.allclose(vectorized(xs, ys), expected, rtol=1e-13, atol=0)
+
+
+@pytest.mark.parametrize('expressions', SYSTEMS)
+def test_jacobian_matches_central_differences(expressions):
+    raw = get_raw(expressions)
+    system = get_system(expressions)
+    # Матрица Якоби должна вычисляться по символьным производным, а не
+    # конечными разностями
+    assert system.program_jacobian is not None
+    jacobian = system.jacobian(PARAMETERS)
+    h = 1e-6
+    for x, y in POINTS:
+        expected = [[(f(x + h, y) - f(x - h, y)) / (2 * h),
+                     (f(x, y + h) - f(x, y - h)) / (2 * h)] for f in raw]
+        assert numpy.allclose(jacobian(x, y), expected, rtol=1e-7, atol=1e-7)
+
+
+def test_differentiate_keeps_parameters_constant():
+    derivative = differentiate('e ** (b * x) + pi * y', 'x', ('x', 'y', 'b'))
+    f = eval(f'lambda x, y, b: {derivative}', get_scalar_namespace())
+    assert f(0.5, 2.0, 0.3) == pytest.approx(0.3 * math.exp(0.15))
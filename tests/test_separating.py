@@ -0,0 +1,29 @@
+import numpy
+import pytest
+
+from domain.classes.point import Point
+from domain.functions import get_system_for_expressions
+from domain.integrating import Convergence
+from domain.separating import LABEL_DIVERGED, classify_basins
+from domain.solving import find_rest_points
+
+
+@pytest.mark.parametrize('index', [0, 1])
+def test_classify_basins_matches_full_grid(example, index):
+    system = get_system_for_expressions(example)
+    parameters = example.dataset.values[index].parameters
+    rest_points = [p for p in find_rest_points(
+        system, parameters, Point.try_parse(example.rest_search_start),
+        Point.try_parse(example.rest_search_end)) if p.stable]
+    assert len(rest_points) == 2
+
+    def classify(coarse_step: int) -> numpy.ndarray:
+        return classify_basins(
+            system.vectorized(parameters), rest_points, Point(0, 1),
+            Point(1, 8), (201, 301), coarse_step=coarse_step,
+            convergence=Convergence(rest_points=rest_points,
+                                    radius=0.01))[2]
+
+    labels = classify(10)
+    assert set(numpy.unique(labels)) == {LABEL_DIVERGED, 0, 1}
+    assert numpy.array_equal(labels, classify(1))
@@ -0,0 +1,50 @@
+import numpy
+
+from domain.classes.point import Point
+from domain.classes.rest_point import KIND_DEGENERATE, KIND_SADDLE
+from domain.compiling import compile_system
+from domain.solving import find_rest_points, solve
+
+
+def test_find_rest_points_merges_double_root():
+    system = compile_system(('x ** 2', '-y'), ('x', 'y'), ())
+    result = find_rest_points(system, {}, Point(-1, -1), Point(1, 1))
+    assert len(result) == 1
+    assert abs(result[0].x) < 1e-7 and abs(result[0].y) < 1e-7
+    assert result[0].kind == KIND_DEGENERATE
+
+
+def test_find_rest_points_keeps_simple_roots():
+    system = compile_system(('x ** 2 - 0.25', '-y'), ('x', 'y'), ())
+    result = find_rest_points(system, {}, Point(-1, -1), Point(1, 1))
+    assert [round(p.x, 9) for p in result] == [-0.5, 0.5]
+    assert all(p.kind == KIND_SADDLE or p.stable for p in result)
+
+
+def test_solve_finds_double_root():
+    def f(x):
+        return (x - 0.3) ** 2
+
+    result = solve(f, (0, 1), f_vectorized=f)
+    assert len(result) == 1
+    assert abs(result[0] - 0.3) < 1e-7
+
+
+def test_solve_rejects_near_miss():
+    def f(x):
+        return (x - 0.3) ** 2 + 1e-7
+
+    assert solve(f, (0, 1), f_vectorized=f) == []
+
+
+def test_solve_splits_close_roots_between_nodes():
+    def f(x):
+        return (x - 0.3) ** 2 - 1e-10
+
+    result = solve(f, (0, 1), f_vectorized=f)
+    assert numpy.allclose(result, [0.3 - 1e-5, 0.3 + 1e-5], atol=1e-9)
+
+
+def test_solve_scalar_function_without_vectorized():
+    result = solve(lambda x: (x - 0.25) * (x - 0.75), (0, 1))
+    assert numpy.allclose(result, [0.25, 0.75])
@@ -0,0 +1,19 @@
+import numpy
+import pytest
+
+from domain.streaming import DecimatingSink
+
+
+@pytest.mark.parametrize('amount', [2, 3, 4, 5, 6, 7, 11, 100])
+@pytest.mark.parametrize('length', [1, 3, 500, 1000])
+def test_decimating_sink_keeps_at_most_amount_points(amount, length):
+    points = numpy.random.default_rng(amount).normal(size=(length, 2))
+    sink = DecimatingSink(1000, amount)
+    for chunk in numpy.array_split(points, min(length, 7)):
+        sink.consume(chunk)
+    trajectory = sink.finish()
+
+    assert len(trajectory) <= amount
+    assert numpy.array_equal(trajectory.points[0], points[0])
+    assert numpy.array_equal(trajectory.points[-1], points[-1])
+    assert numpy.all(numpy.diff(trajectory.times) > 0)
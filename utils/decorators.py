@@ -1,4 +1,5 @@
 from typing import Callable, Tuple, Any
+import functools
 import logging
 import time
 
@@ -8,19 +9,28 @@ def time_measurement(output_type: str = 'return') -> Callable:
     Замеряет время работы функции
 
     :param output_type: Принимает значения либо: `logger` - время будет
-    передано логгеру в качестве сообщения с уровнем `INFO`, `return` - время
-    будет передано в качестве второго значения результата (значение по умолчанию)
+    передано логгеру в качестве сообщения с уровнем `INFO`, а результат
+    функции не изменится, `return` - время будет передано в качестве второго
+    значения результата (значение по умолчанию)
     :type output_type: str
     :return: Время работы функции
     :rtype: Tuple[Any, float] | Any
     """
+    if output_type not in ('logger', 'return'):
+        raise ValueError(f'Неизвестный способ вывода времени: '
+                         f'"{output_type}"!')
+
     def time_measurement_inner(func) -> Callable:
+        @functools.wraps(func)
         def wrapper(*args, **kwargs) -> Tuple[Any, float] | Any:
-            time_start = time.time()
+            time_start = time.perf_counter()
             result = func(*args, **kwargs)
-            time_end = time.time()
+            time_elapsed = time.perf_counter() - time_start
             if output_type == 'logger':
-                logging.getLogger(__name__).info(time_end - time_start)
-            return result, time_end - time_start
+                logging.getLogger('__main__').info(
+                    f'Время работы `{func.__qualname__}`: '
+                    f'{time_elapsed:.6f} с.')
+                return result
+            return result, time_elapsed
         return wrapper
     return time_measurement_inner